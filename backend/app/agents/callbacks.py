@@ -0,0 +1,27 @@
+"""LangChain callbacks attached to the shared chat models."""
+from langchain_core.callbacks import BaseCallbackHandler
+from app.metrics import record_llm_usage
+from app.services.progress import current_monitor, response_usage
+from typing import Any
+
+
+class _StageUsageRouter(BaseCallbackHandler):
+    """
+    Sends LLM usage to the monitor of the stage running on the calling thread.
+
+    Attached once to the shared chat models; LangChain runs synchronous
+    callbacks on the thread that made the call.
+    """
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        monitor = current_monitor()
+        if monitor is not None:
+            monitor.on_llm_end(response, **kwargs)
+            return
+        # Calls made outside a stage graph, such as a batch's shared job analysis
+        usage = response_usage(response)
+        if usage is not None:
+            record_llm_usage("other", *usage)
+
+
+stage_usage_handler = _StageUsageRouter()
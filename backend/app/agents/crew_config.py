@@ -1,59 +1,247 @@
-from crewai import Agent, Task, Crew
-from langchain_anthropic import ChatAnthropic
+from app.rate_limit import LLMRateLimiter, RateLimitedMessages, get_rate_limiter
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+import httpx
 import os
+import threading
 
-def get_llm():
-    """Get configured Claude LLM instance."""
-    return ChatAnthropic(
-        model="claude-sonnet-4-20250514",
-        anthropic_api_key=os.getenv("ANTHROPIC_API_KEY"),
-        temperature=0.1
-    )
-
-def create_resume_parser_agent() -> Agent:
-    """Create agent for parsing resume content."""
-    return Agent(
-        role="Expert Resume Analyst",
-        goal="Extract and structure all resume information accurately",
-        backstory="""You are an expert at analyzing resumes. You can identify
+# CrewAI, LangChain and the Anthropic SDK take seconds to import, so they
+# are loaded when the first client, model or agent is built (or by the
+# startup warm-up), not when the app starts
+if TYPE_CHECKING:
+    from anthropic import Anthropic
+    from crewai import Agent
+    from langchain_anthropic import ChatAnthropic
+
+CLAUDE_MODEL = os.getenv("CLAUDE_MODEL", "claude-sonnet-4-20250514")
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.1"))
+
+# "anthropic" calls Claude; "fake" answers locally with canned JSON after
+# a simulated delay (see app.agents.fake_llm), for load tests and CI
+LLM_BACKEND = os.getenv("LLM_BACKEND", "anthropic").lower()
+LLM_BACKENDS = ("anthropic", "fake")
+
+# Connection pool shared by every Claude call in the process
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+
+# Bump whenever an agent definition or task prompt changes so cached
+# analyses produced by the old prompts are no longer served.
+AGENT_VERSION = "3"
+
+AGENT_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "resume_parser": {
+        "role": "Expert Resume Analyst",
+        "goal": "Extract and structure all resume information accurately",
+        "backstory": """You are an expert at analyzing resumes. You can identify
         all sections, extract skills, experience, education, and assess formatting
         quality. You understand ATS systems and what makes resumes parseable.""",
-        llm=get_llm(),
-        verbose=True
-    )
-
-def create_job_analyst_agent() -> Agent:
-    """Create agent for analyzing job postings."""
-    return Agent(
-        role="Job Requirements Specialist",
-        goal="Extract and analyze job posting requirements comprehensively",
-        backstory="""You are an expert at analyzing job postings. You can identify
+    },
+    "job_analyst": {
+        "role": "Job Requirements Specialist",
+        "goal": "Extract and analyze job posting requirements comprehensively",
+        "backstory": """You are an expert at analyzing job postings. You can identify
         required vs preferred skills, experience levels, key responsibilities,
         and company culture signals from job descriptions.""",
-        llm=get_llm(),
-        verbose=True
-    )
-
-def create_quality_scorer_agent() -> Agent:
-    """Create agent for scoring resume quality."""
-    return Agent(
-        role="Career Coach and Resume Critic",
-        goal="Evaluate resume quality and provide actionable improvement suggestions",
-        backstory="""You are a career coach with 15 years of experience. You know
+    },
+    "quality_scorer": {
+        "role": "Career Coach and Resume Critic",
+        "goal": "Evaluate resume quality and provide actionable improvement suggestions",
+        "backstory": """You are a career coach with 15 years of experience. You know
         what makes resumes effective: quantified achievements, clear impact statements,
         proper formatting, ATS optimization, and professional language.""",
-        llm=get_llm(),
-        verbose=True
-    )
-
-def create_match_analyzer_agent() -> Agent:
-    """Create agent for matching resume to job."""
-    return Agent(
-        role="Talent Matching Specialist",
-        goal="Analyze how well a resume matches specific job requirements",
-        backstory="""You are an expert recruiter who can quickly assess candidate-job
+    },
+    "match_analyzer": {
+        "role": "Talent Matching Specialist",
+        "goal": "Analyze how well a resume matches specific job requirements",
+        "backstory": """You are an expert recruiter who can quickly assess candidate-job
         fit. You identify keyword matches, skills gaps, experience alignment, and
         provide specific recommendations for tailoring applications.""",
-        llm=get_llm(),
-        verbose=True
-    )
+    },
+}
+
+
+class LLMRegistry:
+    """
+    Process-wide Claude clients and agents, shared by concurrent analyses.
+
+    One Anthropic client owns the HTTP connection pool, so keep-alive
+    connections are reused across requests. Chat models are cached per
+    (model, temperature) and all use that client. Agents are built from
+    ``AGENT_TEMPLATES`` once per worker thread: a CrewAI agent holds
+    per-task executor state, so it is reused by one thread at a time.
+    Every Crew rebuilds its agents' executors, so no conversation memory
+    carries over from one analysis to the next.
+
+    Every call, from the agents or the single-call analysis, waits on one
+    ``LLMRateLimiter`` so concurrent analyses share the provider's request
+    and token limits instead of each running into them.
+
+    With the "fake" backend the client and chat models are the local
+    stand-ins from ``app.agents.fake_llm``; everything else is unchanged.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        max_keepalive: int = LLM_MAX_KEEPALIVE,
+        timeout: float = LLM_TIMEOUT,
+        backend: str = LLM_BACKEND,
+        limiter: Optional[LLMRateLimiter] = None
+    ):
+        """
+        Initialize registry.
+
+        Args:
+            max_connections: Upper bound on open connections to the API
+            max_keepalive: Idle connections kept open for reuse
+            timeout: Request timeout in seconds
+            backend: "anthropic" or "fake"
+            limiter: Rate limiter for every call (the process-wide one by default)
+
+        Raises:
+            ValueError: If the backend is unknown
+        """
+        if backend not in LLM_BACKENDS:
+            raise ValueError(f"LLM_BACKEND must be one of: {', '.join(LLM_BACKENDS)}")
+        self.backend = backend
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.timeout = timeout
+        self.limiter = limiter or get_rate_limiter()
+        self._client: Optional[Any] = None
+        self._llms: Dict[Tuple[str, float], Any] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.agents_built = 0
+
+    def client(self) -> "Anthropic":
+        """The shared Anthropic client, created on first use; its calls are rate limited."""
+        with self._lock:
+            if self._client is None:
+                if self.backend == "fake":
+                    from app.agents.fake_llm import FakeAnthropic
+
+                    client = FakeAnthropic()
+                else:
+                    from anthropic import Anthropic
+
+                    client = Anthropic(
+                        api_key=os.getenv("ANTHROPIC_API_KEY"),
+                        # The rate limiter retries 429s; SDK retries would
+                        # hide them from it and multiply the attempts
+                        max_retries=0,
+                        http_client=httpx.Client(
+                            limits=httpx.Limits(
+                                max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_keepalive
+                            ),
+                            timeout=self.timeout
+                        )
+                    )
+                # ChatAnthropic and the structured engine both call
+                # messages.create, so this one wrapper covers every call
+                client.messages = RateLimitedMessages(client.messages, self.limiter)
+                self._client = client
+            return self._client
+
+    def llm(self, model: str = CLAUDE_MODEL, temperature: float = LLM_TEMPERATURE) -> "ChatAnthropic":
+        """
+        Chat model for a model and temperature, created on first use.
+
+        Args:
+            model: Claude model name
+            temperature: Sampling temperature
+
+        Returns:
+            Shared chat model using the shared client
+        """
+        from app.agents.callbacks import stage_usage_handler
+
+        client = self.client()
+        key = (model, temperature)
+        with self._lock:
+            llm = self._llms.get(key)
+            if llm is None and self.backend == "fake":
+                from app.agents.fake_llm import FakeChatModel
+
+                llm = self._llms[key] = FakeChatModel(
+                    callbacks=[stage_usage_handler], limiter=self.limiter
+                )
+            elif llm is None:
+                from langchain_anthropic import ChatAnthropic
+
+                llm = ChatAnthropic(
+                    model=model,
+                    anthropic_api_key=os.getenv("ANTHROPIC_API_KEY"),
+                    temperature=temperature,
+                    callbacks=[stage_usage_handler]
+                )
+                # ChatAnthropic builds its own client; use the pooled one
+                object.__setattr__(llm, "_client", client)
+                self._llms[key] = llm
+            return llm
+
+    def agent(self, name: str) -> "Agent":
+        """
+        This thread's agent for a template, created on first use.
+
+        Args:
+            name: Key of ``AGENT_TEMPLATES``
+
+        Returns:
+            Agent using the shared chat model
+        """
+        agents = getattr(self._local, "agents", None)
+        if agents is None:
+            agents = self._local.agents = {}
+        if name not in agents:
+            from crewai import Agent
+
+            agents[name] = Agent(**AGENT_TEMPLATES[name], llm=self.llm(), verbose=True)
+            with self._lock:
+                self.agents_built += 1
+        return agents[name]
+
+    def stats(self) -> dict:
+        """Cached models and agents built so far."""
+        return {
+            "backend": self.backend,
+            "llms": len(self._llms),
+            "agents_built": self.agents_built,
+            "max_connections": self.max_connections,
+            "max_keepalive": self.max_keepalive,
+        }
+
+
+_registry: Optional[LLMRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_llm_registry() -> LLMRegistry:
+    """Get the process-wide LLM registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LLMRegistry()
+        return _registry
+
+def get_llm():
+    """Get the shared Claude LLM instance."""
+    return get_llm_registry().llm()
+
+def create_resume_parser_agent() -> "Agent":
+    """Get agent for parsing resume content."""
+    return get_llm_registry().agent("resume_parser")
+
+def create_job_analyst_agent() -> "Agent":
+    """Get agent for analyzing job postings."""
+    return get_llm_registry().agent("job_analyst")
+
+def create_quality_scorer_agent() -> "Agent":
+    """Get agent for scoring resume quality."""
+    return get_llm_registry().agent("quality_scorer")
+
+def create_match_analyzer_agent() -> "Agent":
+    """Get agent for matching resume to job."""
+    return get_llm_registry().agent("match_analyzer")
@@ -0,0 +1,204 @@
+"""
+Deterministic stand-ins for Claude, for load tests and offline runs.
+
+Selected with ``LLM_BACKEND=fake``. Both fakes sleep for a configurable
+latency, so concurrency behaves as it would against the API, and answer
+with canned JSON shaped like each stage's expected output. Replies and
+delays are seeded from the prompt, so a run is reproducible.
+"""
+from anthropic.types import Message, ToolUseBlock, Usage
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from app.prompt_builder import count_tokens
+from app.rate_limit import estimate_call_tokens
+from typing import Any, Dict, List, Optional
+import json
+import os
+import random
+import time
+
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0.5"))
+FAKE_LLM_JITTER = float(os.getenv("FAKE_LLM_JITTER", "0.1"))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+
+FAKE_MODEL = "fake-claude"
+
+SKILLS = ["Python", "SQL", "Docker", "AWS", "React", "Kubernetes", "Go", "Terraform"]
+
+
+def _rng(seed: int, prompt: str) -> random.Random:
+    # String seeds are hashed with SHA-512, independent of PYTHONHASHSEED
+    return random.Random(f"{seed}:{prompt}")
+
+
+def _delay(rng: random.Random, latency: float, jitter: float) -> None:
+    seconds = latency + rng.uniform(-jitter, jitter)
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+def fake_stage_output(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    """
+    Canned JSON for the stage a prompt belongs to.
+
+    Args:
+        prompt: Task prompt, recognized by the wording of the stage prompts
+        rng: Seeded generator for scores and picks
+
+    Returns:
+        Output with the keys the stage's prompt asks for
+    """
+    skills = rng.sample(SKILLS, 4)
+    if "Compare the resume" in prompt:
+        return {
+            "match_score": rng.randint(55, 90),
+            "matched_keywords": skills[:3],
+            "missing_keywords": skills[3:],
+            "skills_gap": [f"Limited production experience with {skills[3]}"],
+            "strengths": [f"Hands-on {skills[0]} work", f"Delivered projects using {skills[1]}"],
+            "suggestions": [f"Mention any {skills[3]} exposure", "Lead with measurable outcomes"],
+        }
+    if "resume's quality" in prompt:
+        categories = {
+            name: rng.randint(12, 19)
+            for name in ("formatting", "achievements", "clarity", "language", "ats")
+        }
+        return {
+            "overall_score": sum(categories.values()),
+            "category_scores": categories,
+            "feedback": ["Quantify more achievements", "Tighten the summary"],
+        }
+    if "Analyze this job posting" in prompt:
+        return {
+            "required_skills": skills[:3],
+            "preferred_skills": skills[3:],
+            "experience_level": rng.choice(["Mid-level", "Senior"]),
+            "responsibilities": ["Build and operate services", "Review code"],
+            "keywords": skills,
+        }
+    return {
+        "contact": {"name": "Candidate"},
+        "experience": [{"company": "Example Corp", "role": "Engineer", "dates": "2020-2024"}],
+        "education": [{"degree": "BSc Computer Science"}],
+        "skills": skills,
+        "certifications": [],
+    }
+
+
+def fake_structured_analysis(rng: random.Random) -> Dict[str, Any]:
+    """Canned input for the structured engine's ``record_analysis`` tool."""
+    skills = rng.sample(SKILLS, 4)
+    feedback = [
+        {"category": category, "score": rng.randint(12, 19),
+         "feedback": f"{category} is solid", "suggestions": ["Add metrics"]}
+        for category in ("Formatting", "Achievements", "Clarity", "Language", "ATS")
+    ]
+    return {
+        "resume_quality_score": sum(item["score"] for item in feedback),
+        "quality_feedback": feedback,
+        "match_analysis": {
+            "match_score": rng.randint(55, 90),
+            "keyword_analysis": {
+                "matched_keywords": skills[:3],
+                "missing_keywords": skills[3:],
+                "match_percentage": 75.0,
+            },
+            "skills_gap": [f"No {skills[3]} experience"],
+            "strengths": [f"Strong {skills[0]} background"],
+            "improvement_areas": ["Lead with measurable outcomes"],
+        },
+    }
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers agent tasks in ReAct form without a network call."""
+
+    latency: float = FAKE_LLM_LATENCY
+    jitter: float = FAKE_LLM_JITTER
+    seed: int = FAKE_LLM_SEED
+    # Rate limiter calls wait on, like the real client's (none by default)
+    limiter: Optional[Any] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-claude"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        if self.limiter is None:
+            return self._reply(prompt)
+        tokens = estimate_call_tokens({"messages": [prompt]})
+        return self.limiter.call(lambda: self._reply(prompt), tokens)
+
+    def _reply(self, prompt: str) -> ChatResult:
+        rng = _rng(self.seed, prompt)
+        _delay(rng, self.latency, self.jitter)
+        data = json.dumps(fake_stage_output(prompt, rng), indent=2)
+        # CrewAI's output parser finishes on "Final Answer:"
+        text = f"Thought: I now know the final answer\nFinal Answer: ```json\n{data}\n```"
+        usage = {"input_tokens": count_tokens(prompt), "output_tokens": count_tokens(text)}
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=text))],
+            llm_output={"model": FAKE_MODEL, "usage": usage}
+        )
+
+
+class _FakeMessages:
+    def __init__(self, owner: "FakeAnthropic"):
+        self.owner = owner
+
+    def create(self, **kwargs: Any) -> Message:
+        prompt = json.dumps(kwargs.get("messages", []), sort_keys=True, default=str)
+        rng = _rng(self.owner.seed, prompt)
+        _delay(rng, self.owner.latency, self.owner.jitter)
+        self.owner.calls += 1
+        name = (kwargs.get("tool_choice") or {}).get("name", "record_analysis")
+        data = fake_structured_analysis(rng)
+        if name != "record_analysis":
+            # A repair turn only resends the fields it is asked for
+            tool = next(t for t in kwargs["tools"] if t["name"] == name)
+            data = {field: data[field] for field in tool["input_schema"]["properties"]}
+        return Message(
+            id=f"msg_fake_{self.owner.calls}",
+            type="message",
+            role="assistant",
+            model=kwargs.get("model", FAKE_MODEL),
+            content=[ToolUseBlock(type="tool_use", id=f"toolu_fake_{self.owner.calls}",
+                                  name=name, input=data)],
+            stop_reason="tool_use",
+            usage=Usage(
+                input_tokens=count_tokens(prompt + str(kwargs.get("system", ""))),
+                output_tokens=count_tokens(json.dumps(data))
+            )
+        )
+
+
+class FakeAnthropic:
+    """Anthropic client stand-in answering ``messages.create`` tool calls."""
+
+    def __init__(
+        self,
+        latency: float = FAKE_LLM_LATENCY,
+        jitter: float = FAKE_LLM_JITTER,
+        seed: int = FAKE_LLM_SEED
+    ):
+        """
+        Initialize client.
+
+        Args:
+            latency: Mean seconds each call takes
+            jitter: Calls take ``latency`` plus or minus up to this many seconds
+            seed: Base seed; replies also depend on the request
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self.calls = 0
+        self.messages = _FakeMessages(self)
@@ -0,0 +1,298 @@
+"""Content-addressed caches with TTL and size-bounded eviction."""
+from collections import OrderedDict
+from typing import Optional
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different extractions hash the same."""
+    return " ".join(text.split())
+
+
+def content_hash(*parts: str) -> str:
+    """
+    Hash a sequence of strings into a stable cache key.
+
+    Args:
+        *parts: Strings making up the key, in order
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class CacheBackend:
+    """Interface for string caches keyed by content hash."""
+
+    def __init__(self, ttl: Optional[float] = None):
+        """
+        Initialize cache.
+
+        Args:
+            ttl: Default seconds an entry stays valid, or None for no expiry
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None on a miss or expired entry."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Store a value, overriding the default TTL if ``ttl`` is given."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Remove an entry if present."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        raise NotImplementedError
+
+    def _expires_at(self, ttl: Optional[float]) -> Optional[float]:
+        ttl = self.ttl if ttl is None else ttl
+        return time.time() + ttl if ttl else None
+
+    def _record(self, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self) -> dict:
+        """Hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache capped by the total size of stored values."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: Optional[float] = None):
+        """
+        Initialize in-memory cache.
+
+        Args:
+            max_bytes: Upper bound on the summed UTF-8 size of keys and values
+            ttl: Default seconds an entry stays valid
+        """
+        super().__init__(ttl)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return self._record(None)
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                return self._record(None)
+            self._entries.move_to_end(key)
+            return self._record(value)
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        size = len(key.encode("utf-8")) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, self._expires_at(ttl), size)
+            self._size += size
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._size -= size
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update({"backend": "memory", "entries": len(self._entries),
+                      "bytes": self._size, "max_bytes": self.max_bytes})
+        return stats
+
+
+class SQLiteCache(CacheBackend):
+    """On-disk cache in a SQLite file, evicting least recently used entries."""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 512 * 1024 * 1024,
+        ttl: Optional[float] = None
+    ):
+        """
+        Initialize SQLite cache.
+
+        Args:
+            path: Database file path, created if missing
+            max_bytes: Upper bound on the summed size of stored values
+            ttl: Default seconds an entry stays valid
+        """
+        super().__init__(ttl)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return self._record(None)
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return self._record(None)
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return self._record(value)
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, self._expires_at(ttl), now)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        )
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at").fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", doomed)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+            ).fetchone()
+        stats.update({"backend": "sqlite", "entries": entries,
+                      "bytes": size, "max_bytes": self.max_bytes})
+        return stats
+
+
+def create_cache(prefix: str, default_path: str) -> CacheBackend:
+    """
+    Build a cache backend from ``{prefix}_*`` environment variables.
+
+    ``{prefix}_BACKEND`` selects ``memory`` (default) or ``sqlite``;
+    ``{prefix}_TTL``, ``{prefix}_MAX_BYTES`` and ``{prefix}_PATH`` tune it.
+
+    Args:
+        prefix: Environment variable prefix, e.g. ``RESULT_CACHE``
+        default_path: SQLite file used when ``{prefix}_PATH`` is unset
+
+    Returns:
+        Configured cache backend
+    """
+    backend = os.getenv(f"{prefix}_BACKEND", "memory").lower()
+    ttl = float(os.getenv(f"{prefix}_TTL", "86400")) or None
+    max_bytes = os.getenv(f"{prefix}_MAX_BYTES")
+
+    if backend == "sqlite":
+        return SQLiteCache(
+            os.getenv(f"{prefix}_PATH", default_path),
+            max_bytes=int(max_bytes) if max_bytes else 512 * 1024 * 1024,
+            ttl=ttl
+        )
+    if backend != "memory":
+        raise ValueError(f"Unknown cache backend for {prefix}: {backend}")
+    return MemoryCache(
+        max_bytes=int(max_bytes) if max_bytes else 64 * 1024 * 1024,
+        ttl=ttl
+    )
+
+
+_result_cache: Optional[CacheBackend] = None
+
+
+def get_result_cache() -> CacheBackend:
+    """Get the process-wide cache of completed analysis results."""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = create_cache("RESULT_CACHE", ".cache/results.sqlite3")
+    return _result_cache
+
+
+_stage_cache: Optional[CacheBackend] = None
+
+
+def get_stage_cache() -> CacheBackend:
+    """Get the process-wide cache of parsed resume and job stage outputs."""
+    global _stage_cache
+    if _stage_cache is None:
+        _stage_cache = create_cache("STAGE_CACHE", ".cache/stages.sqlite3")
+    return _stage_cache
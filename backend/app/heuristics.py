@@ -0,0 +1,148 @@
+"""Instant resume quality scoring from the extracted text, without an LLM."""
+from app.models import ResumeDocument
+from app.resume_layout import BULLET_PATTERN, EMAIL_PATTERN, PHONE_PATTERN, section_kind
+from typing import Dict, List, Optional, Set
+import json
+import re
+
+ACTION_VERBS = {
+    "achieved", "analyzed", "architected", "automated", "built", "championed", "coached",
+    "created", "cut", "decreased", "defined", "delivered", "deployed", "designed",
+    "developed", "directed", "drove", "established", "expanded", "generated", "grew",
+    "implemented", "improved", "increased", "launched", "led", "managed", "mentored",
+    "migrated", "negotiated", "optimized", "orchestrated", "owned", "pioneered",
+    "produced", "reduced", "refactored", "resolved", "restructured", "saved", "scaled",
+    "shipped", "simplified", "spearheaded", "streamlined", "trained", "transformed",
+    "wrote",
+}
+
+# A number that reads as a metric: percentages, money, multipliers, counts.
+# Bare four-digit years are not achievements.
+METRIC_PATTERN = re.compile(
+    r"\d+(?:[.,]\d+)?\s*(?:%|percent|x\b|k\b|m\b|\+)|[$€£]\s?\d|\b(?!(?:19|20)\d{2}\b)\d{2,}\b",
+    re.IGNORECASE
+)
+FIRST_PERSON_PATTERN = re.compile(r"\b(?:i|me|my|mine|myself)\b", re.IGNORECASE)
+
+CORE_SECTIONS = ("experience", "education", "skills")
+IDEAL_WORDS = (300, 1000)
+MIN_STATEMENT_WORDS = 6
+
+
+def _statements(resume_text: str, document: Optional[ResumeDocument]) -> List[str]:
+    """Achievement-like lines: bullets when there are any, else longer lines."""
+    if document is not None:
+        bullets = [b for section in document.sections for b in section.bullets]
+    else:
+        bullets = [
+            BULLET_PATTERN.sub("", line) for line in resume_text.splitlines()
+            if BULLET_PATTERN.match(line)
+        ]
+    if bullets:
+        return bullets
+    return [
+        line.strip() for line in resume_text.splitlines()
+        if len(line.split()) >= MIN_STATEMENT_WORDS
+    ]
+
+
+def _sections(resume_text: str, document: Optional[ResumeDocument]) -> Set[str]:
+    if document is not None:
+        return {section.kind for section in document.sections}
+    kinds = set()
+    for line in resume_text.splitlines():
+        line = line.strip().rstrip(":")
+        if 0 < len(line.split()) <= 5:
+            kind = section_kind(line)
+            if kind:
+                kinds.add(kind)
+    return kinds
+
+
+def score_resume_quality(
+    resume_text: str,
+    resume_document: Optional[ResumeDocument] = None
+) -> dict:
+    """
+    Score a resume on the quality stage's five 0-20 categories.
+
+    Args:
+        resume_text: Extracted resume text
+        resume_document: Sectioned resume, if layout extraction was used
+
+    Returns:
+        overall_score, category_scores and feedback, as the quality agent returns them
+    """
+    words = resume_text.split()
+    statements = _statements(resume_text, resume_document)
+    sections = _sections(resume_text, resume_document)
+    feedback: List[str] = []
+
+    quantified = sum(1 for s in statements if METRIC_PATTERN.search(s))
+    action_led = sum(
+        1 for s in statements
+        if s.split() and s.split()[0].lower().strip(",.;:") in ACTION_VERBS
+    )
+    quantified_share = quantified / len(statements) if statements else 0.0
+    action_share = action_led / len(statements) if statements else 0.0
+
+    core = [kind for kind in CORE_SECTIONS if kind in sections]
+    in_range = IDEAL_WORDS[0] <= len(words) <= IDEAL_WORDS[1]
+    formatting = 4 * len(core) + (4 if statements else 0) + (4 if in_range else 0)
+    for kind in CORE_SECTIONS:
+        if kind not in sections:
+            feedback.append(f"Add a clearly headed {kind.title()} section")
+    if not in_range:
+        feedback.append(
+            f"Aim for {IDEAL_WORDS[0]}-{IDEAL_WORDS[1]} words (currently {len(words)})"
+        )
+
+    quantified_score = min(20.0, quantified_share * 40)
+    if quantified_share < 0.5:
+        feedback.append("Quantify more achievements with numbers, percentages or money")
+
+    clarity = min(20.0, 4 + action_share * 20)
+    if action_share < 0.5:
+        feedback.append("Start bullet points with strong action verbs (led, built, reduced)")
+
+    first_person = len(FIRST_PERSON_PATTERN.findall(resume_text))
+    per_hundred = first_person / max(len(words), 1) * 100
+    language = max(0.0, 20 - per_hundred * 10)
+    if first_person:
+        feedback.append("Avoid first-person pronouns (I, me, my)")
+
+    has_email = bool(EMAIL_PATTERN.search(resume_text))
+    has_phone = bool(PHONE_PATTERN.search(resume_text))
+    ats = 6 * has_email + 4 * has_phone + 2 * min(len(sections), 5)
+    if not has_email or not has_phone:
+        feedback.append("Include an email address and phone number in plain text")
+
+    category_scores: Dict[str, float] = {
+        "formatting": round(float(formatting), 1),
+        "quantified_achievements": round(quantified_score, 1),
+        "clarity_and_impact": round(clarity, 1),
+        "professional_language": round(language, 1),
+        "ats_optimization": round(float(ats), 1),
+    }
+    return {
+        "overall_score": round(sum(category_scores.values()), 1),
+        "category_scores": category_scores,
+        "feedback": feedback or ["Resume covers the fundamentals well"],
+    }
+
+
+def local_quality_output(
+    resume_text: str,
+    resume_document: Optional[ResumeDocument] = None
+) -> str:
+    """
+    Quality stage output computed from heuristics, without the LLM.
+
+    Args:
+        resume_text: Extracted resume text
+        resume_document: Sectioned resume, if layout extraction was used
+
+    Returns:
+        JSON in the same shape as the LLM quality stage
+    """
+    return json.dumps(score_resume_quality(resume_text, resume_document))
@@ -0,0 +1,269 @@
+"""Job posting HTML-to-text extraction with pluggable parser backends."""
+from html import unescape
+from typing import Callable, Dict, List, Optional, Union
+import json
+import os
+import re
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# Elements that never carry posting content; <header> is kept because
+# articles often put the job title in one
+NOISE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe",
+              "nav", "footer", "aside", "form", "button"]
+
+# Whole words of id/class names used for page chrome (cookie banners,
+# menus, share bars): "social-share" matches, "shareable-content" does not
+BOILERPLATE_PATTERN = re.compile(
+    r"(?<![a-z0-9])(?:cookies?|consent|nav|navbar|menu|breadcrumbs?|footer|sidebar|"
+    r"social|share|sharing|subscribe|newsletter|related|recommended|recommendations)"
+    r"(?![a-z0-9])",
+    re.IGNORECASE
+)
+
+MAIN_SELECTORS = ["main", "article", "[role=main]"]
+MAIN_XPATH = "//main | //article | //*[@role='main']"
+
+# A semantic main/article element shorter than this is probably a stub;
+# so is a page that pruning left shorter than this
+MIN_MAIN_CHARS = 200
+
+JSON_LD_PATTERN = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def _normalize_whitespace(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _is_boilerplate(tag: str, attributes: Dict[str, Optional[str]]) -> bool:
+    if tag in ("html", "body"):
+        return False
+    marker = f"{attributes.get('id') or ''} {attributes.get('class') or ''}"
+    return bool(marker.strip()) and bool(BOILERPLATE_PATTERN.search(marker))
+
+
+def _pick_main(main_texts: List[str], body_text: str, unpruned_text: str) -> str:
+    longest = max(main_texts, key=len, default="")
+    if len(longest) >= MIN_MAIN_CHARS:
+        return longest
+    # Pruning that removed nearly everything hit the content, not the chrome
+    return body_text if len(body_text) >= MIN_MAIN_CHARS else unpruned_text
+
+
+def _extract_selectolax(html: str) -> str:
+    tree = HTMLParser(html)
+    tree.strip_tags(NOISE_TAGS)
+    root = tree.body or tree.root
+    unpruned_text = _normalize_whitespace(root.text(separator=" ")) if root else ""
+    main_selector = ", ".join(MAIN_SELECTORS)
+    doomed = [node for node in tree.css("[id], [class]")
+              if _is_boilerplate(node.tag, node.attributes)
+              and not node.css_matches(main_selector)
+              and node.css_first(main_selector) is None]
+    doomed_ids = {node.mem_id for node in doomed}
+    for node in doomed:
+        # Skip nodes already freed along with a removed ancestor
+        ancestor = node.parent
+        while ancestor is not None and ancestor.mem_id not in doomed_ids:
+            ancestor = ancestor.parent
+        if ancestor is None:
+            node.decompose()
+
+    main_texts = [
+        _normalize_whitespace(node.text(separator=" "))
+        for node in tree.css(main_selector)
+    ]
+    root = tree.body or tree.root
+    body_text = _normalize_whitespace(root.text(separator=" ")) if root else ""
+    return _pick_main(main_texts, body_text, unpruned_text)
+
+
+def _extract_lxml(html: str) -> str:
+    if not html.strip():
+        return ""
+    doc = lxml.html.document_fromstring(html)
+    for node in doc.xpath("|".join(f"//{tag}" for tag in NOISE_TAGS)):
+        node.drop_tree()
+    body = doc.find("body")
+    root = body if body is not None else doc
+    unpruned_text = _normalize_whitespace(" ".join(root.itertext()))
+    # Main content and everything around it survive pruning
+    protected = set()
+    for node in doc.xpath(MAIN_XPATH):
+        protected.add(node)
+        protected.update(node.iterancestors())
+    for node in doc.xpath("//*[@id or @class]"):
+        if (node.getparent() is not None and node not in protected
+                and _is_boilerplate(node.tag, node.attrib)):
+            node.drop_tree()
+
+    main_texts = [
+        _normalize_whitespace(" ".join(node.itertext()))
+        for node in doc.xpath(MAIN_XPATH)
+    ]
+    return _pick_main(main_texts, _normalize_whitespace(" ".join(root.itertext())), unpruned_text)
+
+
+def _extract_html_parser(html: str) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for node in soup(NOISE_TAGS):
+        node.decompose()
+    root = soup.body or soup
+    unpruned_text = _normalize_whitespace(root.get_text(" "))
+    main_selector = ", ".join(MAIN_SELECTORS)
+    protected = set()
+    for node in soup.select(main_selector):
+        protected.add(id(node))
+        protected.update(id(parent) for parent in node.parents)
+    for node in soup.find_all(attrs={"id": True}) + soup.find_all(attrs={"class": True}):
+        if node.decomposed or id(node) in protected:
+            continue
+        attributes = {
+            "id": node.get("id"),
+            "class": " ".join(node.get("class") or [])
+        }
+        if _is_boilerplate(node.name, attributes):
+            node.decompose()
+
+    main_texts = [
+        _normalize_whitespace(node.get_text(" "))
+        for node in soup.select(main_selector)
+    ]
+    return _pick_main(main_texts, _normalize_whitespace(root.get_text(" ")), unpruned_text)
+
+
+BACKENDS: Dict[str, Callable[[str], str]] = {"html.parser": _extract_html_parser}
+if lxml is not None:
+    BACKENDS["lxml"] = _extract_lxml
+if HTMLParser is not None:
+    BACKENDS["selectolax"] = _extract_selectolax
+
+
+def available_backends() -> List[str]:
+    """Names of the parser backends installed in this environment."""
+    return list(BACKENDS)
+
+
+def default_backend() -> str:
+    """Backend named by HTML_EXTRACT_BACKEND, or the fastest one installed."""
+    configured = os.getenv("HTML_EXTRACT_BACKEND", "auto")
+    if configured != "auto":
+        return configured
+    for name in ("selectolax", "lxml", "html.parser"):
+        if name in BACKENDS:
+            return name
+    return "html.parser"
+
+
+def _iter_json_ld(html: str):
+    for match in JSON_LD_PATTERN.finditer(html):
+        try:
+            data = json.loads(match.group(1).strip())
+        except ValueError:
+            continue
+        stack = [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, dict):
+                yield item
+                if "@graph" in item:
+                    stack.append(item["@graph"])
+
+
+def _as_text(value, backend: str) -> str:
+    if isinstance(value, list):
+        return " ".join(_as_text(v, backend) for v in value)
+    if isinstance(value, dict):
+        if value.get("name"):
+            return _as_text(value["name"], backend)
+        if value.get("address"):
+            return _as_text(value["address"], backend)
+        return " ".join(
+            _as_text(v, backend) for k, v in value.items() if not k.startswith("@")
+        )
+    text = unescape(str(value or ""))
+    if "<" in text:
+        text = BACKENDS[backend](text)
+    return _normalize_whitespace(text)
+
+
+def extract_job_posting_json_ld(html: str, backend: Optional[str] = None) -> Optional[str]:
+    """
+    Build posting text from an embedded schema.org JobPosting, if present.
+
+    Args:
+        html: Raw page HTML
+        backend: Parser used for HTML inside the description
+
+    Returns:
+        Posting text, or None if the page has no usable JobPosting
+    """
+    backend = backend or default_backend()
+    for item in _iter_json_ld(html):
+        types = item.get("@type")
+        types = types if isinstance(types, list) else [types]
+        if "JobPosting" not in types or not item.get("description"):
+            continue
+
+        fields = [
+            ("Title", item.get("title")),
+            ("Company", item.get("hiringOrganization")),
+            ("Location", item.get("jobLocation")),
+            ("Employment type", item.get("employmentType")),
+            ("Experience", item.get("experienceRequirements")),
+            ("Qualifications", item.get("qualifications")),
+            ("Skills", item.get("skills")),
+            ("Responsibilities", item.get("responsibilities")),
+            ("Description", item.get("description")),
+        ]
+        parts = []
+        for label, value in fields:
+            text = _as_text(value, backend) if value else ""
+            if text:
+                parts.append(f"{label}: {text}")
+        return "\n".join(parts)
+    return None
+
+
+def extract_job_text(html: Union[bytes, str], backend: Optional[str] = None) -> str:
+    """
+    Extract the posting text from a job page.
+
+    Uses the page's JSON-LD JobPosting when there is one; otherwise strips
+    page chrome and keeps the main content block.
+
+    Args:
+        html: Raw page HTML
+        backend: Parser backend name (see ``available_backends``)
+
+    Returns:
+        Whitespace-normalized posting text
+
+    Raises:
+        ValueError: If the backend is unknown or not installed
+    """
+    backend = backend or default_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"HTML backend not available: {backend}")
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+
+    posting = extract_job_posting_json_ld(html, backend)
+    if posting:
+        return posting
+    return BACKENDS[backend](html)
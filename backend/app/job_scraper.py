@@ -1,6 +1,70 @@
-import requests
-from bs4 import BeautifulSoup
+import httpx
+from app.cache import CacheBackend, content_hash, create_cache
+from app.html_extract import extract_job_text
+from app.metrics import SPAN_SECONDS
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import asyncio
+import json
+import os
+import time
+import weakref
 
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+TRACKING_PARAMS = {"gclid", "fbclid", "mc_cid", "mc_eid", "ref", "source"}
+
+# Host limiters kept per scraper; idle ones beyond this are dropped, oldest first
+MAX_TRACKED_HOSTS = 256
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a job posting URL for use as a cache key.
+
+    Lowercases scheme and host, drops default ports, fragments and
+    tracking parameters, and sorts the remaining query parameters.
+
+    Args:
+        url: Job posting URL
+
+    Returns:
+        Normalized URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+@SPAN_SECONDS.time(span="html_extract")
+def html_to_text(html: Union[bytes, str]) -> str:
+    """
+    Extract readable text from a job posting page.
+
+    Args:
+        html: Raw page HTML
+
+    Returns:
+        Whitespace-normalized posting text
+    """
+    return extract_job_text(html)
+
+@SPAN_SECONDS.time(span="job_scrape")
 def scrape_job_posting(url: str) -> str:
     """
     Scrape job posting content from URL.
@@ -11,27 +75,334 @@ def scrape_job_posting(url: str) -> str:
     Returns:
         Extracted text content
     """
+    import requests
+
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
+        response = requests.get(url, headers=HEADERS, timeout=10)
         response.raise_for_status()
+        return html_to_text(response.content)
+    except Exception as e:
+        raise ValueError(f"Failed to scrape job posting: {str(e)}")
 
-        soup = BeautifulSoup(response.content, 'html.parser')
 
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
+class _HostLimiter:
+    """Concurrency cap and minimum request spacing for one host."""
 
-        # Get text
-        text = soup.get_text()
+    def __init__(self, concurrency: int, interval: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.interval = interval
+        self.lock = asyncio.Lock()
+        self.next_request_at = 0.0
+        self.users = 0
 
-        # Clean up whitespace
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
+    @property
+    def idle(self) -> bool:
+        """No request is using or waiting on it, and its spacing has run out."""
+        return not self.users and time.monotonic() >= self.next_request_at
 
-        return text
-    except Exception as e:
-        raise ValueError(f"Failed to scrape job posting: {str(e)}")
+    async def wait_turn(self) -> None:
+        async with self.lock:
+            delay = self.next_request_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_request_at = time.monotonic() + self.interval
+
+
+class AsyncJobScraper:
+    """
+    Async job posting scraper sharing one pooled HTTP client.
+
+    Connections are kept alive (and use HTTP/2 when ``h2`` is installed),
+    each host gets its own concurrency cap and request spacing, transient
+    failures are retried with exponential backoff and oversized responses
+    are cut off. With a ``page_cache``, extracted text is stored per
+    normalized URL and revalidated with conditional GETs once stale.
+
+    The client and host limiters belong to the event loop that first uses
+    them; ``get_scraper()`` keeps one scraper per loop.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        per_host_concurrency: int = 2,
+        per_host_interval: float = 0.5,
+        retries: int = 2,
+        backoff: float = 0.5,
+        timeout: float = 10.0,
+        max_bytes: int = 5 * 1024 * 1024,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        page_cache: Optional[CacheBackend] = None,
+        freshness_ttl: float = 3600.0,
+        max_retry_after: float = 30.0,
+        max_hosts: int = MAX_TRACKED_HOSTS
+    ):
+        """
+        Initialize scraper.
+
+        Args:
+            max_connections: Total connections in the shared pool
+            per_host_concurrency: Simultaneous requests allowed to one host
+            per_host_interval: Minimum seconds between request starts to one host
+            retries: Extra attempts after a transient failure
+            backoff: Base delay in seconds, doubled on every retry
+            timeout: Per-request timeout in seconds
+            max_bytes: Largest response body accepted
+            transport: Custom httpx transport, mainly for tests
+            page_cache: Cache of extracted posting text and HTTP validators
+            freshness_ttl: Seconds a cached posting is served without revalidating
+            max_retry_after: Longest Retry-After honored; a host asking for
+                more fails the fetch instead of stalling the request
+            max_hosts: Host limiters kept; idle ones beyond this are dropped
+        """
+        self.max_connections = max_connections
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_interval = per_host_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self._transport = transport
+        self.page_cache = page_cache
+        self.freshness_ttl = freshness_ttl
+        self.max_retry_after = max_retry_after
+        self.max_hosts = max_hosts
+        self._client: Optional[httpx.AsyncClient] = None
+        self._hosts: "OrderedDict[str, _HostLimiter]" = OrderedDict()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client, created on first use."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=HEADERS,
+                timeout=self.timeout,
+                follow_redirects=True,
+                http2=HTTP2_AVAILABLE and self._transport is None,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                transport=self._transport
+            )
+        return self._client
+
+    def _host_limiter(self, url: str) -> _HostLimiter:
+        host = urlsplit(url).netloc.lower()
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = self._hosts[host] = _HostLimiter(self.per_host_concurrency, self.per_host_interval)
+            self._evict_idle_hosts()
+        self._hosts.move_to_end(host)
+        return limiter
+
+    def _evict_idle_hosts(self) -> None:
+        """Drop least recently used idle limiters while over ``max_hosts``."""
+        excess = len(self._hosts) - self.max_hosts
+        for host in list(self._hosts):
+            if excess <= 0:
+                break
+            if self._hosts[host].idle:
+                del self._hosts[host]
+                excess -= 1
+
+    async def fetch_html(self, url: str) -> bytes:
+        """
+        Download a page, honoring host limits, retries and the size cap.
+
+        Args:
+            url: Page URL
+
+        Returns:
+            Raw response body
+
+        Raises:
+            ValueError: If the page cannot be downloaded
+        """
+        _, _, body = await self._get(url)
+        return body
+
+    async def _get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, httpx.Headers, bytes]:
+        """Send a GET with retries; returns status, headers and capped body."""
+        limiter = self._host_limiter(url)
+        limiter.users += 1
+        try:
+            return await self._get_limited(url, headers, limiter)
+        finally:
+            limiter.users -= 1
+
+    async def _get_limited(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        limiter: _HostLimiter
+    ) -> Tuple[int, httpx.Headers, bytes]:
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                async with limiter.semaphore:
+                    await limiter.wait_turn()
+                    async with self.client.stream("GET", url, headers=headers) as response:
+                        if response.status_code == 304:
+                            return 304, response.headers, b""
+                        if response.status_code not in self.RETRY_STATUSES or attempt >= self.retries:
+                            response.raise_for_status()
+                            body = await self._read_capped(response)
+                            return response.status_code, response.headers, body
+                        retry_after = response.headers.get("Retry-After")
+            except httpx.HTTPStatusError as e:
+                raise ValueError(f"Failed to scrape job posting: {str(e)}")
+            except httpx.TransportError as e:
+                if attempt >= self.retries:
+                    raise ValueError(f"Failed to scrape job posting: {str(e)}")
+            except httpx.InvalidURL as e:
+                raise ValueError(f"Failed to scrape job posting: {str(e)}")
+
+            delay = self.backoff * (2 ** attempt)
+            if retry_after and retry_after.isdigit():
+                if float(retry_after) > self.max_retry_after:
+                    raise ValueError(
+                        f"Failed to scrape job posting: host asked to retry after {retry_after} seconds"
+                    )
+                delay = max(delay, float(retry_after))
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _read_capped(self, response: httpx.Response) -> bytes:
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            raise ValueError(f"Failed to scrape job posting: page larger than {self.max_bytes} bytes")
+
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise ValueError(f"Failed to scrape job posting: page larger than {self.max_bytes} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def fetch(self, url: str) -> str:
+        """
+        Scrape one job posting.
+
+        Args:
+            url: Job posting URL
+
+        Returns:
+            Extracted text content
+
+        Raises:
+            ValueError: If the page cannot be downloaded
+        """
+        with SPAN_SECONDS.time(span="job_scrape"):
+            return await self._fetch(url)
+
+    async def _fetch(self, url: str) -> str:
+        if self.page_cache is None:
+            html = await self.fetch_html(url)
+            # Parsing is CPU-bound; keep it off the event loop
+            return await asyncio.to_thread(html_to_text, html)
+
+        # The SQLite page cache reads and commits on disk, off the event loop
+        key = content_hash("posting", normalize_url(url))
+        cached = await asyncio.to_thread(self.page_cache.get, key)
+        entry = json.loads(cached) if cached else None
+        if entry and time.time() - entry["fetched_at"] < self.freshness_ttl:
+            return entry["text"]
+
+        # Stale or missing: revalidate with whatever validators we have
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        status, response_headers, html = await self._get(url, headers=headers or None)
+        if status == 304 and entry:
+            entry["fetched_at"] = time.time()
+        else:
+            entry = {
+                "text": await asyncio.to_thread(html_to_text, html),
+                "etag": response_headers.get("ETag"),
+                "last_modified": response_headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+            }
+        await asyncio.to_thread(self.page_cache.set, key, json.dumps(entry))
+        return entry["text"]
+
+    async def fetch_many(self, urls: List[str]) -> List[Union[str, Exception]]:
+        """
+        Scrape several job postings concurrently.
+
+        Args:
+            urls: Job posting URLs
+
+        Returns:
+            Extracted text, or the exception raised, for each URL in order
+        """
+        return await asyncio.gather(*(self.fetch(url) for url in urls), return_exceptions=True)
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_page_cache: Optional[CacheBackend] = None
+_scrapers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncJobScraper]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_page_cache() -> CacheBackend:
+    """Get the process-wide cache of scraped postings."""
+    global _page_cache
+    if _page_cache is None:
+        _page_cache = create_cache("SCRAPE_CACHE", ".cache/postings.sqlite3")
+    return _page_cache
+
+
+def get_scraper() -> AsyncJobScraper:
+    """
+    Get the running event loop's async scraper, configured from the environment.
+
+    Its HTTP client and host limiters only work on that loop, so each loop
+    gets its own scraper; all of them share the page cache.
+    """
+    loop = asyncio.get_running_loop()
+    scraper = _scrapers.get(loop)
+    if scraper is None:
+        scraper = _scrapers[loop] = AsyncJobScraper(
+            max_connections=int(os.getenv("SCRAPER_MAX_CONNECTIONS", "20")),
+            per_host_concurrency=int(os.getenv("SCRAPER_PER_HOST_CONCURRENCY", "2")),
+            per_host_interval=float(os.getenv("SCRAPER_PER_HOST_INTERVAL", "0.5")),
+            retries=int(os.getenv("SCRAPER_RETRIES", "2")),
+            timeout=float(os.getenv("SCRAPER_TIMEOUT", "10")),
+            max_bytes=int(os.getenv("SCRAPER_MAX_BYTES", str(5 * 1024 * 1024))),
+            page_cache=get_page_cache(),
+            freshness_ttl=float(os.getenv("SCRAPE_CACHE_FRESHNESS", "3600")),
+            max_retry_after=float(os.getenv("SCRAPER_MAX_RETRY_AFTER", "30"))
+        )
+    return scraper
+
+
+async def fetch_job_posting(url: str) -> str:
+    """
+    Scrape job posting content from URL without blocking the event loop.
+
+    Args:
+        url: Job posting URL
+
+    Returns:
+        Extracted text content
+    """
+    return await get_scraper().fetch(url)
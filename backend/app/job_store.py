@@ -0,0 +1,742 @@
+"""Registry of running and finished jobs, shared by every worker process."""
+from contextlib import contextmanager
+from pydantic import BaseModel
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Coroutine, Dict, Iterator, List, Optional, Set, Tuple,
+    TypeVar
+)
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# A job event as (sequence number, SSE event name, JSON data); numbers
+# start at 1 and increase by one per job
+JobEvent = Tuple[int, str, str]
+
+# Events after which a job's stream ends
+TERMINAL_EVENTS = ("complete", "error")
+
+# Followers in the process that writes a job are woken by each event.
+# With a shared store, events may come from another process, so
+# followers also check the store every POLL_INTERVAL seconds; otherwise
+# only every IDLE_CHECK_INTERVAL, to notice expiry or abandonment.
+POLL_INTERVAL = float(os.getenv("JOB_STORE_POLL_INTERVAL", "0.5"))
+IDLE_CHECK_INTERVAL = 30.0
+
+# Seconds between SSE keepalive comments on an idle stream
+SSE_PING_INTERVAL = int(os.getenv("SSE_PING_INTERVAL", "15"))
+
+T = TypeVar("T")
+
+
+class JobRecord:
+    """Status of one analysis or batch job."""
+
+    def __init__(
+        self,
+        job_id: str,
+        kind: str,
+        status: str = "running",
+        result: Optional[str] = None,
+        error: Optional[str] = None,
+        created_at: Optional[float] = None,
+        updated_at: Optional[float] = None
+    ):
+        now = time.time()
+        self.job_id = job_id
+        self.kind = kind
+        self.status = status  # running, completed or error
+        self.result = result  # JSON of the finished result
+        self.error = error
+        self.created_at = created_at or now
+        self.updated_at = updated_at or now
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status as returned by the API, with the result decoded."""
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": json.loads(self.result) if self.result else None,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class JobStore:
+    """
+    Interface for job registries.
+
+    A job is created by the process that runs it; its events and result
+    are written to the store so any process can report status or stream
+    the job. Jobs are removed ``ttl`` seconds after their last update. A
+    running job not updated for ``stale_after`` seconds is considered
+    abandoned (its process died or restarted) and reported as failed.
+    """
+
+    # Whether other processes can write to the store
+    shared = True
+
+    def __init__(self, ttl: float = 3600, stale_after: float = 900):
+        """
+        Initialize store.
+
+        Args:
+            ttl: Seconds a job is kept after its last update; also how long
+                finished results stay available to late clients
+            stale_after: Seconds without updates before a running job is abandoned
+        """
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._subscribers_lock = threading.Lock()
+
+    @contextmanager
+    def subscribe(self, job_id: str) -> Iterator[asyncio.Event]:
+        """
+        Get an event set whenever this process appends to a job's stream.
+
+        Must be entered on the event loop that waits on the event.
+
+        Args:
+            job_id: Job identifier
+
+        Yields:
+            Event to clear before reading and wait on afterwards
+        """
+        entry = (asyncio.get_running_loop(), asyncio.Event())
+        with self._subscribers_lock:
+            self._subscribers.setdefault(job_id, []).append(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._subscribers_lock:
+                subscribers = self._subscribers.get(job_id, [])
+                subscribers.remove(entry)
+                if not subscribers:
+                    self._subscribers.pop(job_id, None)
+
+    async def call(self, method: Callable[..., T], *args: Any) -> T:
+        """
+        Run one of the store's methods from the event loop without blocking it.
+
+        Shared stores commit to SQLite or talk to Redis on every call, so
+        their calls run on a worker thread; the in-memory store only takes
+        a lock and is called directly.
+
+        Args:
+            method: Bound method of this store, e.g. ``store.append_event``
+            *args: Its arguments
+
+        Returns:
+            What the method returned
+        """
+        if self.shared:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    def _notify(self, job_id: str) -> None:
+        """Wake this process's followers of a job; safe from any thread."""
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for loop, event in subscribers:
+            loop.call_soon_threadsafe(event.set)
+
+    def create(self, job_id: str, kind: str) -> JobRecord:
+        """Register a new running job."""
+        raise NotImplementedError
+
+    def _load(self, job_id: str) -> Optional[JobRecord]:
+        raise NotImplementedError
+
+    def _save(self, record: JobRecord) -> None:
+        raise NotImplementedError
+
+    def append_event(self, job_id: str, event: str, data: str) -> int:
+        """
+        Add an event to a job's stream.
+
+        Args:
+            job_id: Job identifier
+            event: SSE event name
+            data: Event payload (JSON)
+
+        Returns:
+            The event's sequence number, or 0 if the job no longer exists
+        """
+        raise NotImplementedError
+
+    def events(self, job_id: str, after: int = 0) -> List[JobEvent]:
+        """Events with a sequence number greater than ``after``, in order."""
+        raise NotImplementedError
+
+    def delete(self, job_id: str) -> None:
+        """Remove a job and its events."""
+        raise NotImplementedError
+
+    def cleanup(self) -> int:
+        """
+        Remove jobs not updated within the TTL.
+
+        Returns:
+            Number of jobs removed
+        """
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        """
+        Look up a job.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            The job, or None if unknown or expired
+        """
+        record = self._load(job_id)
+        if record is None:
+            return None
+        age = time.time() - record.updated_at
+        if age > self.ttl:
+            self.delete(job_id)
+            return None
+        if record.status == "running" and age > self.stale_after:
+            self.fail(job_id, "Job was abandoned before it finished")
+            return self._load(job_id)
+        return record
+
+    def finish(self, job_id: str, result: str) -> None:
+        """Emit a job's ``complete`` event and store its result, unless it already ended."""
+        record = self._load(job_id)
+        if record is None or record.status != "running":
+            # e.g. reported abandoned meanwhile; a job has one terminal event
+            return
+        # The event goes first: a follower in another process that sees the
+        # job finished must also find its terminal event
+        self.append_event(job_id, "complete", result)
+        record.status = "completed"
+        record.result = result
+        record.updated_at = time.time()
+        self._save(record)
+
+    def fail(self, job_id: str, error: str) -> None:
+        """Emit a job's ``error`` event and mark it failed, unless it already ended."""
+        record = self._load(job_id)
+        if record is None or record.status != "running":
+            return
+        self.append_event(job_id, "error", json.dumps({"error": error}))
+        record.status = "error"
+        record.error = error
+        record.updated_at = time.time()
+        self._save(record)
+
+
+class MemoryJobStore(JobStore):
+    """Jobs kept in this process only; for a single worker and for tests."""
+
+    shared = False
+
+    def __init__(self, ttl: float = 3600, stale_after: float = 900):
+        super().__init__(ttl, stale_after)
+        self._jobs: Dict[str, JobRecord] = {}
+        self._events: Dict[str, List[JobEvent]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, kind: str) -> JobRecord:
+        record = JobRecord(job_id, kind)
+        with self._lock:
+            self._jobs[job_id] = record
+            self._events[job_id] = []
+        return record
+
+    def _load(self, job_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _save(self, record: JobRecord) -> None:
+        with self._lock:
+            self._jobs[record.job_id] = record
+
+    def append_event(self, job_id: str, event: str, data: str) -> int:
+        with self._lock:
+            events = self._events.setdefault(job_id, [])
+            seq = len(events) + 1
+            events.append((seq, event, data))
+            if job_id in self._jobs:
+                self._jobs[job_id].updated_at = time.time()
+        self._notify(job_id)
+        return seq
+
+    def events(self, job_id: str, after: int = 0) -> List[JobEvent]:
+        with self._lock:
+            return list(self._events.get(job_id, [])[after:])
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._events.pop(job_id, None)
+
+    def cleanup(self) -> int:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [job_id for job_id, r in self._jobs.items() if r.updated_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+                self._events.pop(job_id, None)
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """Jobs in a SQLite file shared by the worker processes of one host."""
+
+    def __init__(self, path: str, ttl: float = 3600, stale_after: float = 900):
+        """
+        Initialize SQLite store.
+
+        Args:
+            path: Database file path, created if missing
+            ttl: Seconds a job is kept after its last update
+            stale_after: Seconds without updates before a running job is abandoned
+        """
+        super().__init__(ttl, stale_after)
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS job_events (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                event TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_updated ON jobs (updated_at)")
+
+    def create(self, job_id: str, kind: str) -> JobRecord:
+        record = JobRecord(job_id, kind)
+        self._save(record)
+        return record
+
+    def _load(self, job_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, kind, status, result, error, created_at, updated_at "
+                "FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return JobRecord(*row) if row else None
+
+    def _save(self, record: JobRecord) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs "
+                "(job_id, kind, status, result, error, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (record.job_id, record.kind, record.status, record.result, record.error,
+                 record.created_at, record.updated_at)
+            )
+
+    def append_event(self, job_id: str, event: str, data: str) -> int:
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so concurrent
+            # writers in other processes cannot pick the same number
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                seq = self._conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) + 1 FROM job_events WHERE job_id = ?",
+                    (job_id,)
+                ).fetchone()[0]
+                self._conn.execute(
+                    "INSERT INTO job_events (job_id, seq, event, data) VALUES (?, ?, ?, ?)",
+                    (job_id, seq, event, data)
+                )
+                self._conn.execute(
+                    "UPDATE jobs SET updated_at = ? WHERE job_id = ?", (time.time(), job_id)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._notify(job_id)
+        return seq
+
+    def events(self, job_id: str, after: int = 0) -> List[JobEvent]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT seq, event, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after)
+            ).fetchall()
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def cleanup(self) -> int:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT job_id FROM jobs WHERE updated_at < ?", (cutoff,)
+            ).fetchall()]
+            self._conn.executemany("DELETE FROM job_events WHERE job_id = ?",
+                                   [(job_id,) for job_id in expired])
+            self._conn.executemany("DELETE FROM jobs WHERE job_id = ?",
+                                   [(job_id,) for job_id in expired])
+        return len(expired)
+
+
+class LocalRedis:
+    """
+    In-process stand-in for the Redis commands the job store uses.
+
+    Lets the Redis backend run without a server, in development and tests.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expiry: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def _live(self, key: str) -> Any:
+        expires_at = self._expiry.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self._data.pop(key, None)
+            self._expiry.pop(key, None)
+        return self._data.get(key)
+
+    def hset(self, key: str, mapping: Dict[str, str]) -> None:
+        with self._lock:
+            if self._live(key) is None:
+                self._data[key] = {}
+            self._data[key].update({k: str(v) for k, v in mapping.items()})
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._live(key) or {})
+
+    def rpush(self, key: str, value: str) -> int:
+        with self._lock:
+            if self._live(key) is None:
+                self._data[key] = []
+            self._data[key].append(value)
+            return len(self._data[key])
+
+    def lrange(self, key: str, start: int, end: int) -> List[str]:
+        with self._lock:
+            items = self._live(key) or []
+            return items[start:] if end == -1 else items[start:end + 1]
+
+    def expire(self, key: str, seconds: int) -> None:
+        with self._lock:
+            if self._live(key) is not None:
+                self._expiry[key] = time.time() + seconds
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+                self._expiry.pop(key, None)
+
+    def exists(self, key: str) -> int:
+        with self._lock:
+            return int(self._live(key) is not None)
+
+    def transaction(self, func: Callable[["_LocalPipeline"], Any], *watches: str,
+                    value_from_callable: bool = False) -> Any:
+        """Run ``func`` on a pipeline; holding the lock stands in for WATCH/MULTI."""
+        with self._lock:
+            pipe = _LocalPipeline(self)
+            value = func(pipe)
+            results = pipe.execute()
+        return value if value_from_callable else results
+
+
+class _LocalPipeline:
+    """Pipeline of a ``LocalRedis``: commands run at once until ``multi()``, then queue."""
+
+    def __init__(self, client: LocalRedis):
+        self.client = client
+        self._queued: Optional[List[Tuple[str, tuple, dict]]] = None
+
+    def multi(self) -> None:
+        self._queued = []
+
+    def execute(self) -> List[Any]:
+        queued, self._queued = self._queued or [], None
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in queued]
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        command = getattr(self.client, name)
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            if self._queued is None:
+                return command(*args, **kwargs)
+            self._queued.append((name, args, kwargs))
+            return self
+
+        return call
+
+
+class RedisJobStore(JobStore):
+    """
+    Jobs in Redis, shared by replicas on any host.
+
+    Each job is a hash with an event list beside it. Both keys expire
+    ``ttl`` seconds after the last write, so cleanup needs no scan.
+    """
+
+    def __init__(self, client: Any, ttl: float = 3600, stale_after: float = 900,
+                 prefix: str = "job:"):
+        """
+        Initialize Redis store.
+
+        Args:
+            client: Redis client returning strings (``decode_responses=True``),
+                or a ``LocalRedis``
+            ttl: Seconds a job is kept after its last update
+            stale_after: Seconds without updates before a running job is abandoned
+            prefix: Key prefix
+        """
+        super().__init__(ttl, stale_after)
+        self.client = client
+        self.prefix = prefix
+
+    def _keys(self, job_id: str) -> Tuple[str, str]:
+        return f"{self.prefix}{job_id}", f"{self.prefix}{job_id}:events"
+
+    def _touch(self, job_id: str) -> None:
+        for key in self._keys(job_id):
+            self.client.expire(key, int(self.ttl))
+
+    def create(self, job_id: str, kind: str) -> JobRecord:
+        record = JobRecord(job_id, kind)
+        self._save(record)
+        return record
+
+    def _load(self, job_id: str) -> Optional[JobRecord]:
+        fields = self.client.hgetall(self._keys(job_id)[0])
+        if not fields:
+            return None
+        return JobRecord(
+            job_id,
+            fields["kind"],
+            fields["status"],
+            fields.get("result") or None,
+            fields.get("error") or None,
+            float(fields["created_at"]),
+            float(fields["updated_at"])
+        )
+
+    def _save(self, record: JobRecord) -> None:
+        self.client.hset(self._keys(record.job_id)[0], mapping={
+            "kind": record.kind,
+            "status": record.status,
+            "result": record.result or "",
+            "error": record.error or "",
+            "created_at": record.created_at,
+            "updated_at": record.updated_at,
+        })
+        self._touch(record.job_id)
+
+    def append_event(self, job_id: str, event: str, data: str) -> int:
+        job_key, events_key = self._keys(job_id)
+
+        def write(pipe) -> int:
+            # Watching the hash means it cannot expire between the check
+            # and the write, which would leave a record with no kind or status
+            if not pipe.exists(job_key):
+                return 0
+            pipe.multi()
+            pipe.rpush(events_key, json.dumps([event, data]))
+            pipe.hset(job_key, mapping={"updated_at": time.time()})
+            pipe.expire(job_key, int(self.ttl))
+            pipe.expire(events_key, int(self.ttl))
+            return pipe.execute()[0]
+
+        seq = self.client.transaction(write, job_key, value_from_callable=True)
+        if seq:
+            self._notify(job_id)
+        return seq
+
+    def events(self, job_id: str, after: int = 0) -> List[JobEvent]:
+        items = self.client.lrange(self._keys(job_id)[1], after, -1)
+        return [
+            (after + i + 1, *json.loads(item)) for i, item in enumerate(items)
+        ]
+
+    def delete(self, job_id: str) -> None:
+        self.client.delete(*self._keys(job_id))
+
+    def cleanup(self) -> int:
+        # Keys expire on their own
+        return 0
+
+
+def create_job_store() -> JobStore:
+    """
+    Build the job store from ``JOB_STORE_*`` environment variables.
+
+    ``JOB_STORE_BACKEND`` selects ``memory`` (default), ``sqlite`` or
+    ``redis``; ``JOB_STORE_TTL``, ``JOB_STORE_STALE_AFTER``,
+    ``JOB_STORE_PATH`` and ``JOB_STORE_REDIS_URL`` tune it. Without a
+    Redis URL the Redis backend uses an in-process stand-in.
+
+    Returns:
+        Configured job store
+    """
+    backend = os.getenv("JOB_STORE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("JOB_STORE_TTL", "3600"))
+    stale_after = float(os.getenv("JOB_STORE_STALE_AFTER", "900"))
+
+    if backend == "sqlite":
+        return SQLiteJobStore(
+            os.getenv("JOB_STORE_PATH", ".cache/jobs.sqlite3"), ttl=ttl, stale_after=stale_after
+        )
+    if backend == "redis":
+        url = os.getenv("JOB_STORE_REDIS_URL")
+        if url:
+            try:
+                import redis
+            except ImportError:
+                raise ValueError("JOB_STORE_BACKEND=redis needs the redis package")
+            client = redis.Redis.from_url(url, decode_responses=True)
+        else:
+            client = LocalRedis()
+        return RedisJobStore(client, ttl=ttl, stale_after=stale_after)
+    if backend != "memory":
+        raise ValueError(f"Unknown job store backend: {backend}")
+    return MemoryJobStore(ttl=ttl, stale_after=stale_after)
+
+
+_job_store: Optional[JobStore] = None
+
+
+def get_job_store() -> JobStore:
+    """Get the process-wide job store."""
+    global _job_store
+    if _job_store is None:
+        _job_store = create_job_store()
+    return _job_store
+
+
+async def cleanup_periodically(store: JobStore, interval: float = 60) -> None:
+    """
+    Remove expired jobs every ``interval`` seconds until cancelled.
+
+    Args:
+        store: Job store
+        interval: Seconds between sweeps
+    """
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(store.cleanup)
+
+
+# Strong references to running jobs, which asyncio only holds weakly
+_running: Set[asyncio.Task] = set()
+
+
+async def _track(store: JobStore, job_id: str, work: Awaitable[BaseModel]) -> None:
+    try:
+        result = await work
+    except Exception as e:
+        await store.call(store.fail, job_id, str(e))
+        return
+    await store.call(store.finish, job_id, result.model_dump_json())
+
+
+async def start_job(
+    store: JobStore,
+    job_id: str,
+    kind: str,
+    work: Coroutine[Any, Any, BaseModel]
+) -> asyncio.Task:
+    """
+    Register a job and run it in the background.
+
+    Its result, or its error, is written to the store when it finishes.
+    If the job cannot be registered, ``work`` is closed without running
+    and the error is raised; anything it was handed is the caller's to free.
+
+    Args:
+        store: Job store
+        job_id: New job identifier
+        kind: Job type, e.g. "analysis" or "batch"
+        work: Coroutine producing the job's result model
+
+    Returns:
+        The background task
+    """
+    try:
+        await store.call(store.create, job_id, kind)
+    except BaseException:
+        work.close()
+        raise
+    task = asyncio.create_task(_track(store, job_id, work))
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+    return task
+
+
+async def follow(store: JobStore, job_id: str, after: int = 0) -> AsyncIterator[JobEvent]:
+    """
+    Yield a job's events, replaying stored ones first, until it completes or fails.
+
+    Any number of followers can read the same job, from any process
+    sharing the store; reading does not consume events.
+
+    Args:
+        store: Job store
+        job_id: Job identifier
+        after: Sequence number of the last event already seen, e.g. from
+            an SSE ``Last-Event-ID`` header
+
+    Yields:
+        (sequence number, event name, data) tuples; a synthetic ``error``
+        with sequence number 0 if the job expires or is abandoned
+    """
+    timeout = POLL_INTERVAL if store.shared else IDLE_CHECK_INTERVAL
+    with store.subscribe(job_id) as wakeup:
+        while True:
+            # Cleared before reading, so an event stored after the read
+            # still wakes the wait below
+            wakeup.clear()
+            events = await store.call(store.events, job_id, after)
+            for event in events:
+                after = event[0]
+                yield event
+                if event[1] in TERMINAL_EVENTS:
+                    return
+            if events:
+                continue
+
+            record = await store.call(store.get, job_id)
+            if record is None:
+                yield (0, "error", json.dumps({"error": "Job expired"}))
+                return
+            if record.status != "running" and not await store.call(store.events, job_id, after):
+                # The terminal event was already delivered before a reconnect
+                return
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
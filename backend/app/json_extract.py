@@ -0,0 +1,111 @@
+"""Locate and validate the JSON object in free-form LLM output."""
+from app.metrics import SPAN_SECONDS
+from pydantic import BaseModel, ValidationError
+from typing import Any, Dict, Tuple, Type, TypeVar
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Where a JSON object can start: a brace followed by a key or the closing brace
+OBJECT_START_PATTERN = re.compile(r'\{\s*["}]')
+
+# Characters of the output quoted in error messages
+ERROR_SNIPPET_CHARS = 200
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class JSONExtractionError(ValueError):
+    """Raised when output holds no JSON object, or none of the expected shape."""
+
+
+_decoder = json.JSONDecoder()
+
+
+def decode_object_at(text: str, start: int) -> Tuple[Any, int]:
+    """
+    Decode the JSON value starting at ``start``, ignoring whatever follows it.
+
+    The decoder itself finds where the value's braces balance, so text after
+    the object (closing fences, prose) never has to be located first.
+
+    Args:
+        text: Text containing the value
+        start: Index of the value's first character
+
+    Returns:
+        The decoded value and the index just past it
+
+    Raises:
+        ValueError: If no valid JSON value starts at ``start``
+    """
+    if orjson is None:
+        return _decoder.raw_decode(text, start)
+    tail = text[start:]
+    try:
+        value = orjson.loads(tail)
+    except orjson.JSONDecodeError as e:
+        if not e.pos:
+            raise
+        # orjson rejects trailing content and reports where it begins; the
+        # prefix before that is the whole value, or the value was invalid
+        tail = tail[:e.pos]
+        value = orjson.loads(tail)
+    return value, start + len(tail.rstrip())
+
+
+@SPAN_SECONDS.time(span="json_extract")
+def extract_json(output: Any) -> Dict[str, Any]:
+    """
+    Parse the first JSON object in an LLM output.
+
+    Code fences, "Thought:" chatter and trailing prose are all skipped: the
+    text is searched once for places an object can start, and the first one
+    that decodes to a JSON object wins. Braces and quotes inside strings are
+    handled by the decoder, and nothing backtracks, so a long output costs
+    little more than decoding the answer itself.
+
+    Args:
+        output: Raw output (converted with ``str``)
+
+    Returns:
+        The parsed object
+
+    Raises:
+        JSONExtractionError: If no JSON object is found
+    """
+    text = str(output)
+    for match in OBJECT_START_PATTERN.finditer(text):
+        try:
+            data, _ = decode_object_at(text, match.start())
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data
+    snippet = text[:ERROR_SNIPPET_CHARS].replace("\n", " ")
+    raise JSONExtractionError(f"No JSON object in output ({len(text)} chars): {snippet!r}")
+
+
+def extract_model(output: Any, model: Type[ModelT]) -> ModelT:
+    """
+    Parse the first JSON object in an LLM output into a model.
+
+    Args:
+        output: Raw output (converted with ``str``)
+        model: Pydantic model the object must satisfy
+
+    Returns:
+        Validated model instance
+
+    Raises:
+        JSONExtractionError: If no JSON object is found or it fails validation
+    """
+    data = extract_json(output)
+    try:
+        return model.model_validate(data)
+    except ValidationError as e:
+        raise JSONExtractionError(f"Output does not match {model.__name__}: {e}")
@@ -0,0 +1,329 @@
+"""Deterministic keyword matching between resumes and job postings."""
+from app.models import KeywordAnalysis
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import json
+import math
+import re
+
+# canonical skill -> (category, synonyms); synonyms are matched case-insensitively
+# as whole token sequences. Ambiguous words ("go", "r", "c", "express", "rest",
+# "node", "spring", "security") are left out or only matched in a longer phrase.
+SKILL_TAXONOMY: Dict[str, Tuple[str, List[str]]] = {
+    # Languages
+    "Python": ("language", ["python", "python3"]),
+    "Java": ("language", ["java"]),
+    "JavaScript": ("language", ["javascript", "js", "ecmascript", "es6"]),
+    "TypeScript": ("language", ["typescript", "ts"]),
+    "Go": ("language", ["golang", "go lang"]),
+    "Rust": ("language", ["rust"]),
+    "C++": ("language", ["c++", "cpp"]),
+    "C#": ("language", ["c#", "csharp"]),
+    "Ruby": ("language", ["ruby"]),
+    "PHP": ("language", ["php"]),
+    "Kotlin": ("language", ["kotlin"]),
+    "Swift": ("language", ["swiftui", "swift programming"]),
+    "Scala": ("language", ["scala"]),
+    "SQL": ("language", ["sql"]),
+    "Bash": ("language", ["bash", "shell scripting"]),
+    "HTML": ("language", ["html", "html5"]),
+    "CSS": ("language", ["css", "css3", "sass", "scss"]),
+    # Frameworks and libraries
+    "React": ("framework", ["react", "reactjs", "react.js"]),
+    "Angular": ("framework", ["angular", "angularjs"]),
+    "Vue": ("framework", ["vue", "vuejs", "vue.js"]),
+    "Next.js": ("framework", ["next.js", "nextjs"]),
+    "Node.js": ("framework", ["node.js", "nodejs"]),
+    "Express": ("framework", ["express.js", "expressjs"]),
+    "Django": ("framework", ["django"]),
+    "Flask": ("framework", ["flask"]),
+    "FastAPI": ("framework", ["fastapi"]),
+    "Spring": ("framework", ["spring boot", "spring framework", "spring mvc"]),
+    ".NET": ("framework", [".net", "dotnet", "asp.net"]),
+    "Rails": ("framework", ["rails", "ruby on rails"]),
+    "GraphQL": ("framework", ["graphql"]),
+    "REST APIs": ("framework", ["restful", "rest api", "rest apis", "restful apis"]),
+    "gRPC": ("framework", ["grpc"]),
+    "pandas": ("framework", ["pandas"]),
+    "NumPy": ("framework", ["numpy"]),
+    "scikit-learn": ("framework", ["scikit-learn", "sklearn"]),
+    "TensorFlow": ("framework", ["tensorflow"]),
+    "PyTorch": ("framework", ["pytorch", "torch"]),
+    # Data stores and data engineering
+    "PostgreSQL": ("data", ["postgresql", "postgres", "psql"]),
+    "MySQL": ("data", ["mysql"]),
+    "MongoDB": ("data", ["mongodb", "mongo"]),
+    "Redis": ("data", ["redis"]),
+    "Elasticsearch": ("data", ["elasticsearch", "opensearch"]),
+    "Cassandra": ("data", ["cassandra"]),
+    "DynamoDB": ("data", ["dynamodb"]),
+    "Snowflake": ("data", ["snowflake"]),
+    "BigQuery": ("data", ["bigquery"]),
+    "Kafka": ("data", ["kafka", "apache kafka"]),
+    "Spark": ("data", ["spark", "pyspark", "apache spark"]),
+    "Airflow": ("data", ["airflow", "apache airflow"]),
+    "dbt": ("data", ["dbt"]),
+    "ETL": ("data", ["etl", "elt", "data pipelines", "data pipeline"]),
+    # Cloud and infrastructure
+    "AWS": ("cloud", ["aws", "amazon web services"]),
+    "GCP": ("cloud", ["gcp", "google cloud", "google cloud platform"]),
+    "Azure": ("cloud", ["azure", "microsoft azure"]),
+    "Docker": ("cloud", ["docker", "containerization", "containerized"]),
+    "Kubernetes": ("cloud", ["kubernetes", "k8s", "eks", "gke", "aks"]),
+    "Terraform": ("cloud", ["terraform", "infrastructure as code", "iac"]),
+    "Ansible": ("cloud", ["ansible"]),
+    "Linux": ("cloud", ["linux", "unix"]),
+    "Serverless": ("cloud", ["serverless", "aws lambda"]),
+    "Microservices": ("cloud", ["microservices", "microservice", "service-oriented architecture"]),
+    # Practices and tools
+    "CI/CD": ("practice", ["ci/cd", "continuous integration", "continuous delivery",
+                           "continuous deployment", "jenkins", "github actions", "gitlab ci"]),
+    "Git": ("practice", ["git", "github", "gitlab", "version control"]),
+    "Testing": ("practice", ["unit testing", "test automation", "tdd", "pytest", "jest",
+                             "integration testing", "automated testing"]),
+    "Agile": ("practice", ["agile", "scrum", "kanban"]),
+    "Observability": ("practice", ["observability", "prometheus", "grafana", "datadog",
+                                   "opentelemetry"]),
+    "Security": ("practice", ["application security", "information security",
+                               "cybersecurity", "owasp", "oauth"]),
+    "System Design": ("practice", ["system design", "distributed systems", "scalability"]),
+    # Data science and AI
+    "Machine Learning": ("ai", ["machine learning", "ml"]),
+    "Deep Learning": ("ai", ["deep learning", "neural networks"]),
+    "NLP": ("ai", ["nlp", "natural language processing"]),
+    "LLMs": ("ai", ["llm", "llms", "large language models", "generative ai", "genai"]),
+    "Computer Vision": ("ai", ["computer vision"]),
+    "Statistics": ("ai", ["statistics", "statistical analysis", "a/b testing"]),
+    "Data Analysis": ("ai", ["data analysis", "data analytics"]),
+    "Tableau": ("ai", ["tableau", "power bi", "looker"]),
+    # Soft skills
+    "Communication": ("soft", ["communication", "communication skills"]),
+    "Leadership": ("soft", ["leadership", "mentoring", "mentorship", "team lead"]),
+    "Collaboration": ("soft", ["collaboration", "teamwork", "cross-functional"]),
+    "Problem Solving": ("soft", ["problem solving", "problem-solving"]),
+    "Project Management": ("soft", ["project management", "stakeholder management"]),
+}
+
+# Rough share of postings (per 1000) mentioning a skill of each category;
+# stands in for corpus document frequency so weights stay deterministic
+CATEGORY_DOCUMENT_FREQUENCY = {
+    "language": 250, "framework": 150, "data": 150, "cloud": 200,
+    "practice": 350, "ai": 120, "soft": 600,
+}
+CORPUS_SIZE = 1000
+
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+AVERAGE_POSTING_TOKENS = 400
+
+# Skills only mentioned as nice-to-have count for less
+PREFERRED_WEIGHT = 0.5
+PREFERRED_MARKERS = re.compile(
+    r"nice to have|nice-to-have|preferred|bonus|a plus|desirable|good to have",
+    re.IGNORECASE
+)
+REQUIRED_MARKERS = re.compile(
+    r"requirements|required|must have|must-have|qualifications|responsibilities|you have",
+    re.IGNORECASE
+)
+
+TOKEN_PATTERN = re.compile(r"\.?[a-z0-9+#](?:[a-z0-9+#./-]*[a-z0-9+#])?")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokens, keeping skill punctuation (c++, c#, node.js, ci/cd).
+
+    Args:
+        text: Any text
+
+    Returns:
+        Tokens in order
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SkillIndex:
+    """Token trie over taxonomy synonyms; finds the longest match at each position."""
+
+    def __init__(self, taxonomy: Dict[str, Tuple[str, List[str]]] = SKILL_TAXONOMY):
+        self.taxonomy = taxonomy
+        self.root: dict = {}
+        for skill, (_, synonyms) in taxonomy.items():
+            for synonym in synonyms:
+                node = self.root
+                for token in tokenize(synonym):
+                    node = node.setdefault(token, {})
+                node[None] = skill
+
+    def find(self, tokens: List[str]) -> List[Tuple[int, str]]:
+        """
+        Locate skills in a token sequence.
+
+        Args:
+            tokens: Output of ``tokenize``
+
+        Returns:
+            (token position, canonical skill) pairs, non-overlapping
+        """
+        found = []
+        i = 0
+        while i < len(tokens):
+            node = self.root
+            match = None
+            j = i
+            while j < len(tokens) and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if None in node:
+                    match = (j, node[None])
+            if match:
+                found.append((i, match[1]))
+                i = match[0]
+            else:
+                i += 1
+        return found
+
+    def count(self, text: str) -> Counter:
+        """Occurrences of each canonical skill in a text."""
+        return Counter(skill for _, skill in self.find(tokenize(text)))
+
+
+_index: Optional[SkillIndex] = None
+
+
+def get_skill_index() -> SkillIndex:
+    """Get the shared index built from ``SKILL_TAXONOMY``."""
+    global _index
+    if _index is None:
+        _index = SkillIndex()
+    return _index
+
+
+def _preferred_only(job_text: str, index: SkillIndex) -> set:
+    """Skills that appear only after a nice-to-have marker."""
+    markers = sorted(
+        [(m.start(), True) for m in PREFERRED_MARKERS.finditer(job_text)]
+        + [(m.start(), False) for m in REQUIRED_MARKERS.finditer(job_text)]
+    )
+    required, preferred = set(), set()
+    bounds = [0] + [start for start, _ in markers] + [len(job_text)]
+    modes = [False] + [is_preferred for _, is_preferred in markers]
+    for start, stop, is_preferred in zip(bounds, bounds[1:], modes):
+        skills = index.count(job_text[start:stop])
+        (preferred if is_preferred else required).update(skills)
+    return preferred - required
+
+
+def job_keyword_weights(job_text: str, index: Optional[SkillIndex] = None) -> Dict[str, float]:
+    """
+    Weight the skills a job posting asks for.
+
+    Uses BM25 term-frequency saturation with a category-level document
+    frequency, halved for skills only listed as nice-to-have.
+
+    Args:
+        job_text: Job posting text
+        index: Skill index (defaults to the shared taxonomy index)
+
+    Returns:
+        Weight per canonical skill
+    """
+    index = index or get_skill_index()
+    tokens = tokenize(job_text)
+    counts = Counter(skill for _, skill in index.find(tokens))
+    preferred = _preferred_only(job_text, index)
+    length_norm = 1 - BM25_B + BM25_B * len(tokens) / AVERAGE_POSTING_TOKENS
+
+    weights = {}
+    for skill, tf in counts.items():
+        df = CATEGORY_DOCUMENT_FREQUENCY.get(index.taxonomy[skill][0], CORPUS_SIZE // 2)
+        idf = math.log(1 + (CORPUS_SIZE - df + 0.5) / (df + 0.5))
+        weight = tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm) * idf
+        if skill in preferred:
+            weight *= PREFERRED_WEIGHT
+        weights[skill] = round(weight, 4)
+    return weights
+
+
+class KeywordMatch:
+    """Skills of a job posting split into those the resume covers and those it lacks."""
+
+    def __init__(self, weights: Dict[str, float], matched: List[str], missing: List[str]):
+        self.weights = weights
+        self.matched = matched
+        self.missing = missing
+
+    @property
+    def coverage(self) -> float:
+        """Weighted share of the posting's skills found in the resume, 0-100."""
+        total = sum(self.weights.values())
+        if not total:
+            return 0.0
+        return round(sum(self.weights[skill] for skill in self.matched) / total * 100, 1)
+
+    def to_analysis(self, limit: Optional[int] = None) -> KeywordAnalysis:
+        """Keyword analysis with the most important skills first."""
+        return KeywordAnalysis(
+            matched_keywords=self.matched[:limit],
+            missing_keywords=self.missing[:limit],
+            match_percentage=self.coverage
+        )
+
+    def to_prompt(self) -> str:
+        """Compact summary for the match stage prompt."""
+        return json.dumps({
+            "matched_keywords": self.matched,
+            "missing_keywords": self.missing,
+            "weighted_coverage_percent": self.coverage,
+        })
+
+
+def match_keywords(
+    resume_text: str,
+    job_text: str,
+    index: Optional[SkillIndex] = None
+) -> KeywordMatch:
+    """
+    Compare the skills in a resume against those a job posting asks for.
+
+    Args:
+        resume_text: Resume text (raw or structured)
+        job_text: Job posting text (raw or structured)
+        index: Skill index (defaults to the shared taxonomy index)
+
+    Returns:
+        Matched and missing skills ordered by job weight
+    """
+    index = index or get_skill_index()
+    weights = job_keyword_weights(job_text, index)
+    have = index.count(resume_text)
+    ordered = sorted(weights, key=lambda skill: (-weights[skill], skill))
+    return KeywordMatch(
+        weights=weights,
+        matched=[skill for skill in ordered if skill in have],
+        missing=[skill for skill in ordered if skill not in have]
+    )
+
+
+def local_match_output(keywords: KeywordMatch) -> str:
+    """
+    Match stage output computed from keywords alone, without the LLM.
+
+    Args:
+        keywords: Keyword match for the resume/job pair
+
+    Returns:
+        JSON in the same shape as the LLM match stage
+    """
+    return json.dumps({
+        "match_score": keywords.coverage,
+        "matched_keywords": keywords.matched,
+        "missing_keywords": keywords.missing,
+        "skills_gap": [f"No evidence of {skill}" for skill in keywords.missing[:5]],
+        "strengths": [f"Experience with {skill}" for skill in keywords.matched[:5]],
+        "suggestions": [
+            f"Add concrete examples of {skill} if you have used it" for skill in keywords.missing[:5]
+        ],
+    })
@@ -0,0 +1,420 @@
+"""Process metrics in the Prometheus text format, plus an opt-in request profiler."""
+from contextlib import ContextDecorator
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import cProfile
+import math
+import os
+import re
+import threading
+import time
+
+# Seconds; covers sub-millisecond parsing up to multi-minute agent runs
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0
+)
+
+# Dollars per million tokens, for the estimated cost counter
+LLM_INPUT_COST_PER_MTOK = float(os.getenv("LLM_INPUT_COST_PER_MTOK", "3"))
+LLM_OUTPUT_COST_PER_MTOK = float(os.getenv("LLM_OUTPUT_COST_PER_MTOK", "15"))
+
+# Setting a directory enables per-request profiles for requests sent with
+# an "X-Profile: 1" header
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+
+# (name, type, help, labels, value) rows produced at scrape time
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in labels]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """A named metric with one value per label combination."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str):
+        """
+        Initialize metric.
+
+        Args:
+            name: Metric name, without the registry prefix
+            help: One-line description
+        """
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+
+    def render(self, prefix: str) -> List[str]:
+        """Exposition lines for this metric."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing total."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Add to the total for a label combination."""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Current total for a label combination."""
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self, prefix: str) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{prefix}{self.name}{_format_labels(key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(Counter):
+    """Value that goes up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        """Subtract from the value for a label combination."""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        """Replace the value for a label combination."""
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class _Timer(ContextDecorator):
+    def __init__(self, histogram: "Histogram", labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+    def _recreate_cm(self) -> "_Timer":
+        # Each decorated call gets its own start time
+        return _Timer(self.histogram, self.labels)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize histogram.
+
+        Args:
+            name: Metric name, without the registry prefix
+            help: One-line description
+            buckets: Upper bounds, ascending; +Inf is added
+        """
+        super().__init__(name, help)
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._values: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation for a label combination."""
+        key = _label_key(labels)
+        with self._lock:
+            # Per-bucket counts, then sum and count
+            entry = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+                    break
+            entry[-2] += value
+            entry[-1] += 1
+
+    def time(self, **labels: str) -> _Timer:
+        """Time a block or function; usable as ``with`` or as a decorator."""
+        return _Timer(self, labels)
+
+    def count(self, **labels: str) -> int:
+        """Observations recorded for a label combination."""
+        entry = self._values.get(_label_key(labels))
+        return int(entry[-1]) if entry else 0
+
+    def render(self, prefix: str) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(entry)) for key, entry in self._values.items())
+        lines = []
+        for key, entry in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                labels = key + (("le", _format_value(bound)),)
+                lines.append(f"{prefix}{self.name}_bucket{_format_labels(labels)} "
+                             f"{_format_value(cumulative)}")
+            lines.append(f"{prefix}{self.name}_sum{_format_labels(key)} {_format_value(entry[-2])}")
+            lines.append(f"{prefix}{self.name}_count{_format_labels(key)} {_format_value(entry[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Metrics owned by this process, rendered for a Prometheus scrape.
+
+    Counters, gauges and histograms are updated as work happens; collectors
+    are called at scrape time for values other components already track,
+    such as worker pool queue depth and cache hit counts.
+    """
+
+    def __init__(self, prefix: str = "resume_analyzer_"):
+        """
+        Initialize registry.
+
+        Args:
+            prefix: Prepended to every metric name
+        """
+        self.prefix = prefix
+        self.metrics: Dict[str, Metric] = {}
+        self.collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric; its name must be unique."""
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self.register(Counter(name, help))
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self.register(Gauge(name, help))
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """Call ``collector`` on every scrape for extra samples."""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format (version 0.0.4).
+
+        Returns:
+            Exposition text, ending with a newline
+        """
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {self.prefix}{metric.name} {metric.help}")
+            lines.append(f"# TYPE {self.prefix}{metric.name} {metric.kind}")
+            lines.extend(metric.render(self.prefix))
+
+        collected: Dict[str, Tuple[str, str, List[str]]] = {}
+        for collector in self.collectors:
+            for name, kind, help, labels, value in collector():
+                entry = collected.setdefault(name, (kind, help, []))
+                entry[2].append(f"{self.prefix}{name}{_format_labels(_label_key(labels))} "
+                                f"{_format_value(value)}")
+        for name, (kind, help, samples) in collected.items():
+            lines.append(f"# HELP {self.prefix}{name} {help}")
+            lines.append(f"# TYPE {self.prefix}{name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+SPAN_SECONDS = REGISTRY.histogram(
+    "span_seconds", "Time spent in instrumented operations (PDF extraction, scraping, parsing)"
+)
+STAGE_SECONDS = REGISTRY.histogram("stage_seconds", "Run time of each analysis stage")
+ANALYSIS_SECONDS = REGISTRY.histogram("analysis_seconds", "End-to-end analysis time")
+ANALYSES = REGISTRY.counter("analyses_total", "Analyses finished, by mode and outcome")
+ANALYSES_IN_FLIGHT = REGISTRY.gauge("analyses_in_flight", "Analyses currently running")
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "LLM tokens used, by stage and direction")
+LLM_COST = REGISTRY.counter("llm_cost_dollars_total", "Estimated LLM spend, by stage")
+SSE_EVENTS = REGISTRY.counter("sse_events_total", "Server-sent events delivered to clients")
+SSE_STREAMS = REGISTRY.gauge("sse_streams_open", "Server-sent event streams currently open")
+HTTP_SECONDS = REGISTRY.histogram("http_request_seconds", "HTTP request handling time")
+LLM_QUEUE_SECONDS = REGISTRY.histogram(
+    "llm_queue_seconds", "Time LLM calls waited for the rate limiter, by lane"
+)
+LLM_THROTTLED = REGISTRY.counter("llm_throttled_total", "LLM calls the API rejected with 429")
+
+
+def record_llm_usage(stage: str, input_tokens: int, output_tokens: int) -> None:
+    """
+    Count one LLM call's tokens and estimated cost.
+
+    Args:
+        stage: Stage that made the call
+        input_tokens: Prompt tokens
+        output_tokens: Completion tokens
+    """
+    LLM_TOKENS.inc(input_tokens, stage=stage, direction="input")
+    LLM_TOKENS.inc(output_tokens, stage=stage, direction="output")
+    LLM_COST.inc(
+        (input_tokens * LLM_INPUT_COST_PER_MTOK + output_tokens * LLM_OUTPUT_COST_PER_MTOK) / 1e6,
+        stage=stage
+    )
+
+
+def collect_runtime() -> Iterable[Sample]:
+    """Worker pool, cache and LLM registry figures, read at scrape time."""
+    from app.agents.crew_config import get_llm_registry
+    from app.cache import get_result_cache, get_stage_cache
+    from app.job_scraper import get_page_cache
+    from app.rate_limit import get_rate_limiter
+    from app.services.worker_pool import get_worker_pool
+
+    pool = get_worker_pool().stats()
+    yield ("worker_queue_depth", "gauge", "Stage jobs waiting for a worker", {}, pool["queue_depth"])
+    yield ("worker_in_flight", "gauge", "Stage jobs running on workers", {}, pool["in_flight"])
+    yield ("worker_max_workers", "gauge", "Worker threads for LLM stages", {}, pool["max_workers"])
+    for outcome in ("completed", "failed", "rejected", "timed_out"):
+        yield ("worker_jobs_total", "counter", "Stage jobs by outcome",
+               {"outcome": outcome}, pool[outcome])
+
+    caches = {"result": get_result_cache(), "stage": get_stage_cache(), "page": get_page_cache()}
+    for name, cache in caches.items():
+        stats = cache.stats()
+        yield ("cache_hits_total", "counter", "Cache lookups that found an entry",
+               {"cache": name}, stats["hits"])
+        yield ("cache_misses_total", "counter", "Cache lookups that found nothing",
+               {"cache": name}, stats["misses"])
+        yield ("cache_hit_ratio", "gauge", "Share of cache lookups that hit",
+               {"cache": name}, stats["hit_rate"])
+
+    llms = get_llm_registry().stats()
+    yield ("llm_agents_built", "gauge", "CrewAI agents built so far", {}, llms["agents_built"])
+
+    limiter = get_rate_limiter().stats()
+    for lane, waiting in limiter["waiting"].items():
+        yield ("llm_queue_depth", "gauge", "LLM calls waiting for the rate limiter",
+               {"lane": lane}, waiting)
+    yield ("llm_paused_seconds", "gauge", "Time left on the pause after a 429",
+           {}, limiter["paused_seconds"])
+
+
+REGISTRY.add_collector(collect_runtime)
+
+
+_profile_lock = threading.Lock()
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _profile_path(scope) -> str:
+    name = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+    return os.path.join(PROFILE_DIR, f"{int(time.time() * 1000)}-{scope['method']}-{name}.prof")
+
+
+class MetricsMiddleware:
+    """
+    Time every request and, when enabled, profile the ones that ask for it.
+
+    A plain ASGI middleware, so streamed responses (the SSE progress
+    feeds) pass through untouched. The time recorded runs until the
+    response starts.
+
+    Requests carrying ``X-Profile: 1`` are run under cProfile if
+    ``PROFILE_DIR`` is set; the stats file is written there and named in
+    the ``X-Profile-File`` response header (open it with ``python -m
+    pstats`` or snakeviz). One request is profiled at a time. cProfile
+    sees the whole thread, so the profile holds every coroutine the event
+    loop ran meanwhile, not just this request's; it ends when the
+    response starts, leaving a streamed body out.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile: Optional[cProfile.Profile] = None
+        if (
+            PROFILE_DIR
+            and (b"x-profile", b"1") in scope["headers"]
+            and _profile_lock.acquire(blocking=False)
+        ):
+            profile = cProfile.Profile()
+            profile.enable()
+        started = time.perf_counter()
+        responded = False
+
+        def stop_profile() -> Optional[cProfile.Profile]:
+            nonlocal profile
+            finished, profile = profile, None
+            if finished is not None:
+                finished.disable()
+                _profile_lock.release()
+            return finished
+
+        async def send_wrapper(message):
+            nonlocal responded
+            if message["type"] == "http.response.start":
+                responded = True
+                finished = stop_profile()
+                HTTP_SECONDS.observe(
+                    time.perf_counter() - started,
+                    method=scope["method"], route=_route_label(scope), status=str(message["status"])
+                )
+                if finished is not None:
+                    path = _profile_path(scope)
+                    # Writing the stats file would block the event loop
+                    await asyncio.to_thread(_dump_profile, finished, path)
+                    message = {
+                        **message,
+                        "headers": [*message.get("headers", []), (b"x-profile-file", path.encode())],
+                    }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if not responded:
+                HTTP_SECONDS.observe(
+                    time.perf_counter() - started,
+                    method=scope["method"], route=_route_label(scope), status="500"
+                )
+            raise
+        finally:
+            stop_profile()
+
+
+def _dump_profile(profile: cProfile.Profile, path: str) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profile.dump_stats(path)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, HttpUrl
-from typing import List, Optional, Literal
+from pydantic import BaseModel, Field, HttpUrl, field_validator, model_validator
+from typing import Any, Dict, List, Optional, Literal
 
 class AnalysisRequest(BaseModel):
     """Request model for resume analysis."""
@@ -28,6 +28,85 @@ class MatchAnalysis(BaseModel):
     strengths: List[str] = []
     improvement_areas: List[str] = []
 
+def _as_text_list(value: Any) -> Any:
+    """Accept a lone string where agents were asked for a list of strings."""
+    if isinstance(value, str):
+        return [value]
+    return value
+
+class ResumeParseStageOutput(BaseModel):
+    """JSON returned by the resume parser agent."""
+    contact: Any = {}
+    experience: List[Any] = []
+    education: List[Any] = []
+    skills: Any = []
+    certifications: List[Any] = []
+
+    _text_lists = field_validator(
+        "experience", "education", "certifications", mode="before"
+    )(_as_text_list)
+
+    @model_validator(mode="after")
+    def _has_content(self) -> "ResumeParseStageOutput":
+        if not any((self.contact, self.experience, self.education, self.skills, self.certifications)):
+            raise ValueError("no resume data extracted")
+        return self
+
+class JobStageOutput(BaseModel):
+    """JSON returned by the job analyst agent."""
+    required_skills: List[str] = []
+    preferred_skills: List[str] = []
+    experience_level: Any = None
+    responsibilities: List[str] = []
+    keywords: List[str] = []
+
+    _text_lists = field_validator(
+        "required_skills", "preferred_skills", "responsibilities", "keywords", mode="before"
+    )(_as_text_list)
+
+    @model_validator(mode="after")
+    def _has_content(self) -> "JobStageOutput":
+        if not any((self.required_skills, self.preferred_skills, self.responsibilities, self.keywords)):
+            raise ValueError("no job requirements extracted")
+        return self
+
+class QualityStageOutput(BaseModel):
+    """JSON returned by the resume quality agent."""
+    overall_score: float = Field(ge=0, le=100)
+    category_scores: Dict[str, Any] = {}
+    feedback: List[str] = []
+
+    _text_lists = field_validator("feedback", mode="before")(_as_text_list)
+
+class MatchStageOutput(BaseModel):
+    """JSON returned by the job matching agent."""
+    match_score: float = Field(ge=0, le=100)
+    matched_keywords: List[str] = []
+    missing_keywords: List[str] = []
+    skills_gap: List[str] = []
+    strengths: List[str] = []
+    suggestions: List[str] = []
+
+    _text_lists = field_validator(
+        "matched_keywords", "missing_keywords", "skills_gap", "strengths", "suggestions",
+        mode="before"
+    )(_as_text_list)
+
+class StructuredAnalysis(BaseModel):
+    """Analysis returned by a single structured-output LLM call."""
+    resume_quality_score: float = Field(ge=0, le=100)
+    quality_feedback: List[QualityFeedback] = Field(min_length=1)
+    match_analysis: MatchAnalysis
+
+class PromptStats(BaseModel):
+    """Estimated tokens of one stage input before and after budgeting."""
+    stage: str
+    part: Literal["resume", "job"]
+    tokens_before: int
+    tokens_after: int
+    budget: Optional[int] = None
+    truncated: bool = False
+
 class AnalysisResult(BaseModel):
     """Complete analysis result."""
     analysis_id: str
@@ -36,6 +115,33 @@ class AnalysisResult(BaseModel):
     quality_feedback: List[QualityFeedback] = []
     match_analysis: MatchAnalysis
     agent_logs: List[str] = []
+    stage_timings: Dict[str, float] = {}  # seconds each stage ran
+    mode: Literal["fast", "standard", "deep"] = "deep"
+    prompt_stats: List[PromptStats] = []
+
+class ContactInfo(BaseModel):
+    """Contact block found at the top of a resume."""
+    name: Optional[str] = None
+    emails: List[str] = []
+    phones: List[str] = []
+    links: List[str] = []
+    lines: List[str] = []
+
+class ResumeSection(BaseModel):
+    """One headed section of a resume, in reading order."""
+    kind: str  # canonical name (experience, education, skills, ...) or "other"
+    heading: str
+    lines: List[str] = []
+    bullets: List[str] = []
+    dates: List[str] = []
+    page: int = 0
+
+class ResumeDocument(BaseModel):
+    """Sectioned resume built from PDF layout (fonts, positions, bullets)."""
+    content_hash: str
+    page_count: int
+    contact: ContactInfo
+    sections: List[ResumeSection] = []
 
 class AgentUpdate(BaseModel):
     """Real-time agent status update."""
@@ -44,3 +150,70 @@ class AgentUpdate(BaseModel):
     message: str
     progress: int = Field(ge=0, le=100)
     reasoning: Optional[str] = None
+    stage: Optional[str] = None
+    elapsed: Optional[float] = None  # seconds since the analysis started
+    stage_seconds: Optional[float] = None  # run time of the finished stage
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+
+class BatchItemResult(BaseModel):
+    """Outcome for a single resume or job posting in a batch."""
+    label: str
+    status: Literal["pending", "completed", "error"] = "pending"
+    rank: Optional[int] = None
+    job_match_score: Optional[float] = None
+    resume_quality_score: Optional[float] = None
+    analysis: Optional[AnalysisResult] = None
+    error: Optional[str] = None
+
+class BatchResult(BaseModel):
+    """Ranked results for a batch, best match first."""
+    batch_id: str
+    total: int
+    completed: int = 0
+    failed: int = 0
+    items: List[BatchItemResult] = []
+
+class BatchProgress(BaseModel):
+    """Real-time per-item batch update."""
+    batch_id: str
+    index: int
+    label: str
+    status: Literal["working", "completed", "error"]
+    completed: int
+    total: int
+    job_match_score: Optional[float] = None
+    error: Optional[str] = None
+
+class JobComparison(BaseModel):
+    """One row of a resume-vs-many-postings comparison table."""
+    label: str
+    status: Literal["pending", "completed", "error"] = "pending"
+    rank: Optional[int] = None
+    match_score: Optional[float] = None
+    matched_keywords: List[str] = []
+    missing_keywords: List[str] = []
+    skills_gap: List[str] = []
+    error: Optional[str] = None
+
+class JobComparisonResult(BaseModel):
+    """Comparison of one resume against many job postings, best match first."""
+    batch_id: str
+    total: int
+    completed: int = 0
+    failed: int = 0
+    rows: List[JobComparison] = []
+
+class IndexedResume(BaseModel):
+    """A resume stored in the resume index."""
+    resume_id: str
+    label: str
+    added_at: float
+    duplicate: bool = False  # the same text was already indexed
+
+class ResumeSearchHit(BaseModel):
+    """An indexed resume ranked against a job posting by vector similarity."""
+    resume_id: str
+    label: str
+    rank: int
+    score: float
@@ -0,0 +1,278 @@
+"""Token-budgeted prompt inputs: cleanup, deduplication and section ranking."""
+from app.keywords import REQUIRED_MARKERS, get_skill_index
+from app.models import PromptStats, ResumeDocument
+from app.resume_layout import STAGE_SECTIONS, section_kind
+from typing import Dict, List, Optional, Set, Tuple
+import math
+import os
+import re
+
+# Claude averages about 3.5 characters per token on English prose; the
+# estimate errs high so budgets are not overrun
+CHARS_PER_TOKEN = 3.5
+
+# Default input budget in tokens per stage and input ("resume" or "job");
+# override with PROMPT_BUDGET_<STAGE>_<PART>, e.g. PROMPT_BUDGET_QUALITY_RESUME
+STAGE_BUDGETS: Dict[str, Dict[str, int]] = {
+    "resume_parse": {"resume": 3000},
+    "quality": {"resume": 3000},
+    "job_analysis": {"job": 2000},
+    "match": {"resume": 2000, "job": 2000},
+    "analysis": {"resume": 3000, "job": 2000},
+}
+
+# Which resume sections survive first when a budget is tight
+SECTION_PRIORITY = {
+    "experience": 1.0, "skills": 0.9, "contact": 0.8, "summary": 0.7, "projects": 0.6,
+    "education": 0.5, "certifications": 0.5, "awards": 0.3, "publications": 0.3,
+    "languages": 0.3, "other": 0.2, "volunteer": 0.2, "interests": 0.05, "references": 0.0,
+}
+
+# Smallest leftover budget worth spending on part of a section
+MIN_PARTIAL_TOKENS = 40
+TRUNCATION_MARKER = "[...]"
+
+PAGE_NUMBER_PATTERN = re.compile(r"^(?:page\s*)?\d+\s*(?:(?:of|/)\s*\d+)?$", re.IGNORECASE)
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+JOB_BOILERPLATE_PATTERN = re.compile(
+    r"equal opportunity|without regard to|reasonable accommodation|e-verify|"
+    r"cookie|privacy policy|terms of use|all rights reserved|apply now|share this job|"
+    r"sign in|create (?:a )?job alert|back to (?:search|jobs)",
+    re.IGNORECASE
+)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the Claude token count of a text.
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Estimated tokens
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def stage_budget(stage: str, part: str) -> Optional[int]:
+    """
+    Token budget for one input of a stage.
+
+    Args:
+        stage: Stage name, e.g. "quality"
+        part: "resume" or "job"
+
+    Returns:
+        Budget in tokens, or None if the input is not budgeted
+    """
+    configured = os.getenv(f"PROMPT_BUDGET_{stage.upper()}_{part.upper()}")
+    if configured:
+        return int(configured)
+    return STAGE_BUDGETS.get(stage, {}).get(part)
+
+
+def clean_lines(text: str) -> List[str]:
+    """
+    Collapse whitespace and drop blank lines, page numbers and repeated lines.
+
+    Repeated lines are typically page headers and footers of multi-page PDFs.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Remaining lines in order
+    """
+    lines, seen = [], set()
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line or PAGE_NUMBER_PATTERN.match(line):
+            continue
+        key = line.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return lines
+
+
+def _split_sections(text: str) -> List[Tuple[str, str, List[str]]]:
+    """(kind, heading, lines) blocks of plain resume text, split at known headings."""
+    sections: List[Tuple[str, str, List[str]]] = [("contact", "", [])]
+    for line in clean_lines(text):
+        kind = section_kind(line.rstrip(":")) if len(line.split()) <= 5 else None
+        if kind:
+            sections.append((kind, line.rstrip(":"), []))
+        else:
+            sections[-1][2].append(line)
+    return [section for section in sections if section[1] or section[2]]
+
+
+def _document_sections(document: ResumeDocument) -> List[Tuple[str, str, List[str]]]:
+    sections = [("contact", "", document.contact.lines)]
+    sections += [(s.kind, s.heading, s.lines) for s in document.sections]
+    seen: Set[str] = set()
+    deduped = []
+    for kind, heading, lines in sections:
+        kept = []
+        for line in lines:
+            if line.lower() not in seen:
+                seen.add(line.lower())
+                kept.append(line)
+        deduped.append((kind, heading, kept))
+    return [section for section in deduped if section[1] or section[2]]
+
+
+def _render(heading: str, lines: List[str]) -> str:
+    return "\n".join(([heading.upper()] if heading else []) + lines)
+
+
+def _fit_sections(sections: List[Tuple[str, str, List[str]]], budget: int) -> str:
+    """Keep whole sections by priority, then fill leftover budget, in document order."""
+    ranked = sorted(
+        range(len(sections)),
+        key=lambda i: (-SECTION_PRIORITY.get(sections[i][0], 0.2), i)
+    )
+    kept: Dict[int, List[str]] = {}
+    skipped = []
+    remaining = budget
+    for i in ranked:
+        _, heading, lines = sections[i]
+        cost = count_tokens(_render(heading, lines)) + 1
+        if cost <= remaining:
+            kept[i] = lines
+            remaining -= cost
+        else:
+            skipped.append(i)
+
+    # The most valuable section that did not fit gets what is left;
+    # resumes list the most recent items first, so keep its head
+    if skipped and remaining >= MIN_PARTIAL_TOKENS:
+        i = skipped[0]
+        heading, lines = sections[i][1], sections[i][2]
+        remaining -= count_tokens(_render(heading, [TRUNCATION_MARKER])) + 2
+        prefix = []
+        for line in lines:
+            line_cost = count_tokens(line) + 1
+            if line_cost > remaining:
+                break
+            prefix.append(line)
+            remaining -= line_cost
+        kept[i] = prefix + [TRUNCATION_MARKER]
+    return "\n\n".join(
+        _render(sections[i][1], kept[i]) for i in sorted(kept)
+    )
+
+
+class PromptBuilder:
+    """
+    Prepares resume and job text for one analysis within per-stage token budgets.
+
+    Text is cleaned and deduplicated first; only when it is still over
+    budget are the lowest-value resume sections or job sentences dropped.
+    Every input it prepares is recorded in ``stats``.
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, Dict[str, int]]] = None):
+        """
+        Initialize builder.
+
+        Args:
+            budgets: Per-stage budgets overriding the configured ones
+        """
+        self.budgets = budgets or {}
+        self.stats: List[PromptStats] = []
+
+    def budget(self, stage: str, part: str) -> Optional[int]:
+        """Budget for one stage input, preferring budgets given to the builder."""
+        if part in self.budgets.get(stage, {}):
+            return self.budgets[stage][part]
+        return stage_budget(stage, part)
+
+    def _record(self, stage: str, part: str, before: str, after: str, budget: Optional[int]) -> str:
+        self.stats.append(PromptStats(
+            stage=stage,
+            part=part,
+            tokens_before=count_tokens(before),
+            tokens_after=count_tokens(after),
+            budget=budget,
+            truncated=TRUNCATION_MARKER in after or len(after) < len(before) * 0.5
+        ))
+        return after
+
+    def resume(
+        self,
+        stage: str,
+        text: str,
+        document: Optional[ResumeDocument] = None
+    ) -> str:
+        """
+        Resume text for a stage: only the sections it needs, within its budget.
+
+        Args:
+            stage: Stage name
+            text: Extracted resume text
+            document: Sectioned resume, if layout extraction was used
+
+        Returns:
+            Prompt-ready resume text
+        """
+        sections = _document_sections(document) if document is not None else _split_sections(text)
+        kinds = STAGE_SECTIONS.get(stage)
+        if kinds is not None and any(kind in kinds for kind, _, _ in sections if kind != "contact"):
+            sections = [section for section in sections if section[0] in kinds]
+
+        budget = self.budget(stage, "resume")
+        if budget is None:
+            fitted = "\n\n".join(_render(heading, lines) for _, heading, lines in sections)
+        else:
+            fitted = _fit_sections(sections, budget)
+        return self._record(stage, "resume", text, fitted, budget)
+
+    def job(self, stage: str, text: str) -> str:
+        """
+        Job posting text for a stage, without boilerplate and within its budget.
+
+        When over budget, sentences naming skills or requirements are kept
+        over the rest.
+
+        Args:
+            stage: Stage name
+            text: Job posting text
+
+        Returns:
+            Prompt-ready job text
+        """
+        sentences, seen = [], set()
+        for sentence in SENTENCE_SPLIT_PATTERN.split(text):
+            sentence = " ".join(sentence.split())
+            key = sentence.lower()
+            if not sentence or key in seen or JOB_BOILERPLATE_PATTERN.search(sentence):
+                continue
+            seen.add(key)
+            sentences.append(sentence)
+
+        budget = self.budget(stage, "job")
+        if budget is not None and count_tokens(" ".join(sentences)) > budget:
+            index = get_skill_index()
+            scores = [
+                2 * len(index.count(sentence))
+                + (1 if REQUIRED_MARKERS.search(sentence) else 0)
+                - i / max(len(sentences), 1)
+                for i, sentence in enumerate(sentences)
+            ]
+            keep, remaining = set(), budget
+            for i in sorted(range(len(sentences)), key=lambda i: -scores[i]):
+                cost = count_tokens(sentences[i]) + 1
+                if cost <= remaining:
+                    keep.add(i)
+                    remaining -= cost
+            sentences = [sentences[i] for i in sorted(keep)]
+        return self._record(stage, "job", text, " ".join(sentences), budget)
+
+    def summary(self) -> str:
+        """One-line before/after token summary for the agent logs."""
+        before = sum(stat.tokens_before for stat in self.stats)
+        after = sum(stat.tokens_after for stat in self.stats)
+        return f"Prompt inputs: ~{before} tokens before budgeting, ~{after} after"
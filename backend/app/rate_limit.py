@@ -0,0 +1,546 @@
+"""Token-bucket limits on Claude calls and on how often each client may start analyses."""
+from collections import OrderedDict
+from contextlib import contextmanager
+from app.metrics import LLM_QUEUE_SECONDS, LLM_THROTTLED
+from app.prompt_builder import count_tokens
+from typing import Any, Callable, Collection, Iterator, List, Optional, Sequence, Tuple
+import heapq
+import hmac
+import ipaddress
+import itertools
+import json
+import math
+import os
+import random
+import threading
+import time
+
+# Provider limits for the whole process; 0 (the default) turns a limit
+# off. Set them to the account's rate limits.
+LLM_RPM_LIMIT = float(os.getenv("LLM_RPM_LIMIT", "0"))
+LLM_TPM_LIMIT = float(os.getenv("LLM_TPM_LIMIT", "0"))
+
+# Retries of a call the API rejected with 429, and the backoff between them
+# when the response carries no Retry-After
+LLM_RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "2"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "60"))
+
+# New analyses are turned away while queued calls would wait longer than this
+LLM_ADMISSION_MAX_WAIT = float(os.getenv("LLM_ADMISSION_MAX_WAIT", "30"))
+
+# Analyses each API key (or client IP) may start per minute, and in a burst;
+# 0 (the default) turns the quota off
+CLIENT_RPM_LIMIT = float(os.getenv("CLIENT_RPM_LIMIT", "0"))
+CLIENT_BURST = float(os.getenv("CLIENT_BURST", "5"))
+CLIENT_QUOTA_MAX_CLIENTS = 10000
+
+# Comma-separated API keys that identify a client for its quota; any other
+# X-API-Key is ignored, so callers cannot mint themselves fresh buckets
+CLIENT_API_KEYS = frozenset(
+    key.strip() for key in os.getenv("CLIENT_API_KEYS", "").split(",") if key.strip()
+)
+
+# Comma-separated addresses or networks of reverse proxies in front of the
+# API; only requests from these have their X-Forwarded-For honoured
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(network.strip(), strict=False)
+    for network in os.getenv("TRUSTED_PROXIES", "").split(",") if network.strip()
+]
+
+# Answers that mean the API is over capacity: 429 rate limited, 529
+# overloaded. The SDK's own retries are off, so these reach the limiter.
+THROTTLE_STATUS_CODES = (429, 529)
+
+# Output tokens reserved for a call that does not set max_tokens
+DEFAULT_MAX_TOKENS = 1024
+
+# Lanes in priority order: queued interactive calls go before batch calls
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)
+
+# Longest a waiting call sleeps before rechecking
+MAX_POLL = 1.0
+
+_local = threading.local()
+
+
+class TokenBucket:
+    """
+    Tokens refilled at a steady rate up to a capacity.
+
+    Taking more than is available is allowed and leaves the bucket in
+    debt, so a call whose real cost turns out higher than its estimate
+    still slows the ones after it. Not thread-safe; callers lock.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Most tokens the bucket holds
+            clock: Monotonic time source, in seconds
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> float:
+        """Tokens in the bucket now (negative while in debt)."""
+        self._refill()
+        return self.tokens
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` tokens are available (0 if they are now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Remove tokens, going into debt if there are not enough."""
+        self._refill()
+        self.tokens -= amount
+
+    def give_back(self, amount: float) -> None:
+        """Return tokens that were taken but not used."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+def _per_minute_bucket(limit: float, clock: Callable[[], float]) -> Optional[TokenBucket]:
+    """Bucket allowing ``limit`` per minute with a minute's worth of burst, or None if off."""
+    if limit <= 0:
+        return None
+    return TokenBucket(limit / 60, limit, clock)
+
+
+def current_lane() -> str:
+    """Lane of the LLM calls made on this thread."""
+    return getattr(_local, "lane", INTERACTIVE)
+
+
+@contextmanager
+def lane(name: str) -> Iterator[str]:
+    """
+    Put the LLM calls made on this thread in a lane.
+
+    Raises:
+        ValueError: If the lane is unknown
+    """
+    if name not in LANES:
+        raise ValueError(f"Unknown lane: {name}")
+    previous = current_lane()
+    _local.lane = name
+    try:
+        yield name
+    finally:
+        _local.lane = previous
+
+
+def in_lane(name: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """Call ``fn`` with its LLM calls in a lane; for handing to a worker pool."""
+    with lane(name):
+        return fn(*args)
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    return getattr(error, "status_code", None)
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the API asked us to wait, from the Retry-After header of its response."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _response_tokens(response: Any) -> Optional[int]:
+    """Input plus output tokens of an Anthropic message or a LangChain chat result."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        output = getattr(response, "llm_output", None) or {}
+        usage = output.get("usage") if isinstance(output, dict) else None
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        return int(usage.get("input_tokens") or 0) + int(usage.get("output_tokens") or 0)
+    return int(usage.input_tokens or 0) + int(usage.output_tokens or 0)
+
+
+class LLMRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budget shared by every Claude call.
+
+    Calls run on worker threads and block there until both buckets allow
+    them; the event loop never waits on the limiter. Waiting calls are
+    served in lane order, so an interactive analysis's next call goes
+    ahead of queued batch work, and in arrival order within a lane.
+
+    A call's tokens are estimated from its prompt plus ``max_tokens`` up
+    front and settled against the usage the API reports. A 429 from the
+    API pauses every lane for the Retry-After it sent (or an exponential
+    backoff) and the call is retried; ``admission_delay`` exposes the
+    backlog so new analyses can be turned away while it lasts.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = LLM_RPM_LIMIT,
+        tokens_per_minute: float = LLM_TPM_LIMIT,
+        max_retries: int = LLM_RATE_LIMIT_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE,
+        backoff_max: float = LLM_BACKOFF_MAX,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            requests_per_minute: Calls allowed per minute, 0 for no limit
+            tokens_per_minute: Tokens allowed per minute, 0 for no limit
+            max_retries: Retries of a call rejected with 429
+            backoff_base: First backoff in seconds when the API gives no Retry-After
+            backoff_max: Longest backoff in seconds
+            clock: Monotonic time source, in seconds
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clock = clock
+        self._requests = _per_minute_bucket(requests_per_minute, clock)
+        self._tokens = _per_minute_bucket(tokens_per_minute, clock)
+        self._cond = threading.Condition()
+        self._waiting: List[Tuple[int, int, int]] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._strikes = 0
+        self.admitted = 0
+        self.throttled = 0
+
+    def _wait_time(self, ticket: Tuple[int, int, int]) -> float:
+        """Seconds before a waiting call may go; only the first in line ever may."""
+        if self._waiting[0] != ticket:
+            return MAX_POLL
+        wait = self._paused_until - self._clock()
+        if self._requests is not None:
+            wait = max(wait, self._requests.wait_time(1))
+        if self._tokens is not None:
+            wait = max(wait, self._tokens.wait_time(ticket[2]))
+        return wait
+
+    def acquire(self, tokens: int, lane_name: Optional[str] = None) -> float:
+        """
+        Block until a call of ``tokens`` estimated tokens may be sent.
+
+        Args:
+            tokens: Estimated input plus output tokens
+            lane_name: Lane of the call (this thread's lane by default)
+
+        Returns:
+            Seconds spent waiting
+        """
+        lane_name = lane_name or current_lane()
+        started = self._clock()
+        with self._cond:
+            ticket = (LANES.index(lane_name), next(self._seq), tokens)
+            heapq.heappush(self._waiting, ticket)
+            try:
+                wait = self._wait_time(ticket)
+                while wait > 0:
+                    self._cond.wait(min(wait, MAX_POLL))
+                    wait = self._wait_time(ticket)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+            if self._requests is not None:
+                self._requests.take(1)
+            if self._tokens is not None:
+                self._tokens.take(tokens)
+            self.admitted += 1
+        waited = self._clock() - started
+        LLM_QUEUE_SECONDS.observe(waited, lane=lane_name)
+        return waited
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """
+        Correct a call's token charge once its real usage is known.
+
+        Args:
+            estimated: Tokens taken by ``acquire``
+            actual: Tokens the API reported, or None if it reported none
+        """
+        with self._cond:
+            if self._tokens is None or actual is None:
+                return
+            if actual < estimated:
+                self._tokens.give_back(estimated - actual)
+            else:
+                self._tokens.take(actual - estimated)
+            self._cond.notify_all()
+
+    def pause(self, retry_after: Optional[float] = None) -> float:
+        """
+        Hold every lane after the API answered 429.
+
+        Args:
+            retry_after: Seconds the API asked for, capped at
+                ``backoff_max``; without it the pause doubles with each
+                consecutive 429, with jitter
+
+        Returns:
+            Seconds paused
+        """
+        with self._cond:
+            self._strikes += 1
+            self.throttled += 1
+            if retry_after is None:
+                backoff = self.backoff_base * 2 ** (self._strikes - 1)
+                retry_after = min(self.backoff_max, backoff) * random.uniform(0.5, 1.0)
+            else:
+                # The header comes from the server; never let it stall every lane for long
+                retry_after = min(max(retry_after, 0.0), self.backoff_max)
+            self._paused_until = max(self._paused_until, self._clock() + retry_after)
+        LLM_THROTTLED.inc()
+        return retry_after
+
+    def call(self, send: Callable[[], Any], tokens: int) -> Any:
+        """
+        Send one call within the limits, retrying it after a 429 or 529.
+
+        Args:
+            send: Makes the API call and returns its response
+            tokens: Estimated input plus output tokens
+
+        Returns:
+            The response
+
+        Raises:
+            Exception: Whatever ``send`` raised, including the last 429 once
+                retries are used up
+        """
+        for attempt in itertools.count():
+            self.acquire(tokens)
+            try:
+                response = send()
+            except Exception as e:
+                self.settle(tokens, 0)
+                if _status_code(e) not in THROTTLE_STATUS_CODES:
+                    raise
+                # Other calls hold off too, even once this one gives up
+                self.pause(_retry_after(e))
+                if attempt >= self.max_retries:
+                    raise
+                continue
+            self.settle(tokens, _response_tokens(response))
+            with self._cond:
+                self._strikes = 0
+            return response
+
+    def admission_delay(self) -> float:
+        """Estimated seconds before a call queued now would be sent."""
+        with self._cond:
+            delay = self._paused_until - self._clock()
+            queued = len(self._waiting) + 1
+            if self._requests is not None:
+                shortfall = queued - self._requests.available()
+                delay = max(delay, shortfall / self._requests.rate)
+            if self._tokens is not None:
+                queued_tokens = sum(tokens for _, _, tokens in self._waiting)
+                shortfall = queued_tokens - self._tokens.available()
+                delay = max(delay, shortfall / self._tokens.rate)
+            return max(delay, 0.0)
+
+    def stats(self) -> dict:
+        """Queued calls per lane, the current pause and totals so far."""
+        with self._cond:
+            waiting = {name: 0 for name in LANES}
+            for rank, _, _ in self._waiting:
+                waiting[LANES[rank]] += 1
+            return {
+                "waiting": waiting,
+                "paused_seconds": round(max(self._paused_until - self._clock(), 0.0), 3),
+                "admitted": self.admitted,
+                "throttled": self.throttled,
+            }
+
+
+def estimate_call_tokens(params: dict) -> int:
+    """Estimated input plus maximum output tokens of a ``messages.create`` call."""
+    prompt = json.dumps(
+        [params.get("system", ""), params.get("messages", []), params.get("tools", [])],
+        default=str
+    )
+    return count_tokens(prompt) + int(params.get("max_tokens") or DEFAULT_MAX_TOKENS)
+
+
+class RateLimitedMessages:
+    """``client.messages`` whose ``create`` goes through a limiter."""
+
+    def __init__(self, messages: Any, limiter: LLMRateLimiter):
+        """
+        Initialize wrapper.
+
+        Args:
+            messages: The client's messages resource
+            limiter: Limiter every call waits on
+        """
+        self._messages = messages
+        self.limiter = limiter
+
+    def create(self, **params: Any) -> Any:
+        """Create a message once the limiter allows it."""
+        return self.limiter.call(
+            lambda: self._messages.create(**params), estimate_call_tokens(params)
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._messages, name)
+
+
+class ClientQuota:
+    """
+    Per-client allowance of analyses, one token bucket per API key or IP.
+
+    The least recently seen clients are forgotten beyond ``max_clients``.
+    """
+
+    def __init__(
+        self,
+        per_minute: float = CLIENT_RPM_LIMIT,
+        burst: float = CLIENT_BURST,
+        max_clients: int = CLIENT_QUOTA_MAX_CLIENTS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize quota.
+
+        Args:
+            per_minute: Analyses each client may start per minute, 0 for no limit
+            burst: Analyses a client may start back to back
+            max_clients: Clients tracked at once
+            clock: Monotonic time source, in seconds
+        """
+        self.per_minute = per_minute
+        self.burst = max(burst, 1)
+        self.max_clients = max_clients
+        self._clock = clock
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def check(self, client_id: str, cost: float = 1) -> int:
+        """
+        Count analyses against a client's quota.
+
+        Work costing more than the burst is let through once the client's
+        bucket is full and leaves it in debt, so a batch of N analyses
+        holds the client off for as long as N single ones would.
+
+        Args:
+            client_id: API key or client address
+            cost: Analyses the request starts, e.g. the size of a batch
+
+        Returns:
+            0 if the work is allowed, otherwise whole seconds until it
+            would be (nothing is counted)
+        """
+        if self.per_minute <= 0:
+            return 0
+        with self._lock:
+            bucket = self._buckets.pop(client_id, None)
+            if bucket is None:
+                bucket = TokenBucket(self.per_minute / 60, self.burst, self._clock)
+            self._buckets[client_id] = bucket
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            wait = bucket.wait_time(cost)
+            if wait > 0:
+                self.rejected += 1
+                return max(1, math.ceil(wait))
+            bucket.take(cost)
+            return 0
+
+
+def _is_trusted_proxy(address: str, proxies: Sequence[Any]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+
+def client_identity(
+    api_key: Optional[str],
+    peer: Optional[str],
+    forwarded_for: Optional[str] = None,
+    api_keys: Collection[str] = CLIENT_API_KEYS,
+    trusted_proxies: Sequence[Any] = TRUSTED_PROXIES
+) -> str:
+    """
+    Name the client a request counts against in ``ClientQuota``.
+
+    A configured API key names the client; an unknown key is ignored. The
+    client address is otherwise the connection's peer, or, when the peer is
+    a trusted proxy, the last X-Forwarded-For hop not added by one.
+
+    Args:
+        api_key: X-API-Key header
+        peer: Address of the connection
+        forwarded_for: X-Forwarded-For header
+        api_keys: Keys that identify clients
+        trusted_proxies: Networks of trusted reverse proxies
+
+    Returns:
+        "key:<key>" or "ip:<address>"
+    """
+    if api_key and any(hmac.compare_digest(api_key, key) for key in api_keys):
+        return f"key:{api_key}"
+    address = peer or "unknown"
+    if forwarded_for and _is_trusted_proxy(address, trusted_proxies):
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        # Each proxy appends the address it saw; entries to the left of the
+        # first untrusted hop were written by the client and can be forged
+        for hop in reversed(hops):
+            address = hop
+            if not _is_trusted_proxy(hop, trusted_proxies):
+                break
+    return f"ip:{address}"
+
+
+_limiter: Optional[LLMRateLimiter] = None
+_quota: Optional[ClientQuota] = None
+_singleton_lock = threading.Lock()
+
+
+def get_rate_limiter() -> LLMRateLimiter:
+    """Get the process-wide limiter for Claude calls."""
+    global _limiter
+    with _singleton_lock:
+        if _limiter is None:
+            _limiter = LLMRateLimiter()
+        return _limiter
+
+
+def get_client_quota() -> ClientQuota:
+    """Get the process-wide per-client analysis quota."""
+    global _quota
+    with _singleton_lock:
+        if _quota is None:
+            _quota = ClientQuota()
+        return _quota
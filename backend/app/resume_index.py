@@ -0,0 +1,352 @@
+"""Persistent resume index with hashed TF-IDF vectors for top-K retrieval."""
+from app.cache import content_hash, normalize_text
+from app.keywords import get_skill_index, tokenize
+from app.models import IndexedResume, ResumeDocument, ResumeSearchHit
+from collections import Counter
+from typing import List, Optional, Tuple
+import math
+import numpy as np
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+
+RESUME_INDEX_PATH = os.getenv("RESUME_INDEX_PATH", ".cache/resume_index")
+RESUME_INDEX_DIM = int(os.getenv("RESUME_INDEX_DIM", "2048"))
+
+# Rows allocated up front; the matrix doubles when full
+INITIAL_CAPACITY = 1024
+
+# Taxonomy skills count extra on top of their words, so "k8s" and
+# "kubernetes" land on the same feature
+SKILL_FEATURE_WEIGHT = 2.0
+
+VECTORS_FILE = "vectors.f32"
+# Document frequencies live in SQLite now; an index from before that is
+# migrated from this file when opened
+DOCUMENT_FREQUENCY_FILE = "df.npy"
+META_FILE = "resumes.sqlite3"
+
+
+def _features(text: str) -> Counter:
+    """Word counts plus canonical skill counts of a text."""
+    tokens = tokenize(text)
+    features = Counter(tokens)
+    for _, skill in get_skill_index().find(tokens):
+        features[f"skill:{skill}"] += SKILL_FEATURE_WEIGHT
+    return features
+
+
+def hashed_vector(text: str, dim: int = RESUME_INDEX_DIM) -> np.ndarray:
+    """
+    Embed a text as a signed, hashed, sublinear term-frequency vector.
+
+    Features are hashed into ``dim`` buckets with CRC32, which is stable
+    across processes, and a second hash bit picks the sign so collisions
+    tend to cancel out rather than add up.
+
+    Args:
+        text: Any text
+        dim: Vector length
+
+    Returns:
+        L2-normalized float32 vector (all zeros for text without tokens)
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, count in _features(text).items():
+        digest = zlib.crc32(feature.encode("utf-8"))
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % dim] += sign * (1.0 + math.log(count))
+    norm = float(np.linalg.norm(vector))
+    if norm:
+        vector /= norm
+    return vector
+
+
+class ResumeIndex:
+    """
+    Stored resumes with one embedding each, searchable with a single matrix product.
+
+    Vectors live in a float32 memory-mapped matrix, one row per resume, so a
+    job posting is scored against every resume with one dot product and
+    the OS pages the matrix in as needed. Text, the section model and labels
+    live in SQLite next to it. Documents are stored as term-frequency
+    vectors; inverse document frequencies are tracked per bucket and
+    applied to the query, so adding a resume never rewrites earlier rows.
+
+    Several worker processes can share one index. Writes take SQLite's
+    write lock and first catch up with rows other processes added, and
+    searches catch up before scoring, so every process sees every resume.
+    Document frequencies are stored in the same transaction as the rows.
+    """
+
+    def __init__(self, path: str = RESUME_INDEX_PATH, dim: int = RESUME_INDEX_DIM):
+        """
+        Open or create an index.
+
+        Args:
+            path: Directory holding the vectors and metadata
+            dim: Vector length; must match an existing index
+
+        Raises:
+            ValueError: If the index on disk was built with another dimension
+        """
+        self.path = path
+        self.dim = dim
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(path, META_FILE), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS resumes (
+                row INTEGER PRIMARY KEY,
+                resume_id TEXT NOT NULL UNIQUE,
+                label TEXT NOT NULL,
+                text TEXT NOT NULL,
+                document TEXT,
+                content_hash TEXT NOT NULL UNIQUE,
+                added_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('dim', ?)", (str(dim),))
+        stored = int(self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()[0])
+        if stored != dim:
+            raise ValueError(f"Resume index at {path} has dimension {stored}, not {dim}")
+
+        df_path = os.path.join(path, DOCUMENT_FREQUENCY_FILE)
+        if os.path.exists(df_path):
+            self._conn.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('df', ?)", (np.load(df_path).tobytes(),)
+            )
+            os.remove(df_path)
+
+        self.count = 0
+        self._df = np.zeros(dim)
+        self._vectors = self._map(INITIAL_CAPACITY)
+        self._sync()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _map(self, capacity: int) -> np.memmap:
+        """Map the vector file with room for ``capacity`` rows, growing it if needed."""
+        path = os.path.join(self.path, VECTORS_FILE)
+        size = capacity * self.dim * 4
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+            else:
+                capacity = f.tell() // (self.dim * 4)
+        return np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _sync(self) -> None:
+        """
+        Catch up with resumes added by other processes; call with the lock held.
+
+        Inside a write transaction this reads the committed state the write
+        builds on; otherwise it reads one consistent snapshot.
+        """
+        in_transaction = self._conn.in_transaction
+        if not in_transaction:
+            self._conn.execute("BEGIN")
+        try:
+            count = self._conn.execute(
+                "SELECT COALESCE(MAX(row) + 1, 0) FROM resumes"
+            ).fetchone()[0]
+            if count != self.count:
+                stored = self._conn.execute("SELECT value FROM meta WHERE key = 'df'").fetchone()
+                self._df = (
+                    np.frombuffer(stored[0], dtype=np.float64).copy() if stored
+                    else np.zeros(self.dim)
+                )
+        finally:
+            if not in_transaction:
+                self._conn.execute("COMMIT")
+        if count > self._vectors.shape[0]:
+            # Another process grew the vector file
+            self._vectors = self._map(count)
+        self.count = count
+
+    def add(
+        self,
+        text: str,
+        label: str,
+        document: Optional[ResumeDocument] = None
+    ) -> IndexedResume:
+        """
+        Store and embed one resume.
+
+        Args:
+            text: Extracted resume text
+            label: Display name, usually the file name
+            document: Sectioned resume, if layout extraction was used
+
+        Returns:
+            The stored resume, or the existing one if the text is already indexed
+        """
+        return self.add_many([(label, text, document)])[0]
+
+    def add_many(
+        self,
+        resumes: List[Tuple[str, str, Optional[ResumeDocument]]]
+    ) -> List[IndexedResume]:
+        """
+        Store and embed resumes in one transaction.
+
+        Args:
+            resumes: (label, text, document) triples
+
+        Returns:
+            One entry per input, in order; duplicates of indexed text are
+            returned as the existing entry with ``duplicate`` set
+        """
+        results: List[IndexedResume] = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Holding the write lock, pick up other processes' rows so
+                # new rows go after theirs and frequencies include them
+                self._sync()
+                for label, text, document in resumes:
+                    results.append(self._add(label, text, document))
+                # Vectors reach the disk before the rows that point at them
+                self._vectors.flush()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('df', ?)", (self._df.tobytes(),)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                # Forget the rolled back rows and frequencies
+                self.count = -1
+                self._sync()
+                raise
+        return results
+
+    def _add(self, label: str, text: str, document: Optional[ResumeDocument]) -> IndexedResume:
+        key = content_hash(normalize_text(text))
+        existing = self._conn.execute(
+            "SELECT resume_id, label, added_at FROM resumes WHERE content_hash = ?", (key,)
+        ).fetchone()
+        if existing is not None:
+            return IndexedResume(
+                resume_id=existing[0], label=existing[1], added_at=existing[2], duplicate=True
+            )
+
+        if self.count >= self._vectors.shape[0]:
+            self._vectors.flush()
+            self._vectors = self._map(self._vectors.shape[0] * 2)
+        vector = hashed_vector(text, self.dim)
+        self._vectors[self.count] = vector
+        self._df += vector != 0
+
+        entry = IndexedResume(resume_id=str(uuid.uuid4()), label=label, added_at=time.time())
+        self._conn.execute(
+            "INSERT INTO resumes (row, resume_id, label, text, document, content_hash, added_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.count, entry.resume_id, label, text,
+             document.model_dump_json() if document is not None else None, key, entry.added_at)
+        )
+        self.count += 1
+        return entry
+
+    def search(self, job_text: str, top_k: int = 20) -> List[ResumeSearchHit]:
+        """
+        Rank indexed resumes against a job posting.
+
+        Args:
+            job_text: Job posting text
+            top_k: Number of resumes to return
+
+        Returns:
+            Best-scoring resumes first, at most ``top_k``
+        """
+        with self._lock:
+            self._sync()
+            count, vectors, df = self.count, self._vectors, self._df.copy()
+        if not count or top_k < 1:
+            return []
+
+        idf = np.log((count + 1) / (df + 1)) + 1
+        query = hashed_vector(job_text, self.dim) * idf.astype(np.float32)
+        norm = float(np.linalg.norm(query))
+        if not norm:
+            return []
+        scores = vectors[:count] @ (query / norm)
+
+        k = min(top_k, count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        with self._lock:
+            rows = {
+                row: (resume_id, label)
+                for row, resume_id, label in self._conn.execute(
+                    f"SELECT row, resume_id, label FROM resumes WHERE row IN ({','.join('?' * k)})",
+                    [int(row) for row in top]
+                )
+            }
+        return [
+            ResumeSearchHit(
+                resume_id=rows[int(row)][0], label=rows[int(row)][1],
+                rank=rank, score=round(float(scores[row]), 4)
+            )
+            for rank, row in enumerate(top, start=1)
+        ]
+
+    def resumes(
+        self,
+        resume_ids: List[str]
+    ) -> List[Tuple[str, str, Optional[ResumeDocument]]]:
+        """
+        Load stored resumes for the full analysis.
+
+        Args:
+            resume_ids: Identifiers from ``add`` or ``search``
+
+        Returns:
+            (label, text, document) triples in the order asked for; unknown
+            identifiers are skipped
+        """
+        if not resume_ids:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT resume_id, label, text, document FROM resumes "
+                f"WHERE resume_id IN ({','.join('?' * len(resume_ids))})",
+                resume_ids
+            ).fetchall()
+        found = {
+            resume_id: (label, text, ResumeDocument.model_validate_json(document) if document else None)
+            for resume_id, label, text, document in rows
+        }
+        return [found[resume_id] for resume_id in resume_ids if resume_id in found]
+
+    def stats(self) -> dict:
+        """Size of the index."""
+        with self._lock:
+            self._sync()
+        return {
+            "resumes": self.count,
+            "dim": self.dim,
+            "capacity": self._vectors.shape[0],
+            "vector_bytes": self._vectors.shape[0] * self.dim * 4,
+        }
+
+
+_index: Optional[ResumeIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_resume_index() -> ResumeIndex:
+    """Get the process-wide resume index, opened on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ResumeIndex()
+        return _index
@@ -0,0 +1,460 @@
+"""Layout-aware resume extraction into a sectioned document model."""
+from app.cache import CacheBackend, content_hash, get_stage_cache
+from app.metrics import SPAN_SECONDS
+from app.models import ContactInfo, ResumeDocument, ResumeSection
+from app.pdf_parser import (
+    MAX_PDF_BYTES,
+    MAX_PDF_PAGES,
+    _check_page_count,
+    extract_text_from_pdf,
+    extract_text_from_upload,
+    map_page_ranges,
+    splits_pages,
+    spool_upload
+)
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+
+# "layout" builds a ResumeDocument; "text" keeps plain text extraction
+EXTRACT_MODE = os.getenv("RESUME_EXTRACT_MODE", "layout")
+
+# Bump when the section model changes so cached documents are rebuilt
+LAYOUT_VERSION = "1"
+
+SECTION_ALIASES: Dict[str, List[str]] = {
+    "summary": ["summary", "professional summary", "profile", "about me", "about",
+                "objective", "career objective", "overview"],
+    "experience": ["experience", "work experience", "professional experience",
+                   "employment", "employment history", "work history", "career history"],
+    "education": ["education", "academic background", "education and training", "academics"],
+    "skills": ["skills", "technical skills", "core skills", "key skills", "competencies",
+               "core competencies", "technologies", "tech stack", "tools"],
+    "projects": ["projects", "personal projects", "selected projects", "key projects"],
+    "certifications": ["certifications", "certificates", "licenses",
+                       "licenses and certifications", "certifications and licenses"],
+    "awards": ["awards", "honors", "honours", "achievements", "awards and honors"],
+    "publications": ["publications", "papers", "research"],
+    "languages": ["languages"],
+    "volunteer": ["volunteer", "volunteering", "volunteer experience", "community"],
+    "interests": ["interests", "hobbies", "hobbies and interests"],
+    "references": ["references"],
+}
+_HEADING_KINDS = {
+    alias: kind for kind, aliases in SECTION_ALIASES.items() for alias in aliases
+}
+
+# Sections each stage needs; None means the whole document
+STAGE_SECTIONS: Dict[str, Optional[Set[str]]] = {
+    "resume_parse": {"contact", "experience", "education", "skills", "projects",
+                     "certifications", "awards", "languages", "other"},
+    "quality": None,
+}
+
+BULLET_PATTERN = re.compile(r"^\s*[•▪◦‣·●○■–*-]\s*")
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+LINK_PATTERN = re.compile(
+    r"(?:https?://)?(?:www\.)?(?:linkedin\.com|github\.com|gitlab\.com)/[\w/.-]+|https?://[^\s|,]+",
+    re.IGNORECASE
+)
+
+_MONTH = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH}\s+\d{{4}}|\d{{1,2}}/\d{{4}}|(?:19|20)\d{{2}})"
+DATE_PATTERN = re.compile(
+    rf"{_DATE}(?:\s*(?:-|–|—|to)\s*(?:{_DATE}|Present|Current|Now))?",
+    re.IGNORECASE
+)
+
+# Headings are short; longer lines are body text even if bold
+MAX_HEADING_WORDS = 5
+MAX_HEADING_CHARS = 40
+# A line this much larger than body text counts as styled
+HEADING_SIZE_RATIO = 1.15
+
+
+def _line_records(doc, start: int = 0, stop: Optional[int] = None) -> List[dict]:
+    """Flatten pages [start, stop) of the PDF into text lines with font size, weight and position."""
+    records = []
+    for page_number in range(start, doc.page_count if stop is None else stop):
+        page = doc[page_number]
+        for block in page.get_text("dict")["blocks"]:
+            if block.get("type") != 0:
+                continue
+            for line in block["lines"]:
+                spans = [span for span in line["spans"] if span["text"].strip()]
+                if not spans:
+                    continue
+                text = " ".join("".join(span["text"] for span in spans).split())
+                records.append({
+                    "text": text,
+                    "size": max(span["size"] for span in spans),
+                    "bold": all(
+                        span["flags"] & 16 or "bold" in span["font"].lower() for span in spans
+                    ),
+                    "x0": line["bbox"][0],
+                    "page": page_number,
+                })
+    return records
+
+
+def _page_range_records(path: str, start: int, stop: int) -> List[dict]:
+    """Line records of pages [start, stop) of a PDF file (runs in a worker process)."""
+    import fitz  # PyMuPDF, loaded on first use
+
+    with fitz.open(path) as doc:
+        return _line_records(doc, start, stop)
+
+
+def _body_size(records: List[dict]) -> float:
+    """Font size covering the most characters."""
+    sizes = Counter()
+    for record in records:
+        sizes[round(record["size"] * 2) / 2] += len(record["text"])
+    return sizes.most_common(1)[0][0] if sizes else 0.0
+
+
+def section_kind(heading: str) -> Optional[str]:
+    """
+    Canonical section kind for a heading, if it is a known one.
+
+    Args:
+        heading: Heading text, e.g. "Work Experience:"
+
+    Returns:
+        Kind such as "experience", or None for an unknown heading
+    """
+    normalized = re.sub(r"[^a-z& ]", "", heading.lower()).replace("&", "and").strip()
+    return _HEADING_KINDS.get(" ".join(normalized.split()))
+
+
+def _heading_kind(record: dict, body_size: float) -> Optional[str]:
+    """Return the section kind if the line is a heading, else None."""
+    text = record["text"].strip().rstrip(":").strip()
+    if (not text or len(text) > MAX_HEADING_CHARS
+            or len(text.split()) > MAX_HEADING_WORDS or BULLET_PATTERN.match(text)):
+        return None
+    styled = (
+        record["size"] >= body_size * HEADING_SIZE_RATIO
+        or record["bold"]
+        or (text.isupper() and any(c.isalpha() for c in text))
+    )
+    if not styled:
+        # A plain body line that happens to read "Skills" is not a heading
+        return None
+    kind = section_kind(text)
+    if kind is not None:
+        return kind
+    if text.isupper() and not DATE_PATTERN.search(text):
+        return "other"
+    return None
+
+
+def _find_dates(text: str) -> List[str]:
+    return [match.group(0) for match in DATE_PATTERN.finditer(text)]
+
+
+def build_resume_document(doc, document_hash: str) -> ResumeDocument:
+    """
+    Build the section model from an open PyMuPDF document.
+
+    Args:
+        doc: Open ``fitz.Document``
+        document_hash: Content hash of the PDF bytes
+
+    Returns:
+        Sectioned resume document
+    """
+    return _document_from_records(_line_records(doc), doc.page_count, document_hash)
+
+
+def _document_from_records(
+    records: List[dict],
+    page_count: int,
+    document_hash: str
+) -> ResumeDocument:
+    """Build the section model from the document's line records, in page order."""
+    body_size = _body_size(records)
+
+    header: List[dict] = []
+    sections: List[ResumeSection] = []
+    bullet_x0 = None
+    for record in records:
+        kind = _heading_kind(record, body_size)
+        if kind == "other" and not sections:
+            # An all-caps name above the first known section is not a heading
+            kind = None
+        if kind is not None:
+            sections.append(ResumeSection(
+                kind=kind, heading=record["text"].rstrip(":"), page=record["page"]
+            ))
+            bullet_x0 = None
+            continue
+        if not sections:
+            header.append(record)
+            continue
+
+        section = sections[-1]
+        text = record["text"]
+        section.dates.extend(_find_dates(text))
+        if BULLET_PATTERN.match(text):
+            text = BULLET_PATTERN.sub("", text)
+            section.bullets.append(text)
+            section.lines.append(f"- {text}")
+            bullet_x0 = record["x0"]
+        elif bullet_x0 is not None and record["x0"] > bullet_x0 + 2:
+            # Indented continuation of a wrapped bullet
+            section.bullets[-1] = f"{section.bullets[-1]} {text}"
+            section.lines[-1] = f"{section.lines[-1]} {text}"
+        else:
+            section.lines.append(text)
+            bullet_x0 = None
+
+    return ResumeDocument(
+        content_hash=document_hash,
+        page_count=page_count,
+        contact=_contact_block(header, records),
+        sections=sections
+    )
+
+
+def _contact_block(header: List[dict], records: List[dict]) -> ContactInfo:
+    """Name and contact details from the lines above the first heading."""
+    lines = [record["text"] for record in header]
+    header_text = "\n".join(lines)
+    # Emails are often in a footer or sidebar, so search the whole document
+    all_text = "\n".join(record["text"] for record in records)
+    name = None
+    named = [
+        record for record in header
+        if not EMAIL_PATTERN.search(record["text"]) and not PHONE_PATTERN.search(record["text"])
+    ]
+    if named:
+        name = max(named, key=lambda record: record["size"])["text"]
+    return ContactInfo(
+        name=name,
+        emails=sorted(set(EMAIL_PATTERN.findall(all_text))),
+        phones=[phone.strip() for phone in PHONE_PATTERN.findall(header_text)],
+        links=LINK_PATTERN.findall(header_text),
+        lines=lines
+    )
+
+
+def _build_from_file(path: str, doc, document_hash: str) -> ResumeDocument:
+    """Build the section model, reading long documents in parallel page ranges."""
+    if not splits_pages(doc.page_count):
+        return build_resume_document(doc, document_hash)
+    parts = map_page_ranges(_page_range_records, path, doc.page_count)
+    records = [record for part in parts for record in part]
+    return _document_from_records(records, doc.page_count, document_hash)
+
+
+def _document_key(document_hash: str) -> str:
+    return content_hash("resume_layout", LAYOUT_VERSION, document_hash)
+
+
+def _check_size(size: int) -> None:
+    if size > MAX_PDF_BYTES:
+        raise ValueError(f"Failed to parse PDF: PDF is larger than {MAX_PDF_BYTES} bytes")
+
+
+def _cached_document(
+    document_hash: str,
+    cache: Optional[CacheBackend],
+    max_pages: Optional[int]
+) -> Optional[ResumeDocument]:
+    cached = cache.get(_document_key(document_hash)) if cache is not None else None
+    if not cached:
+        return None
+    document = ResumeDocument.model_validate_json(cached)
+    # A hit must pass the same page limit as a fresh parse
+    try:
+        _check_page_count(document, max_pages)
+    except ValueError as e:
+        raise ValueError(f"Failed to parse PDF: {str(e)}")
+    return document
+
+
+@SPAN_SECONDS.time(span="pdf_layout")
+def extract_resume_document(
+    pdf_bytes: bytes,
+    max_pages: Optional[int] = MAX_PDF_PAGES,
+    cache: Optional[CacheBackend] = None
+) -> ResumeDocument:
+    """
+    Extract a sectioned resume from PDF bytes, reusing the cached model for identical files.
+
+    Args:
+        pdf_bytes: PDF file as bytes
+        max_pages: Reject documents with more pages than this
+        cache: Cache of built documents (defaults to the shared stage cache)
+
+    Returns:
+        Sectioned resume document
+    """
+    _check_size(len(pdf_bytes))
+    if cache is None:
+        cache = get_stage_cache()
+    document_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    cached = _cached_document(document_hash, cache, max_pages)
+    if cached is not None:
+        return cached
+    try:
+        import fitz  # PyMuPDF, loaded on first use
+
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            _check_page_count(doc, max_pages)
+            if splits_pages(doc.page_count):
+                # Worker processes open the document from a file
+                with tempfile.TemporaryDirectory() as directory:
+                    path = os.path.join(directory, "resume.pdf")
+                    with open(path, "wb") as f:
+                        f.write(pdf_bytes)
+                    document = _build_from_file(path, doc, document_hash)
+            else:
+                document = build_resume_document(doc, document_hash)
+    except Exception as e:
+        raise ValueError(f"Failed to parse PDF: {str(e)}")
+    cache.set(_document_key(document_hash), document.model_dump_json())
+    return document
+
+
+@SPAN_SECONDS.time(span="pdf_layout")
+def extract_resume_document_file(
+    path: str,
+    max_pages: Optional[int] = MAX_PDF_PAGES,
+    cache: Optional[CacheBackend] = None
+) -> ResumeDocument:
+    """
+    Extract a sectioned resume from a PDF on disk.
+
+    Args:
+        path: PDF file path
+        max_pages: Reject documents with more pages than this
+        cache: Cache of built documents (defaults to the shared stage cache)
+
+    Returns:
+        Sectioned resume document
+    """
+    _check_size(os.path.getsize(path))
+    if cache is None:
+        cache = get_stage_cache()
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    document_hash = digest.hexdigest()
+    cached = _cached_document(document_hash, cache, max_pages)
+    if cached is not None:
+        return cached
+    try:
+        import fitz  # PyMuPDF, loaded on first use
+
+        with fitz.open(path) as doc:
+            if not doc.is_pdf:
+                raise ValueError("File is not a PDF")
+            _check_page_count(doc, max_pages)
+            document = _build_from_file(path, doc, document_hash)
+    except Exception as e:
+        raise ValueError(f"Failed to parse PDF: {str(e)}")
+    cache.set(_document_key(document_hash), document.model_dump_json())
+    return document
+
+
+async def extract_document_from_upload(upload) -> ResumeDocument:
+    """
+    Extract a sectioned resume from an uploaded PDF without blocking the event loop.
+
+    Args:
+        upload: FastAPI UploadFile
+
+    Returns:
+        Sectioned resume document
+    """
+    path = await spool_upload(upload)
+    try:
+        return await asyncio.to_thread(extract_resume_document_file, path)
+    finally:
+        os.unlink(path)
+
+
+def extract_resume(pdf_bytes: bytes) -> Tuple[str, Optional[ResumeDocument]]:
+    """
+    Extract resume text, plus the section model in layout mode.
+
+    Args:
+        pdf_bytes: PDF file as bytes
+
+    Returns:
+        (text, document) pair; document is None in text mode
+    """
+    if EXTRACT_MODE == "layout":
+        document = extract_resume_document(pdf_bytes)
+        return document_text(document), document
+    return extract_text_from_pdf(pdf_bytes), None
+
+
+async def extract_resume_from_upload(upload) -> Tuple[str, Optional[ResumeDocument]]:
+    """
+    Extract resume text from an upload, plus the section model in layout mode.
+
+    Args:
+        upload: FastAPI UploadFile
+
+    Returns:
+        (text, document) pair; document is None in text mode
+    """
+    if EXTRACT_MODE == "layout":
+        document = await extract_document_from_upload(upload)
+        return document_text(document), document
+    return await extract_text_from_upload(upload), None
+
+
+def section_text(document: ResumeDocument, kinds: Optional[Set[str]] = None) -> str:
+    """
+    Render sections of a resume as compact text for a prompt.
+
+    Args:
+        document: Sectioned resume
+        kinds: Section kinds to include ("contact" for the header block),
+            or None for everything
+
+    Returns:
+        Text with one heading line per section
+    """
+    parts = []
+    if document.contact.lines and (kinds is None or "contact" in kinds):
+        parts.append("\n".join(document.contact.lines))
+    for section in document.sections:
+        if kinds is None or section.kind in kinds:
+            parts.append("\n".join([section.heading.upper()] + section.lines))
+    return "\n\n".join(parts)
+
+
+def document_text(document: ResumeDocument) -> str:
+    """Full resume text rebuilt from the section model."""
+    return section_text(document)
+
+
+def stage_text(document: ResumeDocument, stage: str) -> str:
+    """
+    Text of the sections a pipeline stage needs.
+
+    Falls back to the whole document when none of the stage's sections
+    were detected, so an unrecognized layout never starves a stage.
+
+    Args:
+        document: Sectioned resume
+        stage: Stage name, a key of ``STAGE_SECTIONS``
+
+    Returns:
+        Prompt text for the stage
+    """
+    kinds = STAGE_SECTIONS.get(stage)
+    if kinds is None or not any(section.kind in kinds for section in document.sections):
+        return document_text(document)
+    return section_text(document, kinds)
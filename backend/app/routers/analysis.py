@@ -1,24 +1,56 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException, Request
+from fastapi.responses import Response
 from sse_starlette.sse import EventSourceResponse
 from app.models import AnalysisResult, AgentUpdate
-from app.services.analysis_service import AnalysisService
-from app.pdf_parser import extract_text_from_pdf
-from app.job_scraper import scrape_job_posting
-import asyncio
-import json
-from typing import AsyncGenerator
+from app.services.analysis_service import ANALYSIS_MODES, DEFAULT_ANALYSIS_MODE, AnalysisService
+from app.services.worker_pool import PoolSaturatedError, get_worker_pool
+from app.resume_layout import extract_resume_from_upload
+from app.job_scraper import fetch_job_posting
+from app.metrics import SSE_EVENTS, SSE_STREAMS
+from app.rate_limit import client_identity, get_client_quota, get_rate_limiter
+from app.job_store import SSE_PING_INTERVAL, follow, get_job_store, start_job
+from app.warmup import WARMUP_ON_STARTUP, get_warmup
+from typing import AsyncGenerator, Optional
+import uuid
+
+
+def check_client_quota(request: Request, api_key: Optional[str], analyses: int = 1) -> None:
+    """
+    Count the analyses a request starts against its client's quota.
+
+    Args:
+        request: Incoming request, for the client address
+        api_key: ``X-API-Key`` header, used if it is one of CLIENT_API_KEYS
+        analyses: Analyses the request starts
+
+    Raises:
+        HTTPException: 429 with Retry-After if the client is over its quota
+    """
+    client_id = client_identity(
+        api_key,
+        request.client.host if request.client else None,
+        request.headers.get("x-forwarded-for")
+    )
+    retry_after = get_client_quota().check(client_id, analyses)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many analyses started, please retry later",
+            headers={"Retry-After": str(retry_after)}
+        )
+
 
 router = APIRouter(prefix="/api", tags=["analysis"])
 
-# Store for SSE connections
-active_analyses = {}
 
 @router.post("/analyze", response_model=dict)
 async def analyze_resume(
+    request: Request,
     resume: UploadFile = File(...),
     job_url: str = Form(None),
-    job_description: str = Form(None)
+    job_description: str = Form(None),
+    mode: str = Form(None),
+    x_api_key: Optional[str] = Header(None)
 ):
     """
     Analyze resume against job posting.
@@ -27,22 +59,38 @@ async def analyze_resume(
         resume: PDF resume file
         job_url: Job posting URL (optional if job_description provided)
         job_description: Direct job description text (optional if job_url provided)
+        mode: "fast" (local heuristics only), "standard" (one LLM call) or
+            "deep" (full agent crew); defaults to ANALYSIS_MODE
+        x_api_key: Identifies the client for its quota if it is one of
+            CLIENT_API_KEYS; the client's address is used otherwise
 
     Returns:
         Analysis ID for tracking progress
     """
     try:
+        # Per-client quota, checked before any work is done for the request
+        check_client_quota(request, x_api_key)
+
         # Validate that either job_url or job_description is provided
         if not job_url and not job_description:
             raise HTTPException(status_code=400, detail="Either job_url or job_description is required")
 
+        mode = mode or DEFAULT_ANALYSIS_MODE
+        if mode not in ANALYSIS_MODES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"mode must be one of: {', '.join(ANALYSIS_MODES)}"
+            )
+
         # Validate file type
         if not resume.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
-        # Read PDF
-        pdf_bytes = await resume.read()
-        resume_text = extract_text_from_pdf(pdf_bytes)
+        # Spool the PDF to disk and extract it off the event loop
+        try:
+            resume_text, resume_document = await extract_resume_from_upload(resume)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         if not resume_text or len(resume_text) < 50:
             raise HTTPException(status_code=400, detail="Could not extract text from PDF")
@@ -52,34 +100,63 @@ async def analyze_resume(
             job_desc = job_description
         else:
             try:
-                job_desc = scrape_job_posting(job_url)
+                job_desc = await fetch_job_posting(job_url)
             except Exception as e:
                 raise HTTPException(status_code=400, detail=f"Could not scrape job URL: {str(e)}")
 
-        # Create analysis service
-        updates_queue = asyncio.Queue()
+        # Updates go to the job store, so any worker process can stream them
+        store = get_job_store()
+        analysis_id = str(uuid.uuid4())
 
-        async def progress_callback(agent: str, status: str, message: str, progress: int):
-            await updates_queue.put(AgentUpdate(
+        async def progress_callback(agent: str, status: str, message: str, progress: int, **details):
+            update = AgentUpdate(
                 agent_name=agent,
                 status=status,
                 message=message,
-                progress=progress
-            ))
+                progress=progress,
+                **details
+            )
+            await store.call(store.append_event, analysis_id, "update", update.model_dump_json())
 
-        service = AnalysisService(progress_callback=progress_callback)
+        async def result_callback(result: AnalysisResult):
+            # Local scores arrive first and are refined by the final result
+            await store.call(store.append_event, analysis_id, "preliminary", result.model_dump_json())
 
-        # Start analysis in background
-        analysis_task = asyncio.create_task(
-            service.analyze_resume(resume_text, job_desc)
+        service = AnalysisService(
+            progress_callback=progress_callback, result_callback=result_callback
         )
 
-        # Get analysis ID from service
-        analysis_id = "temp_id"  # Will be generated by service
-        active_analyses[analysis_id] = {
-            "task": analysis_task,
-            "updates": updates_queue
-        }
+        # Identical resume/job pairs are answered from the result cache
+        # without touching the worker pool
+        cached = service.get_cached_result(resume_text, job_desc, mode, analysis_id)
+        if cached is not None:
+            await store.call(store.create, analysis_id, "analysis")
+            await store.call(store.finish, analysis_id, cached.model_dump_json())
+            return {"analysis_id": analysis_id, "status": "completed"}
+
+        # Admission control: reject instead of queueing without bound.
+        # Fast mode never uses the LLM workers, so it is always admitted.
+        reservation = None
+        if mode != "fast":
+            try:
+                reservation = service.worker_pool.reserve()
+            except PoolSaturatedError as e:
+                raise HTTPException(
+                    status_code=503,
+                    detail=str(e),
+                    headers={"Retry-After": str(e.retry_after)}
+                )
+
+        # Start analysis in background
+        try:
+            await start_job(store, analysis_id, "analysis", service.analyze_resume(
+                resume_text, job_desc, reservation=reservation,
+                resume_document=resume_document, mode=mode, analysis_id=analysis_id
+            ))
+        except Exception:
+            if reservation is not None:
+                reservation.release()
+            raise
 
         return {"analysis_id": analysis_id, "status": "started"}
 
@@ -90,55 +167,96 @@ async def analyze_resume(
 
 
 @router.get("/analysis/{analysis_id}/stream")
-async def stream_analysis_updates(analysis_id: str):
+async def stream_analysis_updates(
+    analysis_id: str,
+    last_event_id: int = 0,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
     """
     Stream real-time updates for an analysis.
 
     Args:
         analysis_id: Analysis identifier
+        last_event_id: Replay events after this id (for clients that
+            cannot set headers)
+        last_event_id_header: ``Last-Event-ID`` sent by a reconnecting
+            EventSource; takes precedence over the query parameter
 
     Returns:
         Server-Sent Events stream
     """
-    if analysis_id not in active_analyses:
+    store = get_job_store()
+    record = await store.call(store.get, analysis_id)
+    if record is None:
         raise HTTPException(status_code=404, detail="Analysis not found")
 
-    async def event_generator() -> AsyncGenerator:
-        updates_queue = active_analyses[analysis_id]["updates"]
-        task = active_analyses[analysis_id]["task"]
+    # Browsers resend the last id they saw when they reconnect
+    after = last_event_id
+    if last_event_id_header and last_event_id_header.isdigit():
+        after = int(last_event_id_header)
 
-        while not task.done():
-            try:
-                # Wait for update with timeout
-                update = await asyncio.wait_for(updates_queue.get(), timeout=1.0)
-                yield {
-                    "event": "update",
-                    "data": update.model_dump_json()
-                }
-            except asyncio.TimeoutError:
-                # Send keepalive
-                yield {"event": "ping", "data": ""}
-
-        # Send final result
+    # 204 tells a reconnecting EventSource that the stream is over
+    if record.status != "running" and not await store.call(store.events, analysis_id, after):
+        return Response(status_code=204)
+
+    async def event_generator() -> AsyncGenerator:
+        SSE_STREAMS.inc(stream="analysis")
         try:
-            result = await task
-            yield {
-                "event": "complete",
-                "data": result.model_dump_json()
-            }
-        except Exception as e:
-            yield {
-                "event": "error",
-                "data": json.dumps({"error": str(e)})
-            }
+            async for seq, event, data in follow(store, analysis_id, after):
+                message = {"event": event, "data": data}
+                if seq:
+                    message["id"] = str(seq)
+                SSE_EVENTS.inc(stream="analysis", event=event)
+                yield message
         finally:
-            # Cleanup
-            del active_analyses[analysis_id]
+            SSE_STREAMS.dec(stream="analysis")
+
+    return EventSourceResponse(event_generator(), ping=SSE_PING_INTERVAL)
 
-    return EventSourceResponse(event_generator())
+
+@router.get("/analysis/{analysis_id}")
+async def get_analysis(analysis_id: str):
+    """
+    Fetch an analysis's status, and its result once finished.
+
+    Args:
+        analysis_id: Analysis identifier
+
+    Returns:
+        Job status with the result or error
+    """
+    store = get_job_store()
+    record = await store.call(store.get, analysis_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return record.to_dict()
 
 
 @router.get("/health")
 async def health():
     """Health check endpoint."""
     return {"status": "healthy", "service": "AI Resume Analyzer"}
+
+
+@router.get("/ready")
+async def ready(response: Response):
+    """
+    Readiness check: 503 until the startup warm-up has finished.
+
+    A failed warm-up is reported with its error but still answers 200:
+    the engines then load on first use, as they do without a startup
+    warm-up, when the instance is reported ready straight away.
+    """
+    warmup = get_warmup()
+    status = warmup.to_dict()
+    if not WARMUP_ON_STARTUP and warmup.status == "pending":
+        status["status"] = "lazy"
+    elif not warmup.finished:
+        response.status_code = 503
+    return status
+
+
+@router.get("/queue")
+async def queue_stats():
+    """Worker pool queue depth, in-flight jobs and wait times, plus the LLM rate limiter."""
+    return {**get_worker_pool().stats(), "llm": get_rate_limiter().stats()}
@@ -0,0 +1,353 @@
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException, Request
+from fastapi.responses import Response
+from sse_starlette.sse import EventSourceResponse
+from app.models import BatchProgress
+from app.routers.analysis import check_client_quota
+from app.services.batch_service import BatchService
+from app.services.worker_pool import PoolSaturatedError, get_worker_pool
+from app.job_scraper import fetch_job_posting
+from app.resume_layout import extract_resume_from_upload
+from app.pdf_parser import MAX_PDF_BYTES, UPLOAD_CHUNK_SIZE
+from app.metrics import SSE_EVENTS, SSE_STREAMS
+from app.job_store import SSE_PING_INTERVAL, follow, get_job_store, start_job
+from io import BytesIO
+from typing import AsyncGenerator, List, Optional, Tuple
+import os
+import uuid
+import zipfile
+
+router = APIRouter(prefix="/api/batch", tags=["batch"])
+
+MAX_BATCH_FILES = int(os.getenv("BATCH_MAX_FILES", "100"))
+MAX_BATCH_JOBS = int(os.getenv("BATCH_MAX_JOBS", "50"))
+# Total size of a batch's resumes, uploaded or unpacked from zips
+MAX_BATCH_BYTES = int(os.getenv("BATCH_MAX_BYTES", str(100 * 1024 * 1024)))
+
+
+class _UploadBudget:
+    """Resumes and bytes a batch may still take; raises as soon as either runs out."""
+
+    def __init__(self, max_files: int, max_bytes: int):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.files = 0
+        self.bytes = 0
+
+    def add_file(self) -> None:
+        self.files += 1
+        if self.files > self.max_files:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many resumes: more than {self.max_files}"
+            )
+
+    def add_bytes(self, size: int) -> None:
+        self.bytes += size
+        if self.bytes > self.max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch larger than {self.max_bytes} bytes"
+            )
+
+
+async def _read_upload(upload: UploadFile, max_bytes: int, budget: _UploadBudget) -> bytes:
+    """Read an upload in chunks, stopping once it is larger than ``max_bytes``."""
+    chunks = []
+    size = 0
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"{upload.filename} is larger than {max_bytes} bytes"
+            )
+        budget.add_bytes(len(chunk))
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _pdfs_from_zip(data: bytes, budget: _UploadBudget) -> List[Tuple[str, bytes]]:
+    """
+    Extract PDF members from a zip archive, ignoring everything else.
+
+    Member sizes are checked before anything is decompressed, and reads
+    are bounded, so a zip bomb is rejected without being unpacked.
+
+    Args:
+        data: Zip archive bytes
+        budget: Resumes and bytes the batch may still take
+
+    Returns:
+        (filename, PDF bytes) pairs
+    """
+    try:
+        archive = zipfile.ZipFile(BytesIO(data))
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Invalid zip archive")
+
+    pdfs = []
+    with archive:
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            if info.is_dir() or not name.lower().endswith('.pdf') or name.startswith('.'):
+                continue
+            budget.add_file()
+            if info.file_size > MAX_PDF_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"{name} is larger than {MAX_PDF_BYTES} bytes"
+                )
+            budget.add_bytes(info.file_size)
+            try:
+                with archive.open(info) as member:
+                    pdf = member.read(MAX_PDF_BYTES + 1)
+            except (zipfile.BadZipFile, NotImplementedError, RuntimeError) as e:
+                raise HTTPException(status_code=400, detail=f"Cannot unpack {name}: {e}")
+            pdfs.append((name, pdf))
+    return pdfs
+
+
+async def read_uploads(
+    resumes: List[UploadFile],
+    limit: int = MAX_BATCH_FILES,
+    max_bytes: int = MAX_BATCH_BYTES
+) -> List[Tuple[str, bytes]]:
+    """
+    Read uploaded PDFs and zip archives into (filename, bytes) pairs.
+
+    Args:
+        resumes: PDF uploads and/or zip archives of PDFs
+        limit: Most resumes accepted
+        max_bytes: Most bytes of resumes accepted, after unpacking zips
+
+    Returns:
+        (filename, PDF bytes) pairs
+
+    Raises:
+        HTTPException: 400 for bad or too many files, 413 for oversized ones
+    """
+    budget = _UploadBudget(limit, max_bytes)
+    files = []
+    for upload in resumes:
+        filename = upload.filename or "resume.pdf"
+        if filename.lower().endswith('.zip'):
+            # The archive only counts against the batch once unpacked
+            data = await _read_upload(upload, max_bytes, _UploadBudget(0, max_bytes))
+            files.extend(_pdfs_from_zip(data, budget))
+        elif filename.lower().endswith('.pdf'):
+            budget.add_file()
+            files.append((filename, await _read_upload(upload, MAX_PDF_BYTES, budget)))
+        else:
+            raise HTTPException(status_code=400, detail=f"Unsupported file: {filename}")
+
+    if not files:
+        raise HTTPException(status_code=400, detail="No PDF resumes provided")
+    return files
+
+
+@router.post("/analyze", response_model=dict)
+async def analyze_batch(
+    request: Request,
+    resumes: List[UploadFile] = File(...),
+    job_url: str = Form(None),
+    job_description: str = Form(None),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Rank many resumes against one job posting.
+
+    Every resume counts as one analysis against the client's quota.
+
+    Args:
+        resumes: PDF resumes and/or zip archives of PDFs
+        job_url: Job posting URL (optional if job_description provided)
+        job_description: Direct job description text (optional if job_url provided)
+        x_api_key: Identifies the client for its quota, as for /api/analyze
+
+    Returns:
+        Batch ID for tracking progress
+    """
+    if not job_url and not job_description:
+        raise HTTPException(status_code=400, detail="Either job_url or job_description is required")
+
+    files = await read_uploads(resumes)
+    check_client_quota(request, x_api_key, len(files))
+
+    if job_description:
+        job_desc = job_description
+    else:
+        try:
+            job_desc = await fetch_job_posting(job_url)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Could not scrape job URL: {str(e)}")
+
+    store = get_job_store()
+    batch_id = str(uuid.uuid4())
+
+    async def progress_callback(update: BatchProgress):
+        await store.call(store.append_event, batch_id, "progress", update.model_dump_json())
+
+    service = BatchService(progress_callback=progress_callback, batch_id=batch_id)
+
+    try:
+        reservation = get_worker_pool().reserve()
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    try:
+        await start_job(store, batch_id, "batch", service.rank_resumes(files, job_desc, reservation=reservation))
+    except Exception:
+        reservation.release()
+        raise
+
+    return {"batch_id": batch_id, "status": "started", "total": len(files)}
+
+
+@router.post("/match", response_model=dict)
+async def match_jobs(
+    request: Request,
+    resume: UploadFile = File(...),
+    job_urls: List[str] = Form(None),
+    job_descriptions: List[str] = Form(None),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Compare one resume against many job postings.
+
+    Every posting counts as one analysis against the client's quota.
+
+    Args:
+        resume: PDF resume file
+        job_urls: Job posting URLs (repeat the field for each posting)
+        job_descriptions: Job description texts (repeat the field for each posting)
+        x_api_key: Identifies the client for its quota, as for /api/analyze
+
+    Returns:
+        Batch ID for tracking progress
+    """
+    job_urls = [url for url in (job_urls or []) if url]
+    job_descriptions = [text for text in (job_descriptions or []) if text]
+    total = len(job_urls) + len(job_descriptions)
+    if not total:
+        raise HTTPException(status_code=400, detail="At least one job URL or description is required")
+    if total > MAX_BATCH_JOBS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many job postings: {total} (limit {MAX_BATCH_JOBS})"
+        )
+    check_client_quota(request, x_api_key, total)
+
+    if not resume.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+
+    try:
+        resume_text, resume_document = await extract_resume_from_upload(resume)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not resume_text or len(resume_text) < 50:
+        raise HTTPException(status_code=400, detail="Could not extract text from PDF")
+
+    store = get_job_store()
+    batch_id = str(uuid.uuid4())
+
+    async def progress_callback(update: BatchProgress):
+        await store.call(store.append_event, batch_id, "progress", update.model_dump_json())
+
+    service = BatchService(progress_callback=progress_callback, batch_id=batch_id)
+
+    try:
+        reservation = get_worker_pool().reserve()
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    try:
+        await start_job(store, batch_id, "batch", service.compare_jobs(
+            resume_text, job_urls, job_descriptions,
+            reservation=reservation, resume_document=resume_document
+        ))
+    except Exception:
+        reservation.release()
+        raise
+
+    return {"batch_id": batch_id, "status": "started", "total": total}
+
+
+@router.get("/{batch_id}/stream")
+async def stream_batch_updates(
+    batch_id: str,
+    last_event_id: int = 0,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Stream per-item progress for a batch, then the ranked result or comparison table.
+
+    Args:
+        batch_id: Batch identifier
+        last_event_id: Replay events after this id (for clients that
+            cannot set headers)
+        last_event_id_header: ``Last-Event-ID`` sent by a reconnecting
+            EventSource; takes precedence over the query parameter
+
+    Returns:
+        Server-Sent Events stream
+    """
+    store = get_job_store()
+    record = await store.call(store.get, batch_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    # Browsers resend the last id they saw when they reconnect
+    after = last_event_id
+    if last_event_id_header and last_event_id_header.isdigit():
+        after = int(last_event_id_header)
+
+    # 204 tells a reconnecting EventSource that the stream is over
+    if record.status != "running" and not await store.call(store.events, batch_id, after):
+        return Response(status_code=204)
+
+    async def event_generator() -> AsyncGenerator:
+        SSE_STREAMS.inc(stream="batch")
+        try:
+            async for seq, event, data in follow(store, batch_id, after):
+                message = {"event": event, "data": data}
+                if seq:
+                    message["id"] = str(seq)
+                SSE_EVENTS.inc(stream="batch", event=event)
+                yield message
+        finally:
+            SSE_STREAMS.dec(stream="batch")
+
+    return EventSourceResponse(event_generator(), ping=SSE_PING_INTERVAL)
+
+
+@router.get("/{batch_id}")
+async def get_batch_result(batch_id: str):
+    """
+    Fetch a batch's ranked result once it has finished.
+
+    Args:
+        batch_id: Batch identifier
+
+    Returns:
+        Ranked batch result, or the current status while running
+    """
+    store = get_job_store()
+    record = await store.call(store.get, batch_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    if record.status == "running":
+        return {"batch_id": batch_id, "status": "running"}
+    if record.status == "error":
+        raise HTTPException(status_code=500, detail=record.error)
+    return record.to_dict()["result"]
@@ -0,0 +1,147 @@
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException, Request
+from app.models import BatchProgress
+from app.resume_index import get_resume_index
+from app.resume_layout import extract_resume
+from app.routers.analysis import check_client_quota
+from app.routers.batch import MAX_BATCH_FILES, read_uploads
+from app.services.batch_service import BatchService
+from app.services.worker_pool import PoolSaturatedError, get_worker_pool
+from app.job_scraper import fetch_job_posting
+from app.job_store import get_job_store, start_job
+from typing import List, Optional
+import asyncio
+import os
+import uuid
+
+router = APIRouter(prefix="/api/resumes", tags=["resumes"])
+
+MAX_INDEX_FILES = int(os.getenv("RESUME_INDEX_MAX_FILES", "1000"))
+MAX_INDEX_BYTES = int(os.getenv("RESUME_INDEX_MAX_BYTES", str(200 * 1024 * 1024)))
+DEFAULT_TOP_K = int(os.getenv("RESUME_SEARCH_TOP_K", "20"))
+MAX_TOP_K = int(os.getenv("RESUME_SEARCH_MAX_TOP_K", "500"))
+
+
+@router.post("", response_model=dict)
+async def index_resumes(resumes: List[UploadFile] = File(...)):
+    """
+    Add resumes to the searchable resume index.
+
+    Args:
+        resumes: PDF resumes and/or zip archives of PDFs
+
+    Returns:
+        Stored resumes, duplicates of indexed ones and files that failed
+    """
+    files = await read_uploads(resumes, limit=MAX_INDEX_FILES, max_bytes=MAX_INDEX_BYTES)
+    extracted = await asyncio.gather(
+        *(asyncio.to_thread(extract_resume, pdf_bytes) for _, pdf_bytes in files),
+        return_exceptions=True
+    )
+
+    usable, failed = [], []
+    for (filename, _), extraction in zip(files, extracted):
+        if isinstance(extraction, Exception):
+            failed.append({"label": filename, "error": str(extraction)})
+        elif not extraction[0] or len(extraction[0]) < 50:
+            failed.append({"label": filename, "error": "Could not extract text from PDF"})
+        else:
+            usable.append((filename, *extraction))
+
+    index = get_resume_index()
+    stored = await asyncio.to_thread(index.add_many, usable)
+    return {
+        "added": sum(1 for entry in stored if not entry.duplicate),
+        "duplicates": sum(1 for entry in stored if entry.duplicate),
+        "failed": failed,
+        "resumes": [entry.model_dump() for entry in stored],
+        "total": len(index),
+    }
+
+
+@router.post("/search", response_model=dict)
+async def search_resumes(
+    request: Request,
+    job_url: str = Form(None),
+    job_description: str = Form(None),
+    top_k: int = Form(DEFAULT_TOP_K),
+    analyze_top: int = Form(0),
+    x_api_key: Optional[str] = Header(None)
+):
+    """
+    Find the indexed resumes closest to a job posting.
+
+    Every indexed resume is scored with one vector product; only the best
+    ``analyze_top`` are then sent through the full agent analysis, as a
+    batch whose ranked result streams from ``/api/batch/{id}/stream``.
+
+    Args:
+        job_url: Job posting URL (optional if job_description provided)
+        job_description: Direct job description text (optional if job_url provided)
+        top_k: Number of candidates to return
+        analyze_top: How many of the best candidates to analyze in full (0 for
+            none); each counts as one analysis against the client's quota
+        x_api_key: Identifies the client for its quota, as for /api/analyze
+
+    Returns:
+        Ranked candidates, plus a batch ID when a full analysis was started
+    """
+    if not job_url and not job_description:
+        raise HTTPException(status_code=400, detail="Either job_url or job_description is required")
+    if not 1 <= top_k <= MAX_TOP_K:
+        raise HTTPException(status_code=400, detail=f"top_k must be between 1 and {MAX_TOP_K}")
+    if not 0 <= analyze_top <= min(top_k, MAX_BATCH_FILES):
+        raise HTTPException(
+            status_code=400,
+            detail=f"analyze_top must be between 0 and {min(top_k, MAX_BATCH_FILES)}"
+        )
+    if analyze_top:
+        check_client_quota(request, x_api_key, analyze_top)
+
+    if job_description:
+        job_desc = job_description
+    else:
+        try:
+            job_desc = await fetch_job_posting(job_url)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Could not scrape job URL: {str(e)}")
+
+    index = get_resume_index()
+    hits = await asyncio.to_thread(index.search, job_desc, top_k)
+    response = {"total_indexed": len(index), "hits": [hit.model_dump() for hit in hits]}
+
+    shortlist = [hit.resume_id for hit in hits[:analyze_top]]
+    if not shortlist:
+        return response
+    candidates = await asyncio.to_thread(index.resumes, shortlist)
+
+    try:
+        reservation = get_worker_pool().reserve()
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    store = get_job_store()
+    batch_id = str(uuid.uuid4())
+
+    async def progress_callback(update: BatchProgress):
+        await store.call(store.append_event, batch_id, "progress", update.model_dump_json())
+
+    service = BatchService(progress_callback=progress_callback, batch_id=batch_id)
+    try:
+        await start_job(store, batch_id, "batch", service.rank_texts(
+            candidates, job_desc, reservation=reservation
+        ))
+    except Exception:
+        reservation.release()
+        raise
+    response["batch_id"] = batch_id
+    return response
+
+
+@router.get("/stats")
+async def index_stats():
+    """Number of indexed resumes and the size of the vector matrix."""
+    return get_resume_index().stats()
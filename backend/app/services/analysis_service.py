@@ -1,57 +1,437 @@
-from crewai import Task, Crew
 from app.agents.crew_config import (
+    AGENT_VERSION,
+    CLAUDE_MODEL,
+    LLM_BACKEND,
     create_resume_parser_agent,
     create_job_analyst_agent,
     create_quality_scorer_agent,
     create_match_analyzer_agent
 )
-from app.models import AnalysisResult, KeywordAnalysis, MatchAnalysis, QualityFeedback
-from typing import Callable, Optional
+from app.json_extract import JSONExtractionError, extract_json, extract_model
+from app.models import (
+    AnalysisResult, JobStageOutput, KeywordAnalysis, MatchAnalysis, MatchStageOutput,
+    QualityFeedback, QualityStageOutput, ResumeDocument, ResumeParseStageOutput
+)
+from app.heuristics import local_quality_output
+from app.keywords import KeywordMatch, local_match_output, match_keywords
+from app.prompt_builder import PromptBuilder
+from app.rate_limit import INTERACTIVE, in_lane
+from app.metrics import ANALYSES, ANALYSES_IN_FLIGHT, ANALYSIS_SECONDS, STAGE_SECONDS
+from app.cache import CacheBackend, content_hash, get_result_cache, get_stage_cache, normalize_text
+from app.services.progress import ProgressReporter, current_monitor, stage_monitor
+from app.services.stage_graph import StageGraph, StageRun
+from app.services.structured_analysis import (
+    EngineResult,
+    StructuredAnalysisEngine,
+    get_structured_engine
+)
+from app.services.worker_pool import CrewWorkerPool, Reservation, get_worker_pool
+from functools import partial
+from pydantic import BaseModel, ValidationError
+from typing import Callable, Optional, Type
+import asyncio
+import os
+import time
 import uuid
 import json
 
+ANALYSIS_MODES = ("fast", "standard", "deep")
+DEFAULT_ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "standard")
+
+# Bump whenever AnalysisResult changes shape, so results cached by an
+# older release are not served
+RESULT_SCHEMA_VERSION = "1"
+
 class AnalysisService:
     """Service for orchestrating resume analysis with AI agents."""
 
-    def __init__(self, progress_callback: Optional[Callable] = None):
+    def __init__(
+        self,
+        progress_callback: Optional[Callable] = None,
+        worker_pool: Optional[CrewWorkerPool] = None,
+        result_cache: Optional[CacheBackend] = None,
+        stage_cache: Optional[CacheBackend] = None,
+        result_callback: Optional[Callable] = None,
+        structured_engine: Optional[StructuredAnalysisEngine] = None,
+        lane: str = INTERACTIVE
+    ):
         """
         Initialize analysis service.
 
         Args:
             progress_callback: Optional callback for progress updates
+            worker_pool: Pool that runs the blocking crew (defaults to the shared pool)
+            result_cache: Cache of finished results (defaults to the shared cache)
+            stage_cache: Cache of parsed resume/job stage outputs (defaults to the shared cache)
+            result_callback: Optional async callback receiving the preliminary
+                local result before the LLM stages finish
+            structured_engine: Engine for the single-call "standard" mode
+            lane: Rate limiter lane of this service's LLM calls; batch work
+                uses "batch" so interactive analyses go first
         """
         self.progress_callback = progress_callback
+        self.worker_pool = worker_pool or get_worker_pool()
+        self.result_cache = result_cache or get_result_cache()
+        self.stage_cache = stage_cache or get_stage_cache()
+        self.result_callback = result_callback
+        self.structured_engine = structured_engine or get_structured_engine()
+        self.lane = lane
+
+    @staticmethod
+    def cache_key(resume_text: str, job_description: str, mode: str = "deep") -> str:
+        """
+        Build the result cache key for a resume/job pairing.
+
+        Args:
+            resume_text: Extracted resume text
+            job_description: Job posting text
+            mode: Analysis mode that produced the result
+
+        Returns:
+            Content hash of both texts, the mode, the agent/prompt and
+            result schema versions and the LLM backend (so fake outputs are
+            never served to real runs)
+        """
+        return content_hash(
+            "analysis", AGENT_VERSION, RESULT_SCHEMA_VERSION, LLM_BACKEND, CLAUDE_MODEL, mode,
+            normalize_text(resume_text), normalize_text(job_description)
+        )
+
+    def get_cached_result(
+        self,
+        resume_text: str,
+        job_description: str,
+        mode: str = "deep",
+        analysis_id: Optional[str] = None
+    ) -> Optional[AnalysisResult]:
+        """
+        Look up a previous analysis of the same resume and job.
+
+        Args:
+            resume_text: Extracted resume text
+            job_description: Job posting text
+            mode: Analysis mode
+            analysis_id: Identifier for the result (generated if omitted)
+
+        Returns:
+            Cached result under the new analysis ID, or None on a miss
+        """
+        key = self.cache_key(resume_text, job_description, mode)
+        cached = self.result_cache.get(key)
+        if cached is None:
+            return None
+        try:
+            result = AnalysisResult.model_validate_json(cached)
+        except ValidationError:
+            # Written in a shape this release no longer reads; treat as a miss
+            self.result_cache.delete(key)
+            return None
+        result.analysis_id = analysis_id or str(uuid.uuid4())
+        result.stage_timings = {}
+        result.agent_logs.append("Served from result cache")
+        return result
 
     async def analyze_resume(
         self,
         resume_text: str,
-        job_description: str
+        job_description: str,
+        reservation: Optional[Reservation] = None,
+        parsed_job: Optional[str] = None,
+        resume_document: Optional[ResumeDocument] = None,
+        mode: str = "deep",
+        analysis_id: Optional[str] = None
     ) -> AnalysisResult:
         """
         Analyze resume against job description using AI agents.
 
+        Every mode first scores the resume locally. In "standard" and "deep"
+        mode that result is passed to ``result_callback`` as a preliminary
+        answer while the LLM stages run.
+
         Args:
             resume_text: Extracted resume text
             job_description: Job posting text
+            reservation: Worker pool place taken at admission time, if any;
+                released when the analysis ends, however it ends
+            parsed_job: Output of ``analyze_job`` when the caller already has it
+            resume_document: Sectioned resume, used to send each stage only
+                the sections it needs
+            mode: "fast" (heuristics and keywords only), "standard" (one
+                merged LLM call) or "deep" (the full agent pipeline)
+            analysis_id: Identifier for the result (generated if omitted)
 
         Returns:
             Complete analysis result
+
+        Raises:
+            ValueError: If the mode is unknown
         """
-        analysis_id = str(uuid.uuid4())
+        if mode not in ANALYSIS_MODES:
+            if reservation is not None:
+                reservation.release()
+            raise ValueError(f"Unknown analysis mode: {mode}")
+
+        try:
+            cached = self.get_cached_result(resume_text, job_description, mode, analysis_id)
+            if cached is not None:
+                ANALYSES.inc(mode=mode, outcome="cached")
+                return cached
+
+            ANALYSES_IN_FLIGHT.inc(mode=mode)
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                analysis = await self._run_analysis(
+                    resume_text, job_description, reservation, parsed_job,
+                    resume_document, mode, analysis_id or str(uuid.uuid4())
+                )
+                outcome = "completed"
+                return analysis
+            finally:
+                ANALYSES_IN_FLIGHT.dec(mode=mode)
+                ANALYSES.inc(mode=mode, outcome=outcome)
+                ANALYSIS_SECONDS.observe(time.perf_counter() - started, mode=mode)
+        finally:
+            # Whatever fails before the stages run must not strand the place
+            if reservation is not None:
+                reservation.release()
+
+    async def _run_analysis(
+        self,
+        resume_text: str,
+        job_description: str,
+        reservation: Optional[Reservation],
+        parsed_job: Optional[str],
+        resume_document: Optional[ResumeDocument],
+        mode: str,
+        analysis_id: str
+    ) -> AnalysisResult:
+        """
+        Run the local pass and the mode's LLM stages; see ``analyze_resume``.
+
+        The caller releases ``reservation``; the LLM stages hold their own
+        share of it, or a place of their own if there is none.
+        """
+
+        # The local pass takes milliseconds, so it runs on a plain thread
+        # rather than waiting behind LLM work for a pool worker
+        local_graph = self.build_stage_graph(
+            resume_text, job_description, resume_document=resume_document, mode="fast"
+        )
+        local = await local_graph.run(asyncio.to_thread)
+        keywords: KeywordMatch = local.outputs["keywords"]
+
+        if mode == "fast":
+            run = local
+        else:
+            if self.result_callback:
+                await self.result_callback(self._build_result(analysis_id, local, keywords, "fast"))
 
-        # Create agents
-        resume_parser = create_resume_parser_agent()
-        job_analyst = create_job_analyst_agent()
-        quality_scorer = create_quality_scorer_agent()
-        match_analyzer = create_match_analyzer_agent()
+            # Every LLM stage blocks, so each one runs on the pool, all
+            # under the analysis's one reservation: the pool counts
+            # analyses, not stages, against its queue limit
+            if reservation is None:
+                reservation = self.worker_pool.reserve(check=False)
+            else:
+                reservation = reservation.share()
 
-        # Task 1: Parse Resume
+            def run_stage(fn: Callable, *args):
+                return self.worker_pool.run(
+                    in_lane, self.lane, fn, *args, reservation=reservation, lane=self.lane
+                )
+
+            try:
+                prompts = PromptBuilder()
+                graph = self.build_stage_graph(
+                    resume_text, job_description, parsed_job, resume_document, mode, keywords,
+                    prompts=prompts
+                )
+                # Stages report themselves as they actually start and finish;
+                # without a listener they still track their token usage
+                reporter = None
+                if self.progress_callback:
+                    reporter = ProgressReporter(self.progress_callback, graph.order())
+                run = await graph.run(
+                    run_stage,
+                    on_stage_done=reporter.stage_done if reporter else None,
+                    stage_context=reporter.stage_context if reporter else stage_monitor
+                )
+            finally:
+                reservation.release()
+            run.timings["keywords"] = local.timings["keywords"]
+
+        for stage, seconds in run.timings.items():
+            STAGE_SECONDS.observe(seconds, stage=stage, mode=mode)
+        analysis = self._build_result(analysis_id, run, keywords, mode)
+        if mode != "fast":
+            analysis.prompt_stats = prompts.stats
+            analysis.agent_logs.append(prompts.summary())
         if self.progress_callback:
-            await self.progress_callback("Resume Parser Agent", "working",
-                                        "Extracting resume structure and content...", 25)
+            await self.progress_callback("Analysis Complete", "completed",
+                                        "All agents finished successfully!", 100)
+        self.result_cache.set(
+            self.cache_key(resume_text, job_description, mode), analysis.model_dump_json()
+        )
+        return analysis
+
+    def build_stage_graph(
+        self,
+        resume_text: str,
+        job_description: str,
+        parsed_job: Optional[str] = None,
+        resume_document: Optional[ResumeDocument] = None,
+        mode: str = "deep",
+        keywords: Optional[KeywordMatch] = None,
+        prompts: Optional[PromptBuilder] = None
+    ) -> StageGraph:
+        """
+        Build the stage dependency graph for one analysis.
+
+        In "deep" mode resume parsing, job analysis and quality scoring are
+        independent and run concurrently; the match stage starts once both
+        parses are done.
+
+        Args:
+            resume_text: Extracted resume text
+            job_description: Job posting text
+            parsed_job: Job analysis output to use instead of running the stage
+            resume_document: Sectioned resume, if layout extraction was used
+            mode: "fast", "standard" or "deep"
+            keywords: Keyword match computed earlier; in "fast" mode it is
+                computed by the graph's "keywords" stage
+            prompts: Builder that fits LLM stage inputs to their token
+                budgets and records the savings
+
+        Returns:
+            Graph whose "quality" and "match" (or merged "analysis") outputs
+            feed the result
+        """
+        graph = StageGraph()
+        if mode == "fast":
+            graph.add("keywords", partial(match_keywords, resume_text, job_description))
+            graph.add("quality", partial(local_quality_output, resume_text, resume_document))
+            graph.add("match", local_match_output, deps=("keywords",))
+            return graph
+
+        if prompts is None:
+            prompts = PromptBuilder()
+        if mode == "standard":
+            graph.add("analysis", partial(
+                self.analyze_fit,
+                prompts.resume("analysis", resume_text, resume_document),
+                prompts.job("analysis", job_description),
+                keywords
+            ))
+            return graph
 
-        parse_task = Task(
-            description=f"""Analyze this resume and extract:
+        parse_input = self.parse_input(resume_text, resume_document, prompts)
+        graph.add("resume_parse", partial(self.parse_resume, parse_input))
+        graph.add("quality", partial(
+            self.score_quality, prompts.resume("quality", resume_text, resume_document)
+        ))
+        if parsed_job is None:
+            graph.add("job_analysis", partial(
+                self.analyze_job, prompts.job("job_analysis", job_description)
+            ))
+            graph.add("match", partial(self.match, keywords=keywords),
+                      deps=("resume_parse", "job_analysis"))
+        else:
+            graph.add("match", partial(self.match, job_requirements=parsed_job, keywords=keywords),
+                      deps=("resume_parse",))
+        return graph
+
+    @staticmethod
+    def parse_input(
+        resume_text: str,
+        resume_document: Optional[ResumeDocument] = None,
+        prompts: Optional[PromptBuilder] = None
+    ) -> str:
+        """
+        Text sent to the resume parser.
+
+        Only the sections the parser extracts are sent; summaries, interests
+        and references are left out, and the rest is fitted to the stage's
+        token budget.
+
+        Args:
+            resume_text: Extracted resume text
+            resume_document: Sectioned resume, if available
+            prompts: Builder recording the input's token counts
+
+        Returns:
+            Parser input text
+        """
+        if prompts is None:
+            prompts = PromptBuilder()
+        return prompts.resume("resume_parse", resume_text, resume_document)
+
+    def _run_task(self, agent, description: str, expected_output: str) -> str:
+        """
+        Run a single task with a single agent.
+
+        Args:
+            agent: Agent that executes the task
+            description: Task prompt
+            expected_output: Short description of the expected output
+
+        Returns:
+            Raw task output
+        """
+        from crewai import Task, Crew
+
+        task = Task(description=description, agent=agent, expected_output=expected_output)
+        crew = Crew(agents=[agent], tasks=[task], verbose=True)
+        return str(crew.kickoff())
+
+    def _memoized_stage(
+        self,
+        stage: str,
+        text: str,
+        run: Callable[[], str],
+        model: Type[BaseModel]
+    ) -> str:
+        """
+        Return a stage's structured JSON, running the stage only on a cache miss.
+
+        Args:
+            stage: Stage name, part of the cache key
+            text: The only input the stage depends on
+            run: Runs the stage and returns its raw output
+            model: Model the output must satisfy to be cached
+
+        Returns:
+            Structured stage output as a JSON string
+        """
+        key = content_hash(stage, AGENT_VERSION, LLM_BACKEND, CLAUDE_MODEL, normalize_text(text))
+        cached = self.stage_cache.get(key)
+        if cached is not None:
+            return cached
+
+        output = run()
+        try:
+            data = extract_json(output)
+            model.model_validate(data)
+        except (JSONExtractionError, ValidationError):
+            # Unparseable or off-shape output is passed on as-is but never cached
+            return output
+        structured = json.dumps(data)
+        self.stage_cache.set(key, structured)
+        return structured
+
+    def parse_resume(self, resume_text: str) -> str:
+        """
+        Extract structured resume data, reusing earlier results for the same resume.
+
+        Args:
+            resume_text: Extracted resume text
+
+        Returns:
+            Structured resume data as a JSON string
+        """
+        def run():
+            return self._run_task(
+                create_resume_parser_agent(),
+                f"""Analyze this resume and extract:
             1. Contact information
             2. Work experience (companies, roles, dates, achievements)
             3. Education (degrees, institutions, dates)
@@ -63,17 +443,25 @@ class AnalysisService:
 
             Return as structured JSON with these exact keys: contact, experience, education, skills, certifications.
             """,
-            agent=resume_parser,
-            expected_output="Structured JSON with resume data"
-        )
+                "Structured JSON with resume data"
+            )
 
-        # Task 2: Analyze Job Posting
-        if self.progress_callback:
-            await self.progress_callback("Job Analyst Agent", "working",
-                                        "Analyzing job requirements...", 40)
+        return self._memoized_stage("resume_parse", resume_text, run, ResumeParseStageOutput)
+
+    def analyze_job(self, job_description: str) -> str:
+        """
+        Extract structured job requirements, reusing earlier results for the same posting.
+
+        Args:
+            job_description: Job posting text
 
-        job_task = Task(
-            description=f"""Analyze this job posting and extract:
+        Returns:
+            Structured job requirements as a JSON string
+        """
+        def run():
+            return self._run_task(
+                create_job_analyst_agent(),
+                f"""Analyze this job posting and extract:
             1. Required skills and qualifications
             2. Preferred/nice-to-have skills
             3. Experience level required
@@ -85,17 +473,27 @@ class AnalysisService:
 
             Return as structured JSON with these exact keys: required_skills, preferred_skills, experience_level, responsibilities, keywords.
             """,
-            agent=job_analyst,
-            expected_output="Structured JSON with job requirements"
-        )
+                "Structured JSON with job requirements"
+            )
 
-        # Task 3: Score Resume Quality
-        if self.progress_callback:
-            await self.progress_callback("Quality Scorer Agent", "working",
-                                        "Evaluating resume quality...", 65)
+        return self._memoized_stage("job_analysis", job_description, run, JobStageOutput)
+
+    def score_quality(self, resume_text: str) -> str:
+        """
+        Score resume quality.
 
-        quality_task = Task(
-            description=f"""Evaluate this resume's quality on a 0-100 scale. Consider:
+        Works on the raw text rather than the parsed resume, since formatting
+        and wording are part of what gets scored.
+
+        Args:
+            resume_text: Extracted resume text
+
+        Returns:
+            Raw quality stage output
+        """
+        return self._run_task(
+            create_quality_scorer_agent(),
+            f"""Evaluate this resume's quality on a 0-100 scale. Consider:
             1. Formatting and readability (0-20 points)
             2. Use of quantified achievements (0-20 points)
             3. Clarity and impact of descriptions (0-20 points)
@@ -107,17 +505,36 @@ class AnalysisService:
 
             Return JSON with: overall_score (0-100), category_scores (dict), feedback (list of improvement suggestions).
             """,
-            agent=quality_scorer,
-            expected_output="JSON with quality score and detailed feedback"
+            "JSON with quality score and detailed feedback"
         )
 
-        # Task 4: Match Analysis
-        if self.progress_callback:
-            await self.progress_callback("Match Analyzer Agent", "working",
-                                        "Comparing resume to job requirements...", 85)
+    def match(
+        self,
+        parsed_resume: str,
+        job_requirements: str,
+        keywords: Optional[KeywordMatch] = None
+    ) -> str:
+        """
+        Compare a resume to job requirements.
+
+        Args:
+            parsed_resume: Structured resume data from ``parse_resume``
+            job_requirements: Structured requirements from ``analyze_job``,
+                or the job posting text itself
+            keywords: Locally computed keyword match, given to the agent as fact
 
-        match_task = Task(
-            description=f"""Compare the resume to the job requirements and provide:
+        Returns:
+            Raw match stage output
+        """
+        keyword_section = ""
+        if keywords is not None and keywords.weights:
+            keyword_section = f"""
+            Keyword analysis (computed deterministically; use it as given rather than re-deriving keywords):
+            {keywords.to_prompt()}
+"""
+        return self._run_task(
+            create_match_analyzer_agent(),
+            f"""Compare the resume to the job requirements and provide:
             1. Overall match score (0-100)
             2. Matched keywords (list)
             3. Missing keywords (list)
@@ -125,84 +542,88 @@ class AnalysisService:
             5. Strengths (what matches well)
             6. Tailoring suggestions
 
-            Resume: {resume_text}
-
-            Job Requirements: {job_description}
+            Resume: {parsed_resume}
 
+            Job Requirements: {job_requirements}
+{keyword_section}
             Return JSON with: match_score, matched_keywords, missing_keywords, skills_gap, strengths, suggestions.
             """,
-            agent=match_analyzer,
-            expected_output="JSON with match analysis"
+            "JSON with match analysis"
         )
 
-        # Create and run crew
-        crew = Crew(
-            agents=[resume_parser, job_analyst, quality_scorer, match_analyzer],
-            tasks=[parse_task, job_task, quality_task, match_task],
-            verbose=True
-        )
+    def analyze_fit(
+        self,
+        resume_text: str,
+        job_description: str,
+        keywords: Optional[KeywordMatch] = None
+    ) -> EngineResult:
+        """
+        Score resume quality and job fit in one structured-output LLM call.
 
-        result = crew.kickoff()
-
-        # Parse task outputs to extract real AI-generated scores
-        def extract_json_from_output(output_str: str) -> dict:
-            """Extract JSON from task output, handling markdown code blocks."""
-            import re
-            # Try to find JSON in code blocks first
-            json_match = re.search(r'```(?:json)?\s*(\{[\s\S]*?\})\s*```', str(output_str))
-            if json_match:
-                try:
-                    return json.loads(json_match.group(1))
-                except json.JSONDecodeError:
-                    pass
-            # Try direct JSON parsing
-            try:
-                return json.loads(str(output_str))
-            except json.JSONDecodeError:
-                pass
-            # Try to find any JSON object in the string
-            json_match = re.search(r'\{[\s\S]*\}', str(output_str))
-            if json_match:
-                try:
-                    return json.loads(json_match.group(0))
-                except json.JSONDecodeError:
-                    pass
-            return {}
-
-        # Extract results from each task
-        quality_data = {}
-        match_data = {}
-        
-        # Get task outputs from the crew result
-        if hasattr(result, 'tasks_output') and result.tasks_output:
-            for i, task_output in enumerate(result.tasks_output):
-                output_str = str(task_output)
-                if i == 2:  # quality_task
-                    quality_data = extract_json_from_output(output_str)
-                elif i == 3:  # match_task
-                    match_data = extract_json_from_output(output_str)
+        Args:
+            resume_text: Extracted resume text
+            job_description: Job posting text
+            keywords: Locally computed keyword match, given to the model as fact
+
+        Returns:
+            Validated analysis and token usage
+        """
+        result = self.structured_engine.analyze(resume_text, job_description, keywords)
+        monitor = current_monitor()
+        if monitor is not None:
+            monitor.record_usage(result.input_tokens, result.output_tokens)
+        return result
+
+    def _build_result(
+        self,
+        analysis_id: str,
+        run: StageRun,
+        keywords: KeywordMatch,
+        mode: str
+    ) -> AnalysisResult:
+        """
+        Turn the stage outputs into an AnalysisResult.
+
+        Args:
+            analysis_id: Identifier for this analysis
+            run: Stage graph run with raw quality and match outputs, or a
+                merged "analysis" output
+            keywords: Local keyword match
+            mode: Analysis mode that produced the outputs
+
+        Returns:
+            Complete analysis result
+        """
+        merged = run.outputs.get("analysis")
+        if isinstance(merged, EngineResult):
+            return self._build_structured_result(analysis_id, run, keywords, merged)
+
+        # Malformed agent output fails the analysis rather than being
+        # replaced with made-up scores
+        quality = extract_model(run.outputs.get("quality", merged), QualityStageOutput)
+        match = extract_model(run.outputs.get("match", merged), MatchStageOutput)
+        quality_score = quality.overall_score
+        match_score = match.match_score
+
+        # Keywords come from the local engine whenever the posting names
+        # known skills, so they no longer vary from run to run
+        if keywords.weights:
+            matched_keywords = keywords.matched
+            missing_keywords = keywords.missing
+            match_percentage = keywords.coverage
         else:
-            # Try parsing from the raw result string
-            match_data = extract_json_from_output(str(result))
-
-        # Extract scores with fallbacks
-        quality_score = float(quality_data.get('overall_score', 75.0))
-        match_score = float(match_data.get('match_score', 70.0))
-        
-        # Extract keywords and analysis
-        matched_keywords = match_data.get('matched_keywords', [])
-        missing_keywords = match_data.get('missing_keywords', [])
-        skills_gap = match_data.get('skills_gap', [])
-        strengths = match_data.get('strengths', [])
-        suggestions = match_data.get('suggestions', [])
-        
-        # Calculate match percentage
-        total_keywords = len(matched_keywords) + len(missing_keywords)
-        match_percentage = (len(matched_keywords) / total_keywords * 100) if total_keywords > 0 else 0.0
+            matched_keywords = match.matched_keywords
+            missing_keywords = match.missing_keywords
+            total_keywords = len(matched_keywords) + len(missing_keywords)
+            match_percentage = (len(matched_keywords) / total_keywords * 100) if total_keywords > 0 else 0.0
+        skills_gap = match.skills_gap
+        strengths = match.strengths
+        suggestions = match.suggestions
 
-        if self.progress_callback:
-            await self.progress_callback("Analysis Complete", "completed",
-                                        "All agents finished successfully!", 100)
+        if mode == "deep":
+            stage_logs = ["Resume parsed successfully", "Job requirements analyzed"]
+        else:
+            stage_logs = [f"{mode.title()} analysis completed"]
 
         return AnalysisResult(
             analysis_id=analysis_id,
@@ -212,8 +633,8 @@ class AnalysisService:
                 QualityFeedback(
                     category="Overall Quality",
                     score=quality_score,
-                    feedback=quality_data.get('feedback', ["Resume analyzed successfully"])[0] if isinstance(quality_data.get('feedback'), list) else "Resume analyzed successfully",
-                    suggestions=quality_data.get('feedback', []) if isinstance(quality_data.get('feedback'), list) else []
+                    feedback=quality.feedback[0] if quality.feedback else "Resume analyzed successfully",
+                    suggestions=quality.feedback
                 )
             ],
             match_analysis=MatchAnalysis(
@@ -227,12 +648,59 @@ class AnalysisService:
                 strengths=strengths[:5] if strengths else ["See detailed analysis"],
                 improvement_areas=suggestions[:5] if suggestions else ["See suggestions above"]
             ),
-            agent_logs=[
-                f"Resume parsed successfully",
-                f"Job requirements analyzed", 
+            agent_logs=stage_logs + [
                 f"Quality score: {quality_score}/100",
                 f"Match score: {match_score}/100",
                 f"Found {len(matched_keywords)} matching keywords",
-                f"Identified {len(missing_keywords)} missing keywords"
-            ]
+                f"Identified {len(missing_keywords)} missing keywords",
+                f"Stages finished in {run.wall_time:.1f}s "
+                f"({sum(run.timings.values()):.1f}s of stage time)"
+            ],
+            stage_timings=run.timings,
+            mode=mode
+        )
+
+    def _build_structured_result(
+        self,
+        analysis_id: str,
+        run: StageRun,
+        keywords: KeywordMatch,
+        engine_result: EngineResult
+    ) -> AnalysisResult:
+        """
+        Turn a validated single-call analysis into an AnalysisResult.
+
+        Args:
+            analysis_id: Identifier for this analysis
+            run: Stage graph run, for timings
+            keywords: Local keyword match, which replaces the model's keyword lists
+            engine_result: Output of the structured engine
+
+        Returns:
+            Complete analysis result
+        """
+        structured = engine_result.analysis
+        match_analysis = structured.match_analysis.model_copy()
+        if keywords.weights:
+            match_analysis.keyword_analysis = keywords.to_analysis(limit=15)
+
+        agent_logs = [
+            "Standard analysis completed",
+            f"Quality score: {structured.resume_quality_score}/100",
+            f"Match score: {match_analysis.match_score}/100",
+            f"Single call used {engine_result.input_tokens} input and "
+            f"{engine_result.output_tokens} output tokens",
+        ]
+        if engine_result.repaired_fields:
+            agent_logs.append(f"Repaired fields: {', '.join(engine_result.repaired_fields)}")
+
+        return AnalysisResult(
+            analysis_id=analysis_id,
+            resume_quality_score=structured.resume_quality_score,
+            job_match_score=match_analysis.match_score,
+            quality_feedback=structured.quality_feedback,
+            match_analysis=match_analysis,
+            agent_logs=agent_logs,
+            stage_timings=run.timings,
+            mode="standard"
         )
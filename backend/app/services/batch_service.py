@@ -0,0 +1,318 @@
+from app.models import (
+    BatchItemResult,
+    BatchProgress,
+    BatchResult,
+    JobComparison,
+    JobComparisonResult,
+    MatchStageOutput,
+    ResumeDocument
+)
+from app.job_scraper import get_scraper
+from app.json_extract import extract_model
+from app.keywords import match_keywords
+from app.prompt_builder import PromptBuilder
+from app.rate_limit import BATCH, in_lane
+from app.resume_layout import extract_resume
+from app.services.analysis_service import AnalysisService
+from app.services.worker_pool import Reservation
+from typing import Callable, List, Optional, Tuple
+import asyncio
+import os
+import uuid
+
+class BatchService:
+    """Service for ranking many resumes against one job, or many jobs against one resume."""
+
+    def __init__(
+        self,
+        progress_callback: Optional[Callable] = None,
+        analysis_service: Optional[AnalysisService] = None,
+        concurrency: Optional[int] = None,
+        batch_id: Optional[str] = None
+    ):
+        """
+        Initialize batch service.
+
+        Args:
+            progress_callback: Optional async callback receiving BatchProgress updates
+            analysis_service: Service running the per-resume stages (by
+                default one whose LLM calls queue in the batch lane)
+            concurrency: Maximum resumes analyzed at once (BATCH_CONCURRENCY by default)
+            batch_id: Identifier for this batch, generated if omitted
+        """
+        self.progress_callback = progress_callback
+        self.analysis = analysis_service or AnalysisService(lane=BATCH)
+        self.concurrency = concurrency or int(os.getenv("BATCH_CONCURRENCY", "4"))
+        self.batch_id = batch_id or str(uuid.uuid4())
+
+    async def rank_resumes(
+        self,
+        resumes: List[Tuple[str, bytes]],
+        job_description: str,
+        reservation: Optional[Reservation] = None
+    ) -> BatchResult:
+        """
+        Analyze every resume against one job posting and rank them.
+
+        PDFs are parsed in parallel, the job posting is analyzed exactly once
+        and the per-resume stages run at most ``concurrency`` at a time.
+
+        Args:
+            resumes: (filename, PDF bytes) pairs
+            job_description: Job posting text
+            reservation: Worker pool place taken at admission time, if any
+
+        Returns:
+            Results sorted by job match score, failures last
+        """
+        try:
+            extracted = await asyncio.gather(
+                *(asyncio.to_thread(extract_resume, pdf_bytes) for _, pdf_bytes in resumes),
+                return_exceptions=True
+            )
+        except BaseException:
+            if reservation is not None:
+                reservation.release()
+            raise
+        return await self._rank_extracted(
+            [filename for filename, _ in resumes], extracted, job_description, reservation
+        )
+
+    async def rank_texts(
+        self,
+        resumes: List[Tuple[str, str, Optional[ResumeDocument]]],
+        job_description: str,
+        reservation: Optional[Reservation] = None
+    ) -> BatchResult:
+        """
+        Analyze already extracted resumes against one job posting and rank them.
+
+        Used for the shortlist from the resume index, whose text is stored.
+
+        Args:
+            resumes: (label, text, document) triples
+            job_description: Job posting text
+            reservation: Worker pool place taken at admission time, if any
+
+        Returns:
+            Results sorted by job match score, failures last
+        """
+        return await self._rank_extracted(
+            [label for label, _, _ in resumes],
+            [(text, document) for _, text, document in resumes],
+            job_description,
+            reservation
+        )
+
+    async def _rank_extracted(
+        self,
+        labels: List[str],
+        extracted: list,
+        job_description: str,
+        reservation: Optional[Reservation]
+    ) -> BatchResult:
+        """Run the per-resume stages on (text, document) pairs or extraction errors."""
+        items = [BatchItemResult(label=label) for label in labels]
+        # The whole batch, its analyses included, runs under one reservation
+        if reservation is None:
+            reservation = self.analysis.worker_pool.reserve(check=False)
+        try:
+            return await self._rank_reserved(items, extracted, job_description, reservation)
+        finally:
+            reservation.release()
+
+    async def _rank_reserved(
+        self,
+        items: List[BatchItemResult],
+        extracted: list,
+        job_description: str,
+        reservation: Reservation
+    ) -> BatchResult:
+        """Analyze the job once, then each resume, all under the batch's reservation."""
+        parsed_job = await self.analysis.worker_pool.run(
+            in_lane, self.analysis.lane, self.analysis.analyze_job, job_description,
+            reservation=reservation, lane=self.analysis.lane
+        )
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        done = 0
+
+        async def analyze(index: int, extraction) -> None:
+            nonlocal done
+            item = items[index]
+            try:
+                if isinstance(extraction, Exception):
+                    raise extraction
+                text, document = extraction
+                if not text or len(text) < 50:
+                    raise ValueError("Could not extract text from PDF")
+                async with semaphore:
+                    await self._report(index, item.label, "working", done, len(items))
+                    result = await self.analysis.analyze_resume(
+                        text, job_description, reservation=reservation.share(),
+                        parsed_job=parsed_job, resume_document=document, mode="deep"
+                    )
+                item.status = "completed"
+                item.analysis = result
+                item.job_match_score = result.job_match_score
+                item.resume_quality_score = result.resume_quality_score
+            except Exception as e:
+                item.status = "error"
+                item.error = str(e)
+            done += 1
+            await self._report(index, item.label, item.status, done, len(items),
+                               item.job_match_score, item.error)
+
+        await asyncio.gather(*(analyze(i, extraction) for i, extraction in enumerate(extracted)))
+        return self._ranked(items)
+
+    async def compare_jobs(
+        self,
+        resume_text: str,
+        job_urls: Optional[List[str]] = None,
+        job_descriptions: Optional[List[str]] = None,
+        reservation: Optional[Reservation] = None,
+        resume_document: Optional[ResumeDocument] = None
+    ) -> JobComparisonResult:
+        """
+        Match one resume against many job postings.
+
+        Postings are scraped concurrently and the resume is parsed once;
+        only the match stage runs per posting, against the posting text.
+
+        Args:
+            resume_text: Extracted resume text
+            job_urls: Job posting URLs to scrape
+            job_descriptions: Job description texts provided directly
+            reservation: Worker pool place taken at admission time, if any
+            resume_document: Sectioned resume, if layout extraction was used
+
+        Returns:
+            Comparison rows sorted by match score, failures last
+        """
+        job_urls = job_urls or []
+        job_descriptions = job_descriptions or []
+        rows = [JobComparison(label=url) for url in job_urls]
+        rows += [
+            JobComparison(label=f"Job description {i + 1}")
+            for i in range(len(job_descriptions))
+        ]
+
+        if reservation is None:
+            reservation = self.analysis.worker_pool.reserve(check=False)
+        try:
+            rows = await self._compare_reserved(
+                rows, resume_text, job_urls, job_descriptions, reservation, resume_document
+            )
+        finally:
+            reservation.release()
+        completed = sum(1 for row in rows if row.status == "completed")
+        return JobComparisonResult(
+            batch_id=self.batch_id,
+            total=len(rows),
+            completed=completed,
+            failed=len(rows) - completed,
+            rows=rows
+        )
+
+    async def _compare_reserved(
+        self,
+        rows: List[JobComparison],
+        resume_text: str,
+        job_urls: List[str],
+        job_descriptions: List[str],
+        reservation: Reservation,
+        resume_document: Optional[ResumeDocument]
+    ) -> List[JobComparison]:
+        """Parse the resume once and match it to each posting, under the batch's reservation."""
+        scraped = await get_scraper().fetch_many(job_urls)
+        postings = list(scraped) + list(job_descriptions)
+
+        parsed_resume = await self.analysis.worker_pool.run(
+            in_lane, self.analysis.lane, self.analysis.parse_resume,
+            self.analysis.parse_input(resume_text, resume_document),
+            reservation=reservation, lane=self.analysis.lane
+        )
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        done = 0
+
+        async def match(index: int, posting) -> None:
+            nonlocal done
+            row = rows[index]
+            try:
+                if isinstance(posting, Exception):
+                    raise posting
+                keywords = match_keywords(resume_text, posting)
+                async with semaphore:
+                    await self._report(index, row.label, "working", done, len(rows))
+                    output = await self.analysis.worker_pool.run(
+                        in_lane, self.analysis.lane, self.analysis.match, parsed_resume,
+                        PromptBuilder().job("match", posting), keywords,
+                        reservation=reservation, lane=self.analysis.lane
+                    )
+                data = extract_model(output, MatchStageOutput)
+                row.match_score = data.match_score
+                if keywords.weights:
+                    row.matched_keywords = keywords.matched
+                    row.missing_keywords = keywords.missing
+                else:
+                    row.matched_keywords = data.matched_keywords
+                    row.missing_keywords = data.missing_keywords
+                row.skills_gap = data.skills_gap
+                row.status = "completed"
+            except Exception as e:
+                row.status = "error"
+                row.error = str(e)
+            done += 1
+            await self._report(index, row.label, row.status, done, len(rows),
+                               row.match_score, row.error)
+
+        await asyncio.gather(*(match(i, posting) for i, posting in enumerate(postings)))
+        return self._rank(rows, lambda row: row.match_score)
+
+    @staticmethod
+    def _rank(items: list, score: Callable) -> list:
+        """Sort items best score first, failures last, and number the successful ones."""
+        ranked = sorted(
+            items,
+            key=lambda item: (item.status != "completed", -(score(item) or 0.0))
+        )
+        for rank, item in enumerate(ranked, start=1):
+            if item.status == "completed":
+                item.rank = rank
+        return ranked
+
+    def _ranked(self, items: List[BatchItemResult]) -> BatchResult:
+        """Build the batch result with items sorted by job match score."""
+        ranked = self._rank(items, lambda item: item.job_match_score)
+        completed = sum(1 for item in ranked if item.status == "completed")
+        return BatchResult(
+            batch_id=self.batch_id,
+            total=len(items),
+            completed=completed,
+            failed=len(items) - completed,
+            items=ranked
+        )
+
+    async def _report(
+        self,
+        index: int,
+        label: str,
+        status: str,
+        completed: int,
+        total: int,
+        score: Optional[float] = None,
+        error: Optional[str] = None
+    ) -> None:
+        if self.progress_callback:
+            await self.progress_callback(BatchProgress(
+                batch_id=self.batch_id,
+                index=index,
+                label=label,
+                status=status,
+                completed=completed,
+                total=total,
+                job_match_score=score,
+                error=error
+            ))
@@ -0,0 +1,181 @@
+"""Live stage progress: start/finish events with elapsed time and token usage."""
+from contextlib import contextmanager
+from app.metrics import record_llm_usage
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import threading
+import time
+
+# Agent shown to the client for each LLM stage, and what it is doing
+STAGE_AGENTS = {
+    "resume_parse": ("Resume Parser Agent", "Extracting resume structure and content..."),
+    "job_analysis": ("Job Analyst Agent", "Analyzing job requirements..."),
+    "quality": ("Quality Scorer Agent", "Evaluating resume quality..."),
+    "match": ("Match Analyzer Agent", "Comparing resume to job requirements..."),
+    "analysis": ("Resume Analyst Agent", "Reviewing resume quality and job fit..."),
+}
+
+# Progress before the first LLM stage finishes (the local pass is done)
+# and once the last one has
+START_PROGRESS = 10
+END_PROGRESS = 95
+
+_local = threading.local()
+
+
+def _usage_value(usage: Any, name: str) -> int:
+    value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+    return int(value or 0)
+
+
+def response_usage(response) -> Optional[Tuple[int, int]]:
+    """(input, output) tokens from ChatAnthropic's output, which carries the API response."""
+    output = response.llm_output or {}
+    usage = output.get("usage") if isinstance(output, dict) else getattr(output, "usage", None)
+    if usage is None:
+        return None
+    return _usage_value(usage, "input_tokens"), _usage_value(usage, "output_tokens")
+
+
+class StageMonitor:
+    """
+    Token usage of one running stage.
+
+    Fed by ``app.agents.callbacks.stage_usage_handler`` for every call the
+    stage's agent makes; single-call stages record their usage directly.
+    """
+
+    def __init__(self, stage: str):
+        """
+        Initialize monitor.
+
+        Args:
+            stage: Stage name
+        """
+        self.stage = stage
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.llm_calls = 0
+        self._lock = threading.Lock()
+
+    def record_usage(self, input_tokens: int, output_tokens: int) -> None:
+        """Add the usage of one LLM call."""
+        with self._lock:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            self.llm_calls += 1
+        record_llm_usage(self.stage, input_tokens, output_tokens)
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        """Record the usage reported by the API."""
+        usage = response_usage(response)
+        if usage is not None:
+            self.record_usage(*usage)
+
+
+def current_monitor() -> Optional[StageMonitor]:
+    """Monitor of the stage running on this thread, if any."""
+    return getattr(_local, "monitor", None)
+
+
+@contextmanager
+def monitoring(monitor: StageMonitor) -> Iterator[StageMonitor]:
+    """Make a monitor current on this thread for the duration of a stage."""
+    previous = current_monitor()
+    _local.monitor = monitor
+    try:
+        yield monitor
+    finally:
+        _local.monitor = previous
+
+
+@contextmanager
+def stage_monitor(stage: str) -> Iterator[StageMonitor]:
+    """Track a stage's token usage on this thread when nothing reports its progress."""
+    with monitoring(StageMonitor(stage)) as monitor:
+        yield monitor
+
+
+class ProgressReporter:
+    """
+    Reports a stage graph's progress as it happens.
+
+    ``stage_context`` runs on worker threads and hands its events to the
+    event loop; ``stage_done`` runs on the loop. Progress is the share of
+    stages finished, so it only moves when work has actually completed.
+    """
+
+    def __init__(
+        self,
+        progress_callback: Callable[..., Awaitable[None]],
+        stages: List[str],
+        loop: Optional[asyncio.AbstractEventLoop] = None
+    ):
+        """
+        Initialize reporter.
+
+        Args:
+            progress_callback: Coroutine called as ``(agent, status, message,
+                progress, **details)``
+            stages: Names of the stages that will run
+            loop: Event loop the callback runs on (defaults to the running loop)
+        """
+        self.progress_callback = progress_callback
+        self.stages = stages
+        self.loop = loop or asyncio.get_running_loop()
+        self.started = time.perf_counter()
+        self.monitors: Dict[str, StageMonitor] = {}
+        self.finished = 0
+
+    def _elapsed(self) -> float:
+        return round(time.perf_counter() - self.started, 3)
+
+    def _progress(self) -> int:
+        share = self.finished / max(len(self.stages), 1)
+        return int(START_PROGRESS + (END_PROGRESS - START_PROGRESS) * share)
+
+    def _emit_threadsafe(self, *args: Any, **details: Any) -> None:
+        asyncio.run_coroutine_threadsafe(self.progress_callback(*args, **details), self.loop)
+
+    @contextmanager
+    def stage_context(self, stage: str) -> Iterator[StageMonitor]:
+        """
+        Report a stage starting, and failing, from its worker thread.
+
+        Args:
+            stage: Stage name
+
+        Yields:
+            The stage's monitor, current on this thread
+        """
+        agent, message = STAGE_AGENTS.get(stage, (stage, "Working..."))
+        monitor = StageMonitor(stage)
+        self.monitors[stage] = monitor
+        self._emit_threadsafe(agent, "working", message, self._progress(),
+                              stage=stage, elapsed=self._elapsed())
+        try:
+            with monitoring(monitor):
+                yield monitor
+        except Exception as e:
+            self._emit_threadsafe(agent, "error", f"{agent} failed: {e}", self._progress(),
+                                  stage=stage, elapsed=self._elapsed())
+            raise
+
+    async def stage_done(self, stage: str, seconds: float) -> None:
+        """
+        Report a finished stage with its run time and token usage.
+
+        Args:
+            stage: Stage name
+            seconds: Stage run time
+        """
+        self.finished += 1
+        agent, _ = STAGE_AGENTS.get(stage, (stage, ""))
+        monitor = self.monitors.get(stage)
+        tokens = {}
+        if monitor is not None and monitor.llm_calls:
+            tokens = {"input_tokens": monitor.input_tokens, "output_tokens": monitor.output_tokens}
+        await self.progress_callback(
+            agent, "completed", f"{agent} finished in {seconds:.1f}s", self._progress(),
+            stage=stage, elapsed=self._elapsed(), stage_seconds=seconds, **tokens
+        )
@@ -0,0 +1,150 @@
+"""Dependency-graph executor for analysis stages."""
+from typing import Any, Awaitable, Callable, ContextManager, Dict, List, Optional, Sequence
+import asyncio
+import time
+
+# Runs a blocking callable with positional arguments, e.g. CrewWorkerPool.run
+StageRunner = Callable[..., Awaitable[Any]]
+
+
+class Stage:
+    """A named blocking callable and the stages whose outputs it takes."""
+
+    def __init__(self, name: str, fn: Callable[..., Any], deps: Sequence[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+
+
+class StageRun:
+    """Outputs and timings of one graph execution."""
+
+    def __init__(self, outputs: Dict[str, Any], timings: Dict[str, float], wall_time: float):
+        self.outputs = outputs
+        self.timings = timings
+        self.wall_time = wall_time
+
+
+class StageGraph:
+    """
+    Runs stages as soon as their dependencies finish.
+
+    Each stage is called with its dependencies' outputs as positional
+    arguments, in the order the dependencies were declared. Independent
+    stages run concurrently, so a run takes about as long as the slowest
+    path through the graph rather than the sum of all stages.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Stage] = {}
+
+    def add(self, name: str, fn: Callable[..., Any], deps: Sequence[str] = ()) -> "StageGraph":
+        """
+        Add a stage.
+
+        Args:
+            name: Unique stage name
+            fn: Blocking callable taking the dependency outputs
+            deps: Names of stages that must finish first
+
+        Returns:
+            The graph, for chaining
+
+        Raises:
+            ValueError: If the name is taken
+        """
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self.stages[name] = Stage(name, fn, deps)
+        return self
+
+    def order(self) -> List[str]:
+        """
+        Stage names in a valid execution order.
+
+        Raises:
+            ValueError: If a dependency is unknown or the graph has a cycle
+        """
+        ordered: List[str] = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str, path: tuple) -> None:
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage dependency: {path[-1]} -> {name}")
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Stage cycle: {' -> '.join(path + (name,))}")
+            state[name] = "visiting"
+            for dep in self.stages[name].deps:
+                visit(dep, path + (name,))
+            state[name] = "done"
+            ordered.append(name)
+
+        for name in self.stages:
+            visit(name, ())
+        return ordered
+
+    async def run(
+        self,
+        runner: StageRunner,
+        on_stage_done: Optional[Callable[[str, float], Awaitable[None]]] = None,
+        stage_context: Optional[Callable[[str], ContextManager]] = None
+    ) -> StageRun:
+        """
+        Execute the graph.
+
+        Args:
+            runner: Coroutine function that runs a blocking callable off the
+                event loop, called as ``runner(fn, *args)``
+            on_stage_done: Optional coroutine called with each stage's name
+                and run time as it finishes
+            stage_context: Optional factory of a context manager entered on
+                the worker thread around each stage, given the stage name;
+                it sees the stage actually start, finish or fail
+
+        Returns:
+            Outputs and per-stage run times keyed by stage name
+
+        Raises:
+            Exception: The first stage failure; stages not yet started are cancelled
+        """
+        order = self.order()
+        timings: Dict[str, float] = {}
+        tasks: Dict[str, asyncio.Future] = {}
+
+        def timed(stage: Stage) -> Callable[..., Any]:
+            # Measured on the worker thread so queueing for a slot is excluded
+            def call(*args: Any) -> Any:
+                started = time.perf_counter()
+                try:
+                    if stage_context is None:
+                        return stage.fn(*args)
+                    with stage_context(stage.name):
+                        return stage.fn(*args)
+                finally:
+                    timings[stage.name] = round(time.perf_counter() - started, 3)
+            return call
+
+        async def execute(stage: Stage) -> Any:
+            inputs = [await tasks[dep] for dep in stage.deps]
+            output = await runner(timed(stage), *inputs)
+            if on_stage_done:
+                await on_stage_done(stage.name, timings[stage.name])
+            return output
+
+        started = time.perf_counter()
+        for name in order:
+            tasks[name] = asyncio.ensure_future(execute(self.stages[name]))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        return StageRun(
+            outputs={name: task.result() for name, task in tasks.items()},
+            timings=timings,
+            wall_time=round(time.perf_counter() - started, 3)
+        )
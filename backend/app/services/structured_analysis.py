@@ -0,0 +1,225 @@
+"""Single-call resume analysis using Claude tool use and Pydantic validation."""
+from app.agents.crew_config import CLAUDE_MODEL, get_llm_registry
+from app.keywords import KeywordMatch
+from app.models import StructuredAnalysis
+from pydantic import ValidationError
+from typing import Any, Dict, List, Optional
+import os
+
+TOOL_NAME = "record_analysis"
+REPAIR_TOOL_NAME = "repair_analysis"
+
+SYSTEM_PROMPT = """You are a senior technical recruiter and resume coach. In one review you
+judge how well a resume is written and how closely it fits a job posting.
+
+Score resume quality 0-100 from five 0-20 categories: formatting and readability,
+quantified achievements, clarity and impact, professional language, ATS optimization.
+Give one quality_feedback item per category with concrete suggestions.
+
+Score the job match 0-100. List skills gaps, strengths and specific improvements for
+tailoring the resume to this job. Record the result with the record_analysis tool."""
+
+
+class StructuredOutputError(ValueError):
+    """Raised when the model's output still fails validation after repair."""
+
+
+class EngineResult:
+    """A validated analysis plus what it cost to produce."""
+
+    def __init__(
+        self,
+        analysis: StructuredAnalysis,
+        input_tokens: int,
+        output_tokens: int,
+        repaired_fields: List[str]
+    ):
+        self.analysis = analysis
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.repaired_fields = repaired_fields
+
+
+def _subschema(schema: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """Restrict a model's JSON schema to some top-level fields."""
+    subset = {
+        "type": "object",
+        "properties": {name: schema["properties"][name] for name in fields},
+        "required": fields,
+    }
+    if "$defs" in schema:
+        subset["$defs"] = schema["$defs"]
+    return subset
+
+
+def _tool_input(response, name: str) -> Dict[str, Any]:
+    for block in response.content:
+        if block.type == "tool_use" and block.name == name:
+            return dict(block.input)
+    raise StructuredOutputError(f"Model did not call {name}")
+
+
+def _as_params(response) -> List[Dict[str, Any]]:
+    """Assistant content blocks as request parameters for a follow-up turn."""
+    params = []
+    for block in response.content:
+        if block.type == "tool_use":
+            params.append({
+                "type": "tool_use", "id": block.id, "name": block.name, "input": block.input
+            })
+        elif block.type == "text":
+            params.append({"type": "text", "text": block.text})
+    return params
+
+
+class StructuredAnalysisEngine:
+    """
+    Produces a complete analysis from one Claude call.
+
+    The model is forced to call a tool whose input schema is the
+    ``StructuredAnalysis`` model, so the response is already JSON; it is
+    validated with Pydantic rather than parsed out of free text. Fields
+    that fail validation are re-requested on their own, with the
+    validation errors, instead of repeating the whole analysis.
+    """
+
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        model: str = CLAUDE_MODEL,
+        max_tokens: int = 4096,
+        max_repairs: int = 1
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            client: Anthropic client (defaults to the registry's pooled client)
+            model: Claude model name
+            max_tokens: Output token limit per call
+            max_repairs: Repair rounds allowed for fields that fail validation
+        """
+        self._client = client
+        self.model = model
+        self.max_tokens = max_tokens
+        self.max_repairs = max_repairs
+        self.schema = StructuredAnalysis.model_json_schema()
+
+    @property
+    def client(self):
+        """Anthropic client, shared with the agents' chat models."""
+        if self._client is None:
+            self._client = get_llm_registry().client()
+        return self._client
+
+    def _tool(self, name: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        return {
+            "name": name,
+            "description": "Record the resume analysis." if fields is None
+            else f"Resend corrected values for: {', '.join(fields)}.",
+            "input_schema": self.schema if fields is None else _subschema(self.schema, fields),
+        }
+
+    def analyze(
+        self,
+        resume_text: str,
+        job_description: str,
+        keywords: Optional[KeywordMatch] = None
+    ) -> EngineResult:
+        """
+        Analyze a resume against a job posting in one call.
+
+        Args:
+            resume_text: Resume text
+            job_description: Job posting text
+            keywords: Locally computed keyword match, given to the model as fact
+
+        Returns:
+            Validated analysis and token usage
+
+        Raises:
+            StructuredOutputError: If the output is still invalid after repairs
+        """
+        content = (
+            f"<resume>\n{resume_text}\n</resume>\n\n"
+            f"<job_posting>\n{job_description}\n</job_posting>"
+        )
+        if keywords is not None and keywords.weights:
+            content += (
+                "\n\nKeyword analysis (computed deterministically; use it as given "
+                f"for keyword_analysis):\n{keywords.to_prompt()}"
+            )
+        messages: List[Dict[str, Any]] = [{"role": "user", "content": content}]
+        tools = [self._tool(TOOL_NAME)]
+
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            temperature=0.1,
+            system=SYSTEM_PROMPT,
+            tools=tools,
+            tool_choice={"type": "tool", "name": TOOL_NAME},
+            messages=messages
+        )
+        input_tokens = response.usage.input_tokens
+        output_tokens = response.usage.output_tokens
+        data = _tool_input(response, TOOL_NAME)
+        tool_use_id = next(b.id for b in response.content if b.type == "tool_use")
+        repaired: List[str] = []
+
+        for attempt in range(self.max_repairs + 1):
+            try:
+                analysis = StructuredAnalysis.model_validate(data)
+                return EngineResult(analysis, input_tokens, output_tokens, repaired)
+            except ValidationError as e:
+                errors = e.errors()
+                if attempt == self.max_repairs:
+                    raise StructuredOutputError(f"Analysis failed validation: {e}")
+
+            # Only the failing top-level fields are asked for again
+            fields = sorted({str(error["loc"][0]) for error in errors if error["loc"]})
+            fields = [name for name in fields if name in self.schema["properties"]]
+            if not fields:
+                raise StructuredOutputError("Analysis failed validation outside known fields")
+            problems = "\n".join(
+                f"- {'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                for error in errors
+            )
+            repair_tool = self._tool(REPAIR_TOOL_NAME, fields)
+            messages += [
+                {"role": "assistant", "content": _as_params(response)},
+                {"role": "user", "content": [
+                    {"type": "tool_result", "tool_use_id": tool_use_id, "is_error": True,
+                     "content": f"Validation failed:\n{problems}"},
+                    {"type": "text", "text": f"Call {REPAIR_TOOL_NAME} with corrected values "
+                                             f"for only these fields: {', '.join(fields)}."},
+                ]},
+            ]
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=self.max_tokens,
+                temperature=0.1,
+                system=SYSTEM_PROMPT,
+                tools=tools + [repair_tool],
+                tool_choice={"type": "tool", "name": REPAIR_TOOL_NAME},
+                messages=messages
+            )
+            input_tokens += response.usage.input_tokens
+            output_tokens += response.usage.output_tokens
+            fixes = _tool_input(response, REPAIR_TOOL_NAME)
+            tool_use_id = next(b.id for b in response.content if b.type == "tool_use")
+            data.update({name: fixes[name] for name in fields if name in fixes})
+            repaired.extend(name for name in fields if name not in repaired)
+
+
+_engine: Optional[StructuredAnalysisEngine] = None
+
+
+def get_structured_engine() -> StructuredAnalysisEngine:
+    """Get the process-wide engine; the Anthropic client is thread-safe."""
+    global _engine
+    if _engine is None:
+        _engine = StructuredAnalysisEngine(
+            max_repairs=int(os.getenv("STRUCTURED_MAX_REPAIRS", "1"))
+        )
+    return _engine
@@ -0,0 +1,371 @@
+"""Bounded worker pool for running blocking crew work off the event loop."""
+from app.rate_limit import BATCH, INTERACTIVE, LANES
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+import asyncio
+import math
+import os
+import time
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the pending queue is full and a job cannot be admitted."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Analysis queue is full, please retry later")
+        self.retry_after = retry_after
+
+
+class PoolTimeoutError(Exception):
+    """Raised when a job exceeds the configured per-job timeout."""
+
+
+class Reservation:
+    """
+    A place in the pool's queue for one admitted analysis or batch.
+
+    Every job of that work runs under the same reservation, which counts
+    as one pending entry while none of its jobs is running. Each owner
+    calls ``release()`` once when the work is done; ``share()`` adds an
+    owner, e.g. for an analysis run as part of a batch.
+    """
+
+    def __init__(self, pool: "CrewWorkerPool"):
+        self.pool = pool
+        self.created_at = time.monotonic()
+        self.started = False
+        self.active = 0
+        self._owners = 1
+
+    @property
+    def released(self) -> bool:
+        return self._owners == 0
+
+    def share(self) -> "Reservation":
+        """Add an owner, who must also call ``release()``."""
+        if self.released:
+            raise ValueError("Reservation has already been released")
+        self._owners += 1
+        return self
+
+    def release(self) -> None:
+        """Give up this owner's hold; the place is freed once every owner has."""
+        if self.released:
+            return
+        self._owners -= 1
+        if self.released and not self.active:
+            self.pool._pending -= 1
+
+    def _job_started(self) -> None:
+        if not self.active:
+            self.pool._pending -= 1
+        self.active += 1
+        self.started = True
+
+    def _job_finished(self) -> None:
+        self.active -= 1
+        if not self.active and not self.released:
+            # Waiting again, for the work's next job
+            self.pool._pending += 1
+
+
+class _LaneSlots:
+    """
+    Worker slots handed out interactive work first, in arrival order within a lane.
+
+    Batch jobs may hold at most ``batch_limit`` slots, so some are always
+    left for interactive analyses.
+    """
+
+    def __init__(self, size: int, batch_limit: int):
+        self.free = size
+        self.batch_limit = batch_limit
+        self.held: Dict[str, int] = {lane: 0 for lane in LANES}
+        self.waiters: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+
+    def _can_take(self, lane: str) -> bool:
+        return self.free > 0 and (lane != BATCH or self.held[BATCH] < self.batch_limit)
+
+    def _take(self, lane: str) -> None:
+        self.free -= 1
+        self.held[lane] += 1
+
+    async def acquire(self, lane: str) -> None:
+        ahead = any(self.waiters[name] for name in LANES[:LANES.index(lane) + 1])
+        if not ahead and self._can_take(lane):
+            self._take(lane)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters[lane].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait was cancelled
+                self.release(lane)
+            else:
+                self.waiters[lane].remove(waiter)
+            raise
+
+    def release(self, lane: str) -> None:
+        self.free += 1
+        self.held[lane] -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        for lane in LANES:
+            queue = self.waiters[lane]
+            while queue and self._can_take(lane):
+                waiter = queue.popleft()
+                if not waiter.done():
+                    self._take(lane)
+                    waiter.set_result(None)
+
+
+class CrewWorkerPool:
+    """
+    Thread pool for blocking crew runs with admission control.
+
+    At most ``max_workers`` jobs run concurrently and at most ``max_pending``
+    admitted analyses or batches wait for a free worker. Callers that need
+    to reject work up front take a ``Reservation`` with ``reserve()`` and
+    hand it to ``run()`` for each of the work's jobs.
+
+    Free workers go to interactive jobs before batch jobs, and batch jobs
+    never hold more than ``max_workers - interactive_workers`` of them, so
+    a large batch cannot keep interactive analyses waiting.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_pending: int = 16,
+        job_timeout: Optional[float] = 300.0,
+        backpressure: Optional[Callable[[], float]] = None,
+        max_backpressure: float = 30.0,
+        interactive_workers: int = 1
+    ):
+        """
+        Initialize worker pool.
+
+        Args:
+            max_workers: Maximum number of jobs running at the same time
+            max_pending: Maximum number of admitted analyses or batches
+                waiting for a worker
+            job_timeout: Seconds a single job may run, or None for no limit
+            backpressure: Returns how many seconds new jobs would wait
+                downstream of the pool, such as for the LLM rate limiter
+            max_backpressure: Jobs are rejected while that wait is longer
+            interactive_workers: Workers batch jobs leave free for
+                interactive ones (batch always gets at least one)
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.job_timeout = job_timeout
+        self.backpressure = backpressure
+        self.max_backpressure = max_backpressure
+        self.interactive_workers = interactive_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="crew-worker"
+        )
+        self._slots: Optional[_LaneSlots] = None
+        self._slots_loop = None
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of admitted analyses or batches with no job running."""
+        return self._pending
+
+    @property
+    def in_flight(self) -> int:
+        """Number of jobs currently running on a worker."""
+        return self._running
+
+    def retry_after(self) -> int:
+        """Estimate how many seconds a rejected client should wait."""
+        finished = self._completed + self._failed
+        avg_run = self._total_run / finished if finished else 30.0
+        waves = (self._pending + 1) / self.max_workers
+        return max(1, math.ceil(avg_run * waves))
+
+    def reserve(self, check: bool = True) -> Reservation:
+        """
+        Take a place in the pending queue.
+
+        Args:
+            check: Apply the admission limits; False takes a place
+                regardless, for work admitted some other way
+
+        Returns:
+            Reservation to pass to ``run()``; release it when the work is done
+
+        Raises:
+            PoolSaturatedError: If the pending queue is full, or the
+                downstream backlog is longer than ``max_backpressure``
+        """
+        if not check:
+            return self._reserve()
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise PoolSaturatedError(self.retry_after())
+        delay = self.backpressure() if self.backpressure is not None else 0.0
+        if delay > self.max_backpressure:
+            self._rejected += 1
+            raise PoolSaturatedError(max(self.retry_after(), math.ceil(delay)))
+        return self._reserve()
+
+    def _get_slots(self, loop: asyncio.AbstractEventLoop) -> _LaneSlots:
+        if self._slots is None or self._slots_loop is not loop:
+            batch_limit = max(1, self.max_workers - self.interactive_workers)
+            self._slots = _LaneSlots(self.max_workers, batch_limit)
+            self._slots_loop = loop
+        return self._slots
+
+    def _reserve(self) -> Reservation:
+        self._pending += 1
+        return Reservation(self)
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        reservation: Optional[Reservation] = None,
+        lane: str = INTERACTIVE
+    ) -> Any:
+        """
+        Run a blocking callable on a worker thread.
+
+        Args:
+            fn: Callable to run
+            *args: Positional arguments for ``fn``
+            reservation: Place taken earlier with ``reserve()``, shared by
+                the work's jobs and released by its owner. Without one the
+                job gets its own place, without an admission check.
+            lane: "interactive" or "batch"; interactive jobs get free
+                workers first
+
+        Returns:
+            Return value of ``fn``
+
+        Raises:
+            PoolTimeoutError: If the job runs longer than ``job_timeout``
+            ValueError: If the reservation was already released
+        """
+        own = reservation is None
+        if own:
+            reservation = self._reserve()
+        elif reservation.released:
+            raise ValueError("Reservation has already been released")
+        try:
+            return await self._run(fn, args, reservation, lane)
+        finally:
+            if own:
+                reservation.release()
+
+    async def _run(
+        self,
+        fn: Callable[..., Any],
+        args: tuple,
+        reservation: Reservation,
+        lane: str
+    ) -> Any:
+        queued = time.monotonic()
+        loop = asyncio.get_running_loop()
+        slots = self._get_slots(loop)
+        await slots.acquire(lane)
+
+        # The first job's wait includes the time since admission
+        wait = time.monotonic() - (queued if reservation.started else reservation.created_at)
+        reservation._job_started()
+        self._running += 1
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+
+        started = time.monotonic()
+        future = loop.run_in_executor(self._executor, fn, *args)
+
+        def _finished(_):
+            # The slot is only freed once the thread is actually done, even
+            # if the awaiting coroutine gave up on it earlier.
+            self._running -= 1
+            self._total_run += time.monotonic() - started
+            reservation._job_finished()
+            slots.release(lane)
+
+        future.add_done_callback(_finished)
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), self.job_timeout)
+        except asyncio.TimeoutError:
+            self._timed_out += 1
+            self._failed += 1
+            raise PoolTimeoutError(
+                f"Analysis timed out after {self.job_timeout:.0f} seconds"
+            )
+        except Exception:
+            self._failed += 1
+            raise
+
+        self._completed += 1
+        return result
+
+    def stats(self) -> dict:
+        """Snapshot of queue depth, throughput and wait times."""
+        started = self._completed + self._failed + self._running
+        return {
+            "max_workers": self.max_workers,
+            "interactive_workers": self.interactive_workers,
+            "max_pending": self.max_pending,
+            "job_timeout": self.job_timeout,
+            "in_flight": self._running,
+            "queue_depth": self._pending,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "timed_out": self._timed_out,
+            "avg_wait_seconds": round(self._total_wait / started, 3) if started else 0.0,
+            "max_wait_seconds": round(self._max_wait, 3),
+        }
+
+    def shutdown(self) -> None:
+        """Stop accepting work and release worker threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[CrewWorkerPool] = None
+
+
+def get_worker_pool() -> CrewWorkerPool:
+    """Get the process-wide worker pool, configured from the environment."""
+    from app.rate_limit import LLM_ADMISSION_MAX_WAIT, get_rate_limiter
+
+    global _pool
+    if _pool is None:
+        timeout = float(os.getenv("CREW_JOB_TIMEOUT", "300"))
+        _pool = CrewWorkerPool(
+            max_workers=int(os.getenv("CREW_MAX_WORKERS", "4")),
+            max_pending=int(os.getenv("CREW_MAX_PENDING", "16")),
+            job_timeout=timeout if timeout > 0 else None,
+            backpressure=get_rate_limiter().admission_delay,
+            max_backpressure=LLM_ADMISSION_MAX_WAIT,
+            interactive_workers=int(os.getenv("CREW_INTERACTIVE_WORKERS", "1"))
+        )
+    return _pool
+
+
+def shutdown_worker_pool() -> None:
+    """Stop the process-wide pool's threads, if it was created."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
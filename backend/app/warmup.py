@@ -0,0 +1,110 @@
+"""Background warm-up of the heavy LLM and PDF dependencies."""
+from typing import Any, Callable, Dict, Iterable, Optional
+import asyncio
+import importlib
+import os
+import threading
+import time
+
+# Load the engines in a background task at startup ("0" to load them on
+# first use instead); the API serves /api/health either way
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") != "0"
+
+# Modules the app imports lazily, slowest first; together they take
+# seconds, so the warm-up imports them before the first request does
+WARMUP_MODULES = ("crewai", "langchain_anthropic", "anthropic", "fitz", "bs4")
+
+
+def build_engines() -> None:
+    """Build the shared LLM client, chat model, structured engine and skill index."""
+    from app.agents.crew_config import get_llm_registry
+    from app.keywords import get_skill_index
+    from app.services.structured_analysis import get_structured_engine
+
+    get_llm_registry().llm()
+    get_structured_engine()
+    get_skill_index()
+
+
+class Warmup:
+    """
+    Imports the heavy modules and builds the shared engines, once.
+
+    The status moves from "pending" to "warming" to "ready", or to
+    "failed" with the error kept; a failed warm-up leaves the engines to
+    load on first use, so the instance still serves. Timings are kept per
+    module and for building the engines.
+    """
+
+    def __init__(
+        self,
+        modules: Iterable[str] = WARMUP_MODULES,
+        build: Callable[[], None] = build_engines
+    ):
+        self.modules = tuple(modules)
+        self.build = build
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    @property
+    def finished(self) -> bool:
+        """Whether the warm-up has run to the end, successfully or not."""
+        return self.status in ("ready", "failed")
+
+    def run(self) -> None:
+        """Import the modules and build the engines; later calls do nothing."""
+        with self._lock:
+            if self.status != "pending":
+                return
+            self.status = "warming"
+            self.started_at = time.time()
+        try:
+            for name in self.modules:
+                start = time.perf_counter()
+                importlib.import_module(name)
+                self.timings[name] = time.perf_counter() - start
+            start = time.perf_counter()
+            self.build()
+            self.timings["engines"] = time.perf_counter() - start
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.status = "failed"
+        else:
+            self.status = "ready"
+        finally:
+            self.finished_at = time.time()
+
+    async def start(self) -> None:
+        """Run the warm-up on a worker thread, leaving the event loop free."""
+        await asyncio.to_thread(self.run)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status as returned by the readiness endpoint."""
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "status": self.status,
+            "error": self.error,
+            "seconds": elapsed,
+            "timings": {name: round(seconds, 4) for name, seconds in self.timings.items()},
+        }
+
+
+_warmup: Optional[Warmup] = None
+
+
+def get_warmup() -> Warmup:
+    """Get the process-wide warm-up."""
+    global _warmup
+    if _warmup is None:
+        _warmup = Warmup()
+    return _warmup
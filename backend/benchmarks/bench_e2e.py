@@ -0,0 +1,293 @@
+"""
+End-to-end load test of /api/analyze and its SSE stream, fully offline.
+
+Usage (from backend/):
+    python -m benchmarks.bench_e2e [--requests 40] [--concurrency 8]
+        [--mode standard] [--latency 0.5] [--jitter 0.1] [--seed 0]
+        [--rpm 0] [--tpm 0] [--json]
+
+The app runs under uvicorn on a loopback port with the fake LLM backend
+(LLM_BACKEND=fake), so no API key or network is needed and replies are
+reproducible for a given seed. Resumes are PDFs rendered from the text
+fixtures; job URLs point at the saved HTML fixtures, served from a local
+HTTP server so scraping is exercised too. Every resume gets a unique line
+so results are never answered from the result cache. The per-client quota
+is off, since one process plays every client; ``--rpm``/``--tpm`` set the
+LLM rate limiter (off by default) to see how throughput holds at a
+provider limit.
+
+Each client uploads a resume, follows the SSE stream to the final result
+and records its latency. Reported: latency to the "complete" event and to
+the preliminary result (p50/p95/p99), throughput, event-loop lag of the
+server (how late a 10 ms ticker wakes up) and per-stage time from each
+result's stage_timings.
+"""
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+TICK_INTERVAL = 0.01
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def render_pdf(text: str) -> bytes:
+    import fitz
+
+    doc = fitz.open()
+    doc.new_page().insert_text((54, 54), text, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+
+def serve_job_pages(directory: Path) -> ThreadingHTTPServer:
+    """Serve saved job posting HTML on a loopback port."""
+    handler = partial(QuietHandler, directory=str(directory))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_app(port: int, loop_lag: list):
+    """Run the app under uvicorn in a background thread, with a lag ticker."""
+    import uvicorn
+    import main
+
+    async def tick():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(TICK_INTERVAL)
+            loop_lag.append(time.perf_counter() - started - TICK_INTERVAL)
+
+    app_lifespan = main.app.router.lifespan_context
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        async with app_lifespan(app) as state:
+            main.app.state.lag_ticker = asyncio.create_task(tick())
+            yield state
+
+    main.app.router.lifespan_context = lifespan
+    server = uvicorn.Server(uvicorn.Config(
+        main.app, host="127.0.0.1", port=port, log_level="warning"
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def read_events(response):
+    """Parse a Server-Sent Events body into (event, data) pairs."""
+    event, data = "message", []
+    async for line in response.aiter_lines():
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+
+
+async def run_client(client, base: str, resume: bytes, job_url: str, mode: str, stats: dict):
+    started = time.perf_counter()
+    while True:
+        # The stream gets a connection of its own: uvicorn can arm its
+        # keep-alive timeout on a reused connection after the next request
+        # has started, cutting off streams that outlive it (5 s)
+        response = await client.post(
+            f"{base}/api/analyze",
+            files={"resume": ("resume.pdf", resume, "application/pdf")},
+            data={"job_url": job_url, "mode": mode},
+            headers={"Connection": "close"}
+        )
+        if response.status_code not in (429, 503):
+            break
+        # Worker pool is full or the LLM backlog is long: back off as told and try again
+        stats["rejected"] += 1
+        await asyncio.sleep(min(float(response.headers.get("Retry-After", "1")), 1.0))
+    if response.status_code != 200:
+        stats["errors"].append(f"{response.status_code}: {response.text[:200]}")
+        return
+    analysis_id = response.json()["analysis_id"]
+
+    url = f"{base}/api/analysis/{analysis_id}/stream"
+    async with client.stream("GET", url) as stream:
+        async for event, data in read_events(stream):
+            elapsed = time.perf_counter() - started
+            if event == "preliminary":
+                stats["preliminary"].append(elapsed)
+            elif event == "complete":
+                stats["latency"].append(elapsed)
+                for stage, seconds in json.loads(data).get("stage_timings", {}).items():
+                    stats["stages"].setdefault(stage, []).append(seconds)
+                return
+            elif event == "error":
+                stats["errors"].append(data[:200])
+                return
+    stats["errors"].append(f"stream for {analysis_id} ended without a result")
+
+
+async def drive(base: str, jobs: list, resumes: list, args) -> dict:
+    import httpx
+
+    stats = {"latency": [], "preliminary": [], "stages": {}, "errors": [], "rejected": 0}
+    queue: asyncio.Queue = asyncio.Queue()
+    for index in range(args.requests):
+        text = resumes[index % len(resumes)]
+        # A unique line per request keeps the result cache out of the picture
+        queue.put_nowait((render_pdf(f"{text}\nBenchmark request {index}"), jobs[index % len(jobs)]))
+
+    async def worker(client):
+        while not queue.empty():
+            resume, job_url = queue.get_nowait()
+            await run_client(client, base, resume, job_url, args.mode, stats)
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(timeout=None) as client:
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+    stats["wall"] = time.perf_counter() - started
+    return stats
+
+
+def summarize(stats: dict, loop_lag: list, args) -> dict:
+    def dist(values):
+        return {
+            "p50": round(percentile(values, 50), 4),
+            "p95": round(percentile(values, 95), 4),
+            "p99": round(percentile(values, 99), 4),
+            "max": round(max(values, default=0.0), 4),
+        }
+
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "mode": args.mode,
+        "llm_latency": args.latency,
+        "llm_jitter": args.jitter,
+        "completed": len(stats["latency"]),
+        "errors": len(stats["errors"]),
+        "rejected": stats["rejected"],
+        "wall_seconds": round(stats["wall"], 3),
+        "throughput_per_second": round(len(stats["latency"]) / stats["wall"], 3),
+        "latency_seconds": dist(stats["latency"]),
+        "preliminary_seconds": dist(stats["preliminary"]),
+        "loop_lag_ms": {name: round(value * 1000, 2) for name, value in dist(loop_lag).items()},
+        "stage_seconds": {
+            stage: {"mean": round(statistics.mean(values), 4), **dist(values)}
+            for stage, values in sorted(stats["stages"].items())
+        },
+    }
+
+
+def print_report(report: dict, errors: list) -> None:
+    print(f"{report['requests']} requests, concurrency {report['concurrency']}, "
+          f"mode {report['mode']}, fake LLM {report['llm_latency']}s "
+          f"+/- {report['llm_jitter']}s")
+    print(f"completed {report['completed']}, errors {report['errors']}, "
+          f"429/503 retries {report['rejected']}, wall {report['wall_seconds']:.2f}s, "
+          f"throughput {report['throughput_per_second']:.2f}/s")
+    print()
+    print(f"{'metric':<24}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    rows = [
+        ("latency (s)", report["latency_seconds"]),
+        ("preliminary (s)", report["preliminary_seconds"]),
+        ("event-loop lag (ms)", report["loop_lag_ms"]),
+    ] + [(f"stage {name} (s)", values) for name, values in report["stage_seconds"].items()]
+    for name, values in rows:
+        print(f"{name:<24}" + "".join(f"{values[key]:>10.3f}" for key in ("p50", "p95", "p99", "max")))
+    for error in errors[:5]:
+        print(f"error: {error}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mode", choices=["fast", "standard", "deep"], default="standard")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Fake LLM +/- seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rpm", type=float, default=0, help="LLM calls per minute, 0 for no limit")
+    parser.add_argument("--tpm", type=float, default=0, help="LLM tokens per minute, 0 for no limit")
+    parser.add_argument("--resumes", type=Path, default=FIXTURES / "resumes")
+    parser.add_argument("--jobs", type=Path, default=FIXTURES / "html")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so they must be in place before the app loads
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(args.latency)
+    os.environ["FAKE_LLM_JITTER"] = str(args.jitter)
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+    os.environ["LLM_RPM_LIMIT"] = str(args.rpm)
+    os.environ["LLM_TPM_LIMIT"] = str(args.tpm)
+    os.environ["CLIENT_RPM_LIMIT"] = "0"
+    # The job pages are local, so there is no host to be polite to
+    os.environ.setdefault("SCRAPER_PER_HOST_INTERVAL", "0")
+
+    resumes = [path.read_text() for path in sorted(args.resumes.glob("*.txt"))]
+    pages = serve_job_pages(args.jobs)
+    jobs = [
+        f"http://127.0.0.1:{pages.server_port}/{path.name}"
+        for path in sorted(args.jobs.glob("*.html"))
+    ]
+
+    loop_lag: list = []
+    port = free_port()
+    # Agents log verbosely to stdout; keep it clean for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        server, thread = start_app(port, loop_lag)
+        try:
+            stats = asyncio.run(drive(f"http://127.0.0.1:{port}", jobs, resumes, args))
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
+            pages.shutdown()
+
+    report = summarize(stats, loop_lag, args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, stats["errors"])
+    if stats["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare job posting HTML extraction backends on saved HTML fixtures.
+
+Usage (from backend/):
+    python -m benchmarks.bench_html_extract [--repeat 20] [--fixtures DIR]
+
+For each fixture and each installed backend, prints the median extraction
+time and the size of the extracted text. "legacy" is the original
+BeautifulSoup pipeline (html.parser, no JSON-LD or main-content detection),
+kept as the baseline.
+"""
+from pathlib import Path
+import argparse
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from app.html_extract import available_backends, extract_job_text  # noqa: E402
+
+DEFAULT_FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "html"
+
+
+def legacy_html_to_text(html: str) -> str:
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+def time_extractor(extract, html: str, repeat: int):
+    timings = []
+    text = ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = extract(html)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES)
+    args = parser.parse_args()
+
+    extractors = {"legacy": legacy_html_to_text}
+    for backend in available_backends():
+        extractors[backend] = lambda html, backend=backend: extract_job_text(html, backend)
+
+    print(f"{'fixture':<28} {'backend':<12} {'html KB':>8} {'median ms':>10} {'text chars':>11} {'speedup':>8}")
+    for path in sorted(args.fixtures.glob("*.html")):
+        html = path.read_text(encoding="utf-8")
+        baseline = None
+        for name, extract in extractors.items():
+            seconds, text = time_extractor(extract, html, args.repeat)
+            baseline = baseline or seconds
+            print(f"{path.name:<28} {name:<12} {len(html) / 1024:>8.1f} {seconds * 1000:>10.2f} "
+                  f"{len(text):>11} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
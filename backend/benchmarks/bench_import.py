@@ -0,0 +1,121 @@
+"""
+Measure the API's cold start: import time per module and the warm-up.
+
+Usage (from backend/):
+    python -m benchmarks.bench_import [--repeat 5] [--top 15] [--module main] [--json]
+
+Each run imports the module in a fresh interpreter under ``python -X
+importtime`` and reports the median over runs: the total, the slowest
+top-level packages and every ``app`` module (cumulative, so a module's
+count includes what it imports first). A last run times the background
+warm-up (``app.warmup``) that loads the lazily imported engines, with
+the fake LLM backend so no API key is needed.
+"""
+from pathlib import Path
+from typing import Dict, List
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+WARMUP_SCRIPT = (
+    "import json, main; from app.warmup import Warmup; "
+    "w = Warmup(); w.run(); print(json.dumps(w.to_dict()))"
+)
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """
+    Parse ``-X importtime`` output into cumulative seconds per module.
+
+    Args:
+        stderr: Standard error of the interpreter
+
+    Returns:
+        Module name to cumulative import seconds
+    """
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, total, name = line[len("import time:"):].split("|", 2)
+        cumulative[name.strip()] = int(total) / 1e6
+    return cumulative
+
+
+def time_import(module: str) -> Dict[str, float]:
+    """Import a module in a fresh interpreter and return its import times."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+
+def time_warmup() -> Dict:
+    """Run the startup warm-up after importing the app and return its status."""
+    env = {**os.environ, "LLM_BACKEND": "fake"}
+    result = subprocess.run(
+        [sys.executable, "-c", WARMUP_SCRIPT],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True, env=env
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def median_times(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    names = set().union(*runs)
+    return {name: statistics.median(run.get(name, 0.0) for run in runs) for name in names}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip timing the warm-up")
+    parser.add_argument("--json", action="store_true", help="Print a JSON report")
+    args = parser.parse_args()
+
+    runs = [time_import(args.module) for _ in range(args.repeat)]
+    times = median_times(runs)
+    total = times.get(args.module, 0.0)
+    packages = sorted(
+        ((name, seconds) for name, seconds in times.items() if "." not in name and name != args.module),
+        key=lambda item: item[1], reverse=True
+    )[:args.top]
+    app_modules = sorted(
+        ((name, seconds) for name, seconds in times.items() if name == "app" or name.startswith("app.")),
+        key=lambda item: item[1], reverse=True
+    )
+    warmup = None if args.no_warmup else time_warmup()
+
+    if args.json:
+        print(json.dumps({
+            "module": args.module,
+            "repeat": args.repeat,
+            "total_seconds": total,
+            "packages": dict(packages),
+            "app_modules": dict(app_modules),
+            "warmup": warmup,
+        }, indent=2))
+        return
+
+    print(f"import {args.module}: {total * 1000:.0f} ms (median of {args.repeat})\n")
+    print(f"{'package':<40} {'cumulative ms':>14} {'share':>7}")
+    for name, seconds in packages:
+        print(f"{name:<40} {seconds * 1000:>14.1f} {seconds / total:>7.1%}")
+    print(f"\n{'app module':<40} {'cumulative ms':>14}")
+    for name, seconds in app_modules:
+        print(f"{name:<40} {seconds * 1000:>14.1f}")
+    if warmup is not None:
+        print(f"\nwarm-up: {warmup['status']} in {(warmup['seconds'] or 0) * 1000:.0f} ms")
+        for name, seconds in warmup["timings"].items():
+            print(f"  {name:<38} {seconds * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
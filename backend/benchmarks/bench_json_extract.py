@@ -0,0 +1,114 @@
+"""
+Compare JSON extraction from agent outputs: the old regex cascade vs json_extract.
+
+Usage (from backend/):
+    python -m benchmarks.bench_json_extract [--repeat 50] [--scale 200]
+
+Outputs are built to look like captured crew output: ReAct "Thought:"
+chatter full of braces and quotes, a fenced or bare JSON answer and
+trailing prose. ``--scale`` sets how many chatter lines and list items
+the large cases carry. "legacy" is the regex cascade the analysis service
+used before, kept as the baseline; "found" says whether the extractor
+returned the answer at all (the legacy cascade returns {} on a miss).
+"""
+from pathlib import Path
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import json_extract  # noqa: E402
+from app.json_extract import JSONExtractionError, extract_json  # noqa: E402
+
+
+def legacy_extract(output_str: str) -> dict:
+    json_match = re.search(r'```(?:json)?\s*(\{[\s\S]*?\})\s*```', str(output_str))
+    if json_match:
+        try:
+            return json.loads(json_match.group(1))
+        except json.JSONDecodeError:
+            pass
+    try:
+        return json.loads(str(output_str))
+    except json.JSONDecodeError:
+        pass
+    json_match = re.search(r'\{[\s\S]*\}', str(output_str))
+    if json_match:
+        try:
+            return json.loads(json_match.group(0))
+        except json.JSONDecodeError:
+            pass
+    return {}
+
+
+def build_outputs(scale: int) -> dict:
+    answer = {
+        "match_score": 72,
+        "matched_keywords": [f"skill {i}" for i in range(scale)],
+        "missing_keywords": ["Kubernetes", "Terraform"],
+        "skills_gap": [f"No evidence of tool {{{i}}}" for i in range(scale)],
+        "strengths": ['Led the "payments" rewrite'] * scale,
+        "suggestions": ["Quantify outcomes"],
+    }
+    body = json.dumps(answer, indent=2)
+    chatter = "\n".join(
+        f'Thought: step {i} looks at {{section {i}}} and the "summary" of item {i}'
+        for i in range(scale)
+    )
+    prose = "\n".join(f"Note {i}: the score weighs {{skills}} over {{tenure}}." for i in range(scale))
+    return {
+        "fenced_small": f"Final Answer: ```json\n{json.dumps({'match_score': 72})}\n```",
+        "fenced_large": f"{chatter}\nFinal Answer: ```json\n{body}\n```\n{prose}",
+        "bare_with_prose": f"{chatter}\nFinal Answer: {body}\n{prose}",
+        "no_json": chatter + "\n" + "{" * scale * 10 + " unfinished",
+    }
+
+
+def run_extractor(output: str) -> dict:
+    try:
+        return extract_json(output)
+    except JSONExtractionError:
+        return {}
+
+
+def time_extractor(extract, output: str, repeat: int):
+    timings = []
+    data = {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        data = extract(output)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--scale", type=int, default=200)
+    args = parser.parse_args()
+
+    fast_loads = json_extract.orjson
+    backends = {"legacy": (legacy_extract, None), "decode+json": (run_extractor, None)}
+    if fast_loads is not None:
+        backends["decode+orjson"] = (run_extractor, fast_loads)
+
+    print(f"{'output':<18} {'extractor':<14} {'KB':>7} {'median ms':>10} {'found':>6} {'speedup':>8}")
+    for name, output in build_outputs(args.scale).items():
+        baseline = None
+        for label, (extract, loads_module) in backends.items():
+            json_extract.orjson = loads_module
+            try:
+                seconds, data = time_extractor(extract, output, args.repeat)
+            finally:
+                json_extract.orjson = fast_loads
+            baseline = baseline or seconds
+            print(f"{name:<18} {label:<14} {len(output) / 1024:>7.1f} {seconds * 1000:>10.3f} "
+                  f"{'yes' if data else 'no':>6} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
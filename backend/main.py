@@ -1,12 +1,42 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import analysis
+from app.routers import analysis, batch, resumes
+from app.job_scraper import get_scraper
+from app.job_store import cleanup_periodically, get_job_store
+from app.metrics import REGISTRY, MetricsMiddleware
+from app.pdf_parser import shutdown_process_pool
+from app.services.worker_pool import shutdown_worker_pool
+from app.warmup import WARMUP_ON_STARTUP, get_warmup
+from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI(title="AI Resume Analyzer API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    interval = float(os.getenv("JOB_STORE_CLEANUP_INTERVAL", "60"))
+    tasks = [asyncio.create_task(cleanup_periodically(get_job_store(), interval))]
+    # CrewAI, LangChain and PyMuPDF load in the background so the server
+    # answers /api/health at once; /api/ready reports when they are loaded
+    if WARMUP_ON_STARTUP:
+        tasks.append(asyncio.create_task(get_warmup().start()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await get_scraper().aclose()
+        # The PDF pool's children are spawned processes; stop them so none
+        # outlives a reload
+        shutdown_process_pool()
+        shutdown_worker_pool()
+
+
+app = FastAPI(title="AI Resume Analyzer API", lifespan=lifespan)
 
 # CORS - allow both local and production
 origins = [
@@ -26,9 +56,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(analysis.router)
+app.include_router(batch.router)
+app.include_router(resumes.router)
 
 @app.get("/")
 async def root():
     return {"message": "AI Resume Analyzer API", "status": "running"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -1,10 +1,15 @@
+import threading
 import pytest
+from crewai import Crew, Task
 from app.agents.crew_config import (
+    LLMRegistry,
     create_resume_parser_agent,
     create_job_analyst_agent,
     create_quality_scorer_agent,
     create_match_analyzer_agent
 )
+from app.json_extract import extract_json
+from app.services.structured_analysis import StructuredAnalysisEngine
 
 def test_create_agents():
     """Test that all agents can be created."""
@@ -14,3 +19,47 @@ def test_create_agents():
     assert callable(create_job_analyst_agent)
     assert callable(create_quality_scorer_agent)
     assert callable(create_match_analyzer_agent)
+
+def test_registry_shares_llms_and_reuses_agents_per_thread():
+    """Test that models are cached per settings and agents per worker thread."""
+    registry = LLMRegistry(max_connections=4, max_keepalive=2)
+
+    llm = registry.llm("claude-test", 0.1)
+    assert registry.llm("claude-test", 0.1) is llm
+    assert registry.llm("claude-test", 0.7) is not llm
+    assert llm._client is registry.client()
+
+    agent = registry.agent("resume_parser")
+    assert registry.agent("resume_parser") is agent
+    assert agent.llm is registry.llm()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(registry.agent("resume_parser")))
+    thread.start()
+    thread.join()
+    assert other[0] is not agent
+    assert registry.stats()["agents_built"] == 2
+
+def test_fake_backend_answers_offline_and_deterministically():
+    """Test that the fake backend drives agents and the structured engine without the API."""
+    registry = LLMRegistry(backend="fake")
+    registry.llm().latency = registry.client().latency = 0
+    registry.llm().jitter = registry.client().jitter = 0
+
+    agent = registry.agent("match_analyzer")
+    task = Task(
+        description="Compare the resume to the job requirements. Resume: Python. Job: Go.",
+        agent=agent,
+        expected_output="JSON with match analysis"
+    )
+    output = Crew(agents=[agent], tasks=[task]).kickoff()
+    assert 0 <= extract_json(output)["match_score"] <= 100
+    assert registry.stats()["backend"] == "fake"
+
+    engine = StructuredAnalysisEngine(client=registry.client())
+    first = engine.analyze("Python developer", "Needs Go")
+    again = engine.analyze("Python developer", "Needs Go")
+    assert first.analysis == again.analysis
+    assert first.input_tokens > 0 and not first.repaired_fields
+
+    with pytest.raises(ValueError, match="LLM_BACKEND"):
+        LLMRegistry(backend="openai")
@@ -0,0 +1,235 @@
+import asyncio
+import pytest
+from app.cache import MemoryCache
+from app.models import KeywordAnalysis, MatchAnalysis, QualityFeedback, StructuredAnalysis
+from app.services.analysis_service import AnalysisService
+from app.services.structured_analysis import EngineResult
+
+def make_service():
+    return AnalysisService(result_cache=MemoryCache(), stage_cache=MemoryCache())
+
+def test_resume_parse_is_memoized_across_pairings(monkeypatch):
+    """Test that the same resume is parsed once, whatever job it is paired with."""
+    service = make_service()
+    calls = []
+
+    def fake_run_task(agent, description, expected_output):
+        calls.append(description)
+        return '```json\n{"skills": ["Python"]}\n```'
+
+    monkeypatch.setattr(service, "_run_task", fake_run_task)
+    monkeypatch.setattr("app.services.analysis_service.create_resume_parser_agent", lambda: None)
+
+    first = service.parse_resume("Jane Doe\nPython developer")
+    second = service.parse_resume("Jane Doe  Python developer")
+
+    assert first == second == '{"skills": ["Python"]}'
+    assert len(calls) == 1
+
+def test_unparseable_stage_output_is_not_cached(monkeypatch):
+    """Test that stage output without JSON is returned but not memoized."""
+    service = make_service()
+    calls = []
+
+    def fake_run_task(agent, description, expected_output):
+        calls.append(description)
+        return "I could not analyze this posting."
+
+    monkeypatch.setattr(service, "_run_task", fake_run_task)
+    monkeypatch.setattr("app.services.analysis_service.create_job_analyst_agent", lambda: None)
+
+    assert service.analyze_job("Backend engineer") == "I could not analyze this posting."
+    service.analyze_job("Backend engineer")
+    assert len(calls) == 2
+
+def test_off_shape_stage_output_is_not_cached(monkeypatch):
+    """Test that an empty or wrongly shaped stage object is returned but not memoized."""
+    service = make_service()
+    outputs = iter(['{}', '{"required_skills": 3}', '{"required_skills": ["Go"]}'])
+    calls = []
+
+    def fake_run_task(agent, description, expected_output):
+        calls.append(description)
+        return next(outputs)
+
+    monkeypatch.setattr(service, "_run_task", fake_run_task)
+    monkeypatch.setattr("app.services.analysis_service.create_job_analyst_agent", lambda: None)
+
+    assert service.analyze_job("Backend engineer") == "{}"
+    assert service.analyze_job("Backend engineer") == '{"required_skills": 3}'
+    assert service.analyze_job("Backend engineer") == '{"required_skills": ["Go"]}'
+    assert service.analyze_job("Backend engineer") == '{"required_skills": ["Go"]}'
+    assert len(calls) == 3
+
+def test_analyze_resume_runs_stages_as_a_graph(monkeypatch):
+    """Test that matching gets both parses and timings are recorded per stage."""
+    service = make_service()
+    monkeypatch.setattr(service, "parse_resume", lambda text: '{"skills": ["Python"]}')
+    monkeypatch.setattr(service, "analyze_job", lambda text: '{"required_skills": ["Python"]}')
+    monkeypatch.setattr(service, "score_quality", lambda text: '{"overall_score": 81}')
+    seen = []
+    monkeypatch.setattr(
+        service, "match",
+        lambda resume, job, keywords: seen.append((resume, job)) or '{"match_score": 64}'
+    )
+
+    result = asyncio.run(service.analyze_resume("Jane Doe, Python developer", "Python role"))
+
+    assert seen == [('{"skills": ["Python"]}', '{"required_skills": ["Python"]}')]
+    assert result.resume_quality_score == 81 and result.job_match_score == 64
+    assert set(result.stage_timings) == {
+        "resume_parse", "job_analysis", "quality", "keywords", "match"
+    }
+    assert result.match_analysis.keyword_analysis.matched_keywords == ["Python"]
+
+def test_progress_is_reported_as_stages_start_and_finish(monkeypatch):
+    """Test that each stage reports working, then completed with its run time."""
+    events = []
+
+    async def on_progress(agent, status, message, progress, **details):
+        events.append((details.get("stage"), status, progress, details))
+
+    service = AnalysisService(
+        progress_callback=on_progress, result_cache=MemoryCache(), stage_cache=MemoryCache()
+    )
+    monkeypatch.setattr(service, "parse_resume", lambda text: '{"skills": ["Python"]}')
+    monkeypatch.setattr(service, "analyze_job", lambda text: '{"required_skills": ["Python"]}')
+    monkeypatch.setattr(service, "score_quality", lambda text: '{"overall_score": 81}')
+    monkeypatch.setattr(service, "match", lambda resume, job, keywords: '{"match_score": 64}')
+
+    asyncio.run(service.analyze_resume("Jane Doe, Python developer", "Python role"))
+
+    stages = {"resume_parse", "job_analysis", "quality", "match"}
+    for stage in stages:
+        statuses = [status for name, status, _, _ in events if name == stage]
+        assert statuses == ["working", "completed"]
+    order = [(name, status) for name, status, _, _ in events]
+    assert order.index(("match", "working")) > order.index(("resume_parse", "completed"))
+    assert order.index(("match", "working")) > order.index(("job_analysis", "completed"))
+    completed = [e for e in events if e[1] == "completed" and e[0] in stages]
+    assert [e[2] for e in completed] == sorted(e[2] for e in completed)
+    assert all(e[3]["stage_seconds"] >= 0 and e[3]["elapsed"] >= 0 for e in completed)
+    assert events[-1][1:3] == ("completed", 100)
+
+def test_fast_mode_skips_every_llm_stage(monkeypatch):
+    """Test that fast mode scores quality and keywords without calling the LLM."""
+    service = make_service()
+    for stage in ("parse_resume", "analyze_job", "score_quality", "match", "analyze_fit"):
+        monkeypatch.setattr(service, stage, lambda *args, **kwargs: pytest.fail("LLM stage called"))
+
+    result = asyncio.run(service.analyze_resume(
+        "Python and Docker engineer", "Needs Python, Docker and AWS", mode="fast"
+    ))
+
+    assert result.match_analysis.keyword_analysis.missing_keywords == ["AWS"]
+    assert result.job_match_score == result.match_analysis.keyword_analysis.match_percentage
+    assert set(result.stage_timings) == {"keywords", "quality", "match"}
+
+def test_standard_mode_emits_preliminary_result_then_one_llm_call(monkeypatch):
+    """Test that the local result is delivered first and one merged call refines it."""
+    preliminary = []
+
+    async def on_result(result):
+        preliminary.append(result)
+
+    service = AnalysisService(
+        result_cache=MemoryCache(), stage_cache=MemoryCache(), result_callback=on_result
+    )
+    calls = []
+    structured = StructuredAnalysis(
+        resume_quality_score=88,
+        quality_feedback=[QualityFeedback(category="Overall", score=88, feedback="Solid")],
+        match_analysis=MatchAnalysis(
+            match_score=91, keyword_analysis=KeywordAnalysis(), strengths=["Python depth"]
+        )
+    )
+    monkeypatch.setattr(
+        service, "analyze_fit",
+        lambda resume, job, keywords: calls.append(keywords.matched)
+        or EngineResult(structured, input_tokens=900, output_tokens=300, repaired_fields=[])
+    )
+    for stage in ("parse_resume", "analyze_job", "score_quality", "match"):
+        monkeypatch.setattr(service, stage, lambda *args, **kwargs: pytest.fail("deep stage called"))
+
+    result = asyncio.run(service.analyze_resume(
+        "Python engineer", "Needs Python and AWS", mode="standard"
+    ))
+
+    assert calls == [["Python"]]
+    assert [r.mode for r in preliminary] == ["fast"]
+    assert result.mode == "standard"
+    assert result.resume_quality_score == 88 and result.job_match_score == 91
+    assert result.match_analysis.strengths == ["Python depth"]
+    assert result.match_analysis.keyword_analysis.missing_keywords == ["AWS"]
+    assert set(result.stage_timings) == {"keywords", "analysis"}
+    assert [(s.stage, s.part) for s in result.prompt_stats] == [
+        ("analysis", "resume"), ("analysis", "job")
+    ]
+
+def test_reservation_is_released_when_the_analysis_fails_early():
+    """Test that a failing preliminary callback does not strand the pool place."""
+    from app.services.worker_pool import CrewWorkerPool
+
+    async def on_result(result):
+        raise RuntimeError("job store write failed")
+
+    pool = CrewWorkerPool(max_workers=1, max_pending=2)
+    service = AnalysisService(
+        worker_pool=pool, result_cache=MemoryCache(), stage_cache=MemoryCache(),
+        result_callback=on_result
+    )
+    reservation = pool.reserve()
+    with pytest.raises(RuntimeError, match="job store write failed"):
+        asyncio.run(service.analyze_resume(
+            "Python engineer", "Needs Python", reservation=reservation, mode="deep"
+        ))
+    assert reservation.released
+    assert pool.stats()["queue_depth"] == 0
+    pool.shutdown()
+
+def test_unknown_mode_is_rejected():
+    """Test that an unsupported mode raises ValueError."""
+    with pytest.raises(ValueError, match="Unknown analysis mode"):
+        asyncio.run(make_service().analyze_resume("resume", "job", mode="turbo"))
+
+def test_cache_hit_keeps_the_requested_analysis_id():
+    """Test that a cached result is returned under the caller's analysis ID."""
+    service = make_service()
+    resume, job = "Jane Doe, Python developer", "Python role"
+    first = asyncio.run(service.analyze_resume(resume, job, mode="fast", analysis_id="first"))
+    assert first.analysis_id == "first"
+
+    cached = service.get_cached_result(resume, job, "fast", analysis_id="second")
+    assert cached.analysis_id == "second"
+    again = asyncio.run(service.analyze_resume(resume, job, mode="fast", analysis_id="third"))
+    assert again.analysis_id == "third"
+
+def test_cache_keys_depend_on_the_llm_backend(monkeypatch):
+    """Test that results cached with the fake backend are not served to real runs."""
+    from app.services import analysis_service
+    service = make_service()
+    calls = []
+
+    def fake_run_task(agent, description, expected_output):
+        calls.append(description)
+        return '{"skills": ["Python"]}'
+
+    monkeypatch.setattr(service, "_run_task", fake_run_task)
+    monkeypatch.setattr(analysis_service, "create_resume_parser_agent", lambda: None)
+    monkeypatch.setattr(analysis_service, "LLM_BACKEND", "fake")
+    fake_key = service.cache_key("resume", "job")
+    service.parse_resume("Jane Doe, Python developer")
+
+    monkeypatch.setattr(analysis_service, "LLM_BACKEND", "anthropic")
+    assert service.cache_key("resume", "job") != fake_key
+    service.parse_resume("Jane Doe, Python developer")
+    assert len(calls) == 2
+
+def test_unreadable_cached_result_is_a_miss():
+    """Test that a cache entry in an old result shape is dropped instead of raising."""
+    service = make_service()
+    key = service.cache_key("resume", "job", "fast")
+    service.result_cache.set(key, '{"analysis_id": "old", "score": 3}')
+
+    assert service.get_cached_result("resume", "job", "fast") is None
+    assert service.result_cache.get(key) is None
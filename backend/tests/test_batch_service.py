@@ -0,0 +1,82 @@
+import asyncio
+import fitz
+from app.cache import MemoryCache
+from app.services.analysis_service import AnalysisService
+from app.services.batch_service import BatchService
+from app.services.worker_pool import CrewWorkerPool
+
+def make_pdf(text: str) -> bytes:
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+class FakeAnalysisService(AnalysisService):
+    """Analysis service whose stages return canned JSON instead of calling the LLM."""
+
+    def __init__(self):
+        super().__init__(
+            worker_pool=CrewWorkerPool(max_workers=2, max_pending=10),
+            result_cache=MemoryCache(),
+            stage_cache=MemoryCache()
+        )
+        self.job_runs = 0
+
+    def analyze_job(self, job_description):
+        self.job_runs += 1
+        return '{"required_skills": ["Python"]}'
+
+    def parse_resume(self, resume_text):
+        return resume_text
+
+    def score_quality(self, resume_text):
+        return '{"overall_score": 80}'
+
+    def match(self, parsed_resume, job_requirements, keywords=None):
+        score = 90 if "Python" in parsed_resume else 40
+        return '{"match_score": %d}' % score
+
+def test_rank_resumes_sorts_by_match_and_analyzes_job_once():
+    """Test ranking order, shared job analysis and per-item failures."""
+    analysis = FakeAnalysisService()
+    updates = []
+
+    async def progress(update):
+        updates.append(update)
+
+    service = BatchService(progress_callback=progress, analysis_service=analysis, concurrency=2)
+    resumes = [
+        ("java.pdf", make_pdf("Jane Roe - Senior Java engineer with ten years of backend work")),
+        ("python.pdf", make_pdf("John Doe - Senior Python engineer with ten years of backend work")),
+        ("broken.pdf", b"not a pdf"),
+    ]
+
+    result = asyncio.run(service.rank_resumes(resumes, "Python developer"))
+
+    assert [item.label for item in result.items] == ["python.pdf", "java.pdf", "broken.pdf"]
+    assert [item.rank for item in result.items] == [1, 2, None]
+    assert result.completed == 2 and result.failed == 1
+    assert analysis.job_runs == 1
+    assert sum(1 for u in updates if u.status != "working") == 3
+
+def test_compare_jobs_parses_resume_once_and_ranks_postings():
+    """Test that one resume is matched against each posting and sorted."""
+    analysis = FakeAnalysisService()
+    parses = []
+    analysis.parse_resume = lambda text: parses.append(text) or "Python engineer"
+    analysis.match = lambda resume, job, keywords=None: (
+        '{"match_score": %d, "matched_keywords": ["Python"]}' % (85 if "Python" in job else 30)
+    )
+
+    service = BatchService(analysis_service=analysis)
+    result = asyncio.run(service.compare_jobs(
+        "Python engineer resume",
+        job_descriptions=["Go developer", "Python developer"]
+    ))
+
+    assert [row.label for row in result.rows] == ["Job description 2", "Job description 1"]
+    assert result.rows[0].match_score == 85
+    assert result.rows[0].matched_keywords == ["Python"]
+    assert len(parses) == 1
@@ -0,0 +1,55 @@
+import asyncio
+import zipfile
+import pytest
+from fastapi import HTTPException
+from io import BytesIO
+from starlette.datastructures import UploadFile
+from app.routers import batch
+from app.routers.batch import read_uploads
+
+def make_zip(members) -> bytes:
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+def upload(name: str, data: bytes) -> UploadFile:
+    return UploadFile(file=BytesIO(data), filename=name)
+
+def test_zip_members_are_read():
+    """Test that PDFs are unpacked from a zip and other members are skipped."""
+    data = make_zip([("a.pdf", b"%PDF-a"), ("notes.txt", b"x"), ("dir/b.pdf", b"%PDF-b")])
+    files = asyncio.run(read_uploads([upload("resumes.zip", data)]))
+    assert files == [("a.pdf", b"%PDF-a"), ("b.pdf", b"%PDF-b")]
+
+def test_oversized_zip_member_is_rejected_before_unpacking(monkeypatch):
+    """Test that a highly compressed member over the PDF limit is refused."""
+    monkeypatch.setattr(batch, "MAX_PDF_BYTES", 1024)
+    data = make_zip([("bomb.pdf", b"\0" * 10 * 1024 * 1024)])
+    assert len(data) < 64 * 1024
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(read_uploads([upload("resumes.zip", data)]))
+    assert exc_info.value.status_code == 413
+
+def test_total_unpacked_size_is_capped():
+    """Test the batch byte budget across zip members."""
+    data = make_zip([(f"{i}.pdf", b"\0" * 1000) for i in range(5)])
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(read_uploads([upload("resumes.zip", data)], max_bytes=3000))
+    assert exc_info.value.status_code == 413
+
+def test_file_count_aborts_during_extraction():
+    """Test that counting stops at the limit instead of unpacking every member."""
+    data = make_zip([(f"{i}.pdf", b"%PDF") for i in range(50)])
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(read_uploads([upload("resumes.zip", data)], limit=3))
+    assert exc_info.value.status_code == 400
+    assert "more than 3" in exc_info.value.detail
+
+def test_oversized_pdf_upload_is_rejected(monkeypatch):
+    """Test that a plain PDF upload is bounded while it is read."""
+    monkeypatch.setattr(batch, "MAX_PDF_BYTES", 1024)
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(read_uploads([upload("big.pdf", b"\0" * 4096)]))
+    assert exc_info.value.status_code == 413
@@ -0,0 +1,43 @@
+import time
+from app.cache import MemoryCache, SQLiteCache, content_hash, normalize_text
+
+def test_content_hash_ignores_whitespace_after_normalizing():
+    """Test that normalized texts differing only in whitespace share a key."""
+    a = content_hash("v1", normalize_text("Python  developer\n\nRemote"))
+    b = content_hash("v1", normalize_text("Python developer Remote"))
+    assert a == b
+    assert a != content_hash("v2", normalize_text("Python developer Remote"))
+
+def test_memory_cache_evicts_least_recently_used():
+    """Test that the byte cap evicts the least recently used entry."""
+    cache = MemoryCache(max_bytes=30)
+    cache.set("a", "x" * 10)
+    cache.set("b", "y" * 10)
+    assert cache.get("a") is not None
+    cache.set("c", "z" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 10
+    assert cache.get("c") == "z" * 10
+
+def test_memory_cache_ttl_expiry():
+    """Test that expired entries are treated as misses."""
+    cache = MemoryCache(ttl=0.05)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    time.sleep(0.1)
+    assert cache.get("key") is None
+    assert cache.stats()["hits"] == 1
+
+def test_sqlite_cache_persists_and_evicts(tmp_path):
+    """Test that SQLite entries survive reopening and respect the size cap."""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache(path, max_bytes=25)
+    cache.set("a", "x" * 10)
+    cache.set("b", "y" * 10)
+    cache.get("a")
+    cache.set("c", "z" * 10)
+
+    reopened = SQLiteCache(path, max_bytes=25)
+    assert reopened.get("a") == "x" * 10
+    assert reopened.get("b") is None
+    assert reopened.get("c") == "z" * 10
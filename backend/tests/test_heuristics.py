@@ -0,0 +1,37 @@
+from app.heuristics import score_resume_quality
+
+STRONG = """Jane Doe
+jane@example.com | +1 555 123 4567
+
+EXPERIENCE
+- Led a team of 6 engineers shipping the billing platform
+- Reduced p95 latency by 40% across 12 services
+- Saved $200k per year by migrating batch jobs to spot instances
+
+EDUCATION
+BSc Computer Science, 2014
+
+SKILLS
+Python, Go, PostgreSQL, Kubernetes
+"""
+
+WEAK = """I am a hard working developer and I like my job.
+I did many tasks for my team over the years at the company.
+"""
+
+def test_strong_resume_outscores_weak_resume():
+    """Test that metrics, action verbs, sections and contact details raise the score."""
+    strong = score_resume_quality(STRONG)
+    weak = score_resume_quality(WEAK)
+
+    assert strong["overall_score"] > weak["overall_score"]
+    assert strong["category_scores"]["quantified_achievements"] == 20
+    assert strong["category_scores"]["clarity_and_impact"] == 20
+    assert weak["category_scores"]["professional_language"] < 20
+    assert any("first-person" in item for item in weak["feedback"])
+    assert any("Education" in item for item in weak["feedback"])
+
+def test_years_are_not_counted_as_achievements():
+    """Test that bare years do not count as quantified results."""
+    result = score_resume_quality("EXPERIENCE\n- Worked on backend systems from 2019 to 2023")
+    assert result["category_scores"]["quantified_achievements"] == 0
@@ -0,0 +1,54 @@
+from pathlib import Path
+import pytest
+from app.html_extract import available_backends, extract_job_posting_json_ld, extract_job_text
+
+FIXTURES = Path(__file__).parent / "fixtures" / "html"
+
+def load(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+def test_json_ld_job_posting_is_preferred():
+    """Test that an embedded JobPosting replaces the page text."""
+    text = extract_job_posting_json_ld(load("greenhouse_jsonld.html"))
+    assert text.startswith("Title: Senior Backend Engineer")
+    assert "Company: Acme Analytics" in text
+    assert "Location: Berlin DE" in text
+    assert "Kubernetes and AWS in production" in text
+    assert "&lt;" not in text and "<li>" not in text
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_main_content_drops_page_chrome(backend):
+    """Test that navigation, footers, banners and inline JSON are removed."""
+    text = extract_job_text(load("workday_inline_json.html"), backend)
+    assert text.startswith("Data Platform Engineer")
+    assert "Airflow, Spark or dbt" in text
+    assert "Footer link" not in text
+    assert "Similar job" not in text
+    assert "__INITIAL_STATE__" not in text
+
+POSTING = "<p>" + "Design and run ingestion pipelines in Python and SQL. " * 6 + "</p>"
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("html", [
+    f'<body><div class="menu-wrapper"><main><h1>Data Engineer</h1>{POSTING}</main></div></body>',
+    f'<body><div class="shareable-content job-description"><h1>Data Engineer</h1>{POSTING}</div></body>',
+    f'<body><div class="page-menu"><h1>Data Engineer</h1>{POSTING}</div></body>',
+    f'<body><article><header><h1>Data Engineer</h1></header>{POSTING}</article></body>',
+])
+def test_content_containers_are_not_pruned(backend, html):
+    """Test that content in chrome-like or wrapping containers is kept."""
+    text = extract_job_text(html, backend)
+    assert text.startswith("Data Engineer")
+    assert "ingestion pipelines" in text
+
+def test_backends_agree():
+    """Test that every installed backend extracts the same text."""
+    html = load("plain_article.html")
+    outputs = {backend: extract_job_text(html, backend) for backend in available_backends()}
+    assert len(set(outputs.values())) == 1
+    assert "Subscribe" not in outputs["html.parser"]
+
+def test_unknown_backend_raises():
+    """Test that asking for a missing backend raises ValueError."""
+    with pytest.raises(ValueError, match="not available"):
+        extract_job_text("<p>hi</p>", backend="nope")
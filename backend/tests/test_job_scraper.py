@@ -1,5 +1,11 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import pytest
-from app.job_scraper import scrape_job_posting
+from app.cache import MemoryCache
+from app import job_scraper
+from app.job_scraper import AsyncJobScraper, normalize_url, scrape_job_posting
 
 def test_scrape_job_posting():
     """Test basic job posting scraping."""
@@ -7,3 +13,195 @@ def test_scrape_job_posting():
     result = scrape_job_posting("https://example.com")
     assert isinstance(result, str)
     assert len(result) > 0
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves canned job pages; /flaky fails once before succeeding."""
+
+    hits = {}
+
+    def do_GET(self):
+        StubHandler.hits[self.path] = StubHandler.hits.get(self.path, 0) + 1
+        if self.path == "/flaky" and StubHandler.hits[self.path] == 1:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/slow-down":
+            self.send_response(429)
+            self.send_header("Retry-After", "86400")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/missing":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path.startswith("/etag") and self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        if self.path == "/huge":
+            body = b"<p>" + b"x" * 5000 + b"</p>"
+        else:
+            body = (
+                b"<html><head><style>p {}</style><script>var a;</script></head>"
+                b"<body><h1>Backend Engineer</h1><p>Python  and  SQL</p></body></html>"
+            )
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    StubHandler.hits = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+def make_scraper(**kwargs):
+    options = {"per_host_interval": 0, "backoff": 0.01, "max_bytes": 1024}
+    options.update(kwargs)
+    return AsyncJobScraper(**options)
+
+def test_async_scraper_extracts_text(stub_server):
+    """Test that page text is extracted without scripts or styles."""
+    async def scenario():
+        scraper = make_scraper()
+        try:
+            return await scraper.fetch(f"{stub_server}/job")
+        finally:
+            await scraper.aclose()
+
+    text = asyncio.run(scenario())
+    assert "Backend Engineer" in text
+    assert "Python and SQL" in text
+    assert "var a" not in text
+
+def test_async_scraper_retries_transient_errors(stub_server):
+    """Test that a 503 is retried and the second attempt succeeds."""
+    async def scenario():
+        scraper = make_scraper()
+        try:
+            return await scraper.fetch(f"{stub_server}/flaky")
+        finally:
+            await scraper.aclose()
+
+    assert "Backend Engineer" in asyncio.run(scenario())
+    assert StubHandler.hits["/flaky"] == 2
+
+def test_async_scraper_fetch_many_reports_failures(stub_server):
+    """Test concurrent fetches with per-URL errors and the response size cap."""
+    async def scenario():
+        scraper = make_scraper(per_host_concurrency=3)
+        try:
+            return await scraper.fetch_many([
+                f"{stub_server}/a", f"{stub_server}/missing", f"{stub_server}/huge"
+            ])
+        finally:
+            await scraper.aclose()
+
+    ok, missing, huge = asyncio.run(scenario())
+    assert "Backend Engineer" in ok
+    assert isinstance(missing, ValueError)
+    assert isinstance(huge, ValueError) and "larger than" in str(huge)
+    assert StubHandler.hits["/missing"] == 1
+
+def test_async_scraper_fails_fast_on_a_long_retry_after(stub_server):
+    """Test that a host asking to wait a day fails the fetch instead of stalling it."""
+    async def scenario():
+        scraper = make_scraper(max_retry_after=5)
+        try:
+            with pytest.raises(ValueError, match="retry after 86400"):
+                await scraper.fetch(f"{stub_server}/slow-down")
+        finally:
+            await scraper.aclose()
+
+    started = time.monotonic()
+    asyncio.run(scenario())
+    assert time.monotonic() - started < 2
+    assert StubHandler.hits["/slow-down"] == 1
+
+def test_normalize_url_drops_tracking_and_fragments():
+    """Test that equivalent posting URLs share one cache key."""
+    assert normalize_url("HTTPS://Jobs.Example.com:443/posting/42/?utm_source=x&b=2&a=1#apply") == \
+        normalize_url("https://jobs.example.com/posting/42?a=1&b=2")
+
+def test_cached_posting_revalidates_with_etag(stub_server, monkeypatch):
+    """Test fresh hits skip the network and stale entries revalidate via 304."""
+    parses = []
+    original = job_scraper.html_to_text
+    monkeypatch.setattr(job_scraper, "html_to_text", lambda html: parses.append(1) or original(html))
+
+    async def scenario(scraper, path):
+        try:
+            return await scraper.fetch(f"{stub_server}{path}")
+        finally:
+            await scraper.aclose()
+
+    cache = MemoryCache()
+    fresh = make_scraper(page_cache=cache, freshness_ttl=60)
+    first = asyncio.run(scenario(fresh, "/etag?utm_medium=mail"))
+    asyncio.run(scenario(fresh, "/etag"))
+    assert StubHandler.hits["/etag?utm_medium=mail"] == 1
+    assert "/etag" not in StubHandler.hits
+
+    stale = make_scraper(page_cache=cache, freshness_ttl=0)
+    assert asyncio.run(scenario(stale, "/etag")) == first
+    assert StubHandler.hits["/etag"] == 1
+    assert len(parses) == 1
+
+def test_page_cache_is_used_off_the_event_loop(stub_server):
+    """Test that page cache reads and writes run on worker threads."""
+    threads = []
+
+    class RecordingCache(MemoryCache):
+        def get(self, key):
+            threads.append(threading.current_thread())
+            return super().get(key)
+
+        def set(self, key, value, ttl=None):
+            threads.append(threading.current_thread())
+            super().set(key, value, ttl)
+
+    async def scenario():
+        scraper = make_scraper(page_cache=RecordingCache())
+        try:
+            return await scraper.fetch(f"{stub_server}/job")
+        finally:
+            await scraper.aclose()
+
+    assert "Backend Engineer" in asyncio.run(scenario())
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+
+def test_idle_host_limiters_are_evicted():
+    """Test that the host table stays bounded without dropping a host in use."""
+    scraper = make_scraper(max_hosts=2)
+    busy = scraper._host_limiter("https://busy.example/job")
+    busy.users = 1
+    for i in range(5):
+        scraper._host_limiter(f"https://host{i}.example/job")
+
+    assert len(scraper._hosts) == 2
+    assert scraper._hosts["busy.example"] is busy
+
+def test_each_event_loop_gets_its_own_scraper():
+    """Test that a scraper, whose client is bound to a loop, is not shared across loops."""
+    async def pair():
+        return job_scraper.get_scraper(), job_scraper.get_scraper()
+
+    first, again = asyncio.run(pair())
+    other, _ = asyncio.run(pair())
+    assert first is again
+    assert other is not first
+    assert other.page_cache is first.page_cache
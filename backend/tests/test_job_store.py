@@ -0,0 +1,186 @@
+import asyncio
+import json
+import time
+import pytest
+from app.job_store import (
+    LocalRedis,
+    MemoryJobStore,
+    RedisJobStore,
+    SQLiteJobStore,
+    follow,
+    start_job
+)
+from app.models import AgentUpdate
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_store(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "sqlite":
+            return SQLiteJobStore(str(tmp_path / "jobs.sqlite3"), **kwargs)
+        if request.param == "redis":
+            return RedisJobStore(LocalRedis(), **kwargs)
+        return MemoryJobStore(**kwargs)
+    return make
+
+def test_events_are_numbered_and_result_is_kept(make_store):
+    """Test that events replay from a sequence number and finishing stores the result."""
+    store = make_store()
+    store.create("a", "analysis")
+    store.append_event("a", "update", '{"progress": 10}')
+    store.append_event("a", "update", '{"progress": 50}')
+    store.finish("a", '{"score": 80}')
+
+    assert [seq for seq, _, _ in store.events("a")] == [1, 2, 3]
+    assert store.events("a", after=2) == [(3, "complete", '{"score": 80}')]
+    record = store.get("a")
+    assert record.status == "completed"
+    assert record.to_dict()["result"] == {"score": 80}
+    assert store.get("missing") is None
+
+def test_terminal_event_is_stored_before_the_status(make_store):
+    """Test that a finished job never lacks its terminal event, as seen by another process."""
+    store = make_store()
+    seen = []
+    save = store._save
+
+    def checked_save(record):
+        if record.status != "running":
+            seen.append([event for _, event, _ in store.events(record.job_id)])
+        save(record)
+
+    store._save = checked_save
+    store.create("a", "analysis")
+    store.finish("a", "{}")
+    store.create("b", "analysis")
+    store.fail("b", "boom")
+    assert seen == [["complete"], ["error"]]
+
+def test_expired_and_abandoned_jobs(make_store):
+    """Test that old jobs disappear and silent running jobs are reported failed."""
+    store = make_store(ttl=60, stale_after=0.05)
+    store.create("stuck", "analysis")
+    time.sleep(0.1)
+
+    record = store.get("stuck")
+    assert record.status == "error" and "abandoned" in record.error
+    assert store.events("stuck")[-1][1] == "error"
+
+    store = make_store(ttl=0.05)
+    store.create("old", "batch")
+    time.sleep(0.1)
+    assert store.get("old") is None
+
+def test_abandoned_job_keeps_a_single_terminal_event(make_store):
+    """Test that a job reported abandoned ignores its owner's late result."""
+    store = make_store(stale_after=0.05)
+    store.create("slow", "analysis")
+    time.sleep(0.1)
+    assert store.get("slow").status == "error"
+
+    store.finish("slow", "{}")
+    assert [event for _, event, _ in store.events("slow")] == ["error"]
+    assert store.get("slow").status == "error"
+
+def test_redis_events_for_an_expired_job_are_dropped():
+    """Test that appending to an expired job neither recreates a partial record nor fails reads."""
+    client = LocalRedis()
+    store = RedisJobStore(client, ttl=60)
+    store.create("gone", "analysis")
+    client.delete("job:gone")
+
+    assert store.append_event("gone", "update", "{}") == 0
+    assert client.hgetall("job:gone") == {}
+    assert store.get("gone") is None
+
+    store.create("live", "analysis")
+    assert store.append_event("live", "update", "{}") == 1
+    assert client._expiry["job:live:events"] > time.time() + 30
+
+def test_cleanup_removes_expired_jobs(tmp_path):
+    """Test that a sweep removes jobs past their TTL and keeps the rest."""
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"), ttl=0.05)
+    store.create("old", "analysis")
+    time.sleep(0.1)
+    store.create("new", "analysis")
+
+    assert store.cleanup() == 1
+    assert store.events("old") == []
+    assert store._load("new") is not None
+
+def test_jobs_are_visible_to_other_processes(tmp_path):
+    """Test that a second store on the same SQLite file sees jobs and events."""
+    path = str(tmp_path / "jobs.sqlite3")
+    writer, reader = SQLiteJobStore(path), SQLiteJobStore(path)
+    writer.create("a", "analysis")
+    writer.append_event("a", "update", "{}")
+
+    assert reader.get("a").status == "running"
+    assert reader.events("a") == [(1, "update", "{}")]
+
+def test_started_job_streams_to_completion(make_store):
+    """Test that a background job's events and result reach a follower."""
+    store = make_store()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        store.append_event("job", "update", "{}")
+        return AgentUpdate(agent_name="Done", status="completed", message="ok", progress=100)
+
+    async def failing():
+        raise RuntimeError("scrape failed")
+
+    async def scenario():
+        await start_job(store, "job", "analysis", work())
+        await start_job(store, "bad", "analysis", failing())
+        seen = [event async for event in follow(store, "job")]
+        failed = [event async for event in follow(store, "bad")]
+        return seen, failed
+
+    seen, failed = asyncio.run(scenario())
+
+    assert [event for _, event, _ in seen] == ["update", "complete"]
+    assert json.loads(seen[-1][2])["agent_name"] == "Done"
+    assert failed[-1][1] == "error" and "scrape failed" in failed[-1][2]
+
+def test_followers_fan_out_and_resume_from_an_event_id():
+    """Test that every subscriber gets every event and a reconnect replays the rest."""
+    store = MemoryJobStore()
+    store.create("job", "analysis")
+
+    async def scenario():
+        async def collect(after=0):
+            return [(seq, event) async for seq, event, _ in follow(store, "job", after)]
+
+        followers = [asyncio.create_task(collect()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        for progress in (25, 50):
+            store.append_event("job", "update", json.dumps({"progress": progress}))
+            await asyncio.sleep(0.01)
+        store.finish("job", "{}")
+        # Woken by the writes rather than by polling
+        done = await asyncio.wait_for(asyncio.gather(*followers), timeout=1)
+        return done, await collect(after=1)
+
+    followers, resumed = asyncio.run(scenario())
+
+    expected = [(1, "update"), (2, "update"), (3, "complete")]
+    assert followers == [expected] * 3
+    assert resumed == expected[1:]
+
+def test_work_is_closed_when_the_job_cannot_be_registered():
+    """Test that a job whose record cannot be created never runs."""
+    store = MemoryJobStore()
+    ran = []
+
+    async def work():
+        ran.append(True)
+
+    def broken_create(job_id, kind):
+        raise OSError("disk full")
+
+    store.create = broken_create
+    coro = work()
+    with pytest.raises(OSError, match="disk full"):
+        asyncio.run(start_job(store, "job", "analysis", coro))
+    assert ran == []
+    assert coro.cr_frame is None
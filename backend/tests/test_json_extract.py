@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from app.cache import MemoryCache
+from app.json_extract import JSONExtractionError, decode_object_at, extract_json, extract_model
+from app.models import MatchStageOutput
+from app.services.analysis_service import AnalysisService
+
+def test_fenced_answer_with_chatter_and_trailing_prose():
+    """Test that ReAct chatter, fences and prose after the object are skipped."""
+    output = (
+        'Thought: I should use {the resume} and say "hi\n'
+        'Final Answer: ```json\n{"match_score": 72, "notes": {"a": [1, 2]}}\n```\n'
+        'Let me know if you need {anything} else.'
+    )
+    assert extract_json(output) == {"match_score": 72, "notes": {"a": [1, 2]}}
+
+def test_braces_and_quotes_inside_strings_are_ignored():
+    """Test that structure characters in JSON strings do not end the object."""
+    output = 'Result: {"feedback": ["Use } and { sparingly", "Say \\"led\\""]} done'
+    assert extract_json(output)["feedback"] == ["Use } and { sparingly", 'Say "led"']
+
+def test_unclosed_brace_does_not_hide_later_object():
+    """Test that a stray opening brace before the answer is skipped."""
+    assert extract_json('Placeholder {name was left in.\n{"overall_score": 64}') == {
+        "overall_score": 64
+    }
+
+@pytest.mark.parametrize("use_orjson", [False, True])
+def test_decode_stops_at_end_of_object(monkeypatch, use_orjson):
+    """Test that both decoders return the object and where it ends."""
+    from app import json_extract
+
+    if use_orjson:
+        if json_extract.orjson is None:
+            pytest.skip("orjson is not installed")
+    else:
+        monkeypatch.setattr(json_extract, "orjson", None)
+    assert decode_object_at('x {"a": {"b": "é}"}} tail', 2) == ({"a": {"b": "é}"}}, 20)
+    with pytest.raises(ValueError):
+        decode_object_at('x {"a": 1 tail', 2)
+
+def test_missing_json_raises():
+    """Test that output without a JSON object is reported, not turned into {}."""
+    with pytest.raises(JSONExtractionError, match="No JSON object"):
+        extract_json("I could not analyze this posting {sorry}.")
+
+def test_model_validation_failure_raises():
+    """Test that an object of the wrong shape is reported with the model name."""
+    with pytest.raises(JSONExtractionError, match="MatchStageOutput"):
+        extract_model('{"score": 70}', MatchStageOutput)
+    match = extract_model('{"match_score": 70, "strengths": "Python"}', MatchStageOutput)
+    assert match.match_score == 70 and match.strengths == ["Python"]
+
+def test_malformed_quality_output_fails_the_analysis(monkeypatch):
+    """Test that unusable agent output fails the analysis instead of scoring 75."""
+    service = AnalysisService(result_cache=MemoryCache(), stage_cache=MemoryCache())
+    monkeypatch.setattr(service, "parse_resume", lambda text: '{"skills": ["Python"]}')
+    monkeypatch.setattr(service, "analyze_job", lambda text: '{"required_skills": ["Python"]}')
+    monkeypatch.setattr(service, "score_quality", lambda text: "The resume looks fine.")
+    monkeypatch.setattr(service, "match", lambda resume, job, keywords: '{"match_score": 64}')
+
+    with pytest.raises(JSONExtractionError):
+        asyncio.run(service.analyze_resume("Jane Doe, Python developer", "Python role", mode="deep"))
@@ -0,0 +1,47 @@
+import json
+from app.keywords import SkillIndex, local_match_output, match_keywords, tokenize
+
+JOB = (
+    "Senior Backend Engineer. Requirements: Python, Django, PostgreSQL and "
+    "Kubernetes (k8s). Experience with AWS. Nice to have: Kafka and GraphQL."
+)
+RESUME = "Python3 developer who built REST APIs on django and postgres, deployed on EKS."
+
+def test_tokenize_keeps_skill_punctuation():
+    """Test that c++, c#, node.js and ci/cd survive tokenization."""
+    assert tokenize("C++, C# and Node.js; CI/CD.") == ["c++", "c#", "and", "node.js", "ci/cd"]
+
+def test_synonyms_map_to_canonical_skills():
+    """Test multi-word, abbreviated and longest-match synonyms."""
+    counts = SkillIndex().count("Amazon Web Services, k8s, Apache Kafka, kafka, golang")
+    assert counts == {"AWS": 1, "Kubernetes": 1, "Kafka": 2, "Go": 1}
+    # "go" on its own is too ambiguous to count
+    assert SkillIndex().count("ready to go") == {}
+
+def test_common_words_in_prose_are_not_skills():
+    """Test that everyday words shared with skill names only count in a skill phrase."""
+    prose = (
+        "You will work with the rest of the team, node by node, through spring and "
+        "summer, monitoring security and analytics of our containers in a lambda room."
+    )
+    assert SkillIndex().count(prose) == {}
+    assert SkillIndex().count("REST API, Node.js, Spring Boot, AWS Lambda") == {
+        "REST APIs": 1, "Node.js": 1, "Spring": 1, "Serverless": 1
+    }
+
+def test_match_keywords_weights_required_over_preferred():
+    """Test matched/missing split, ordering and weighted coverage."""
+    result = match_keywords(RESUME, JOB)
+
+    assert result.matched == ["Django", "PostgreSQL", "Kubernetes", "Python"]
+    assert result.missing == ["AWS", "GraphQL", "Kafka"]
+    assert result.weights["Kafka"] < result.weights["AWS"]
+    assert 0 < result.coverage < 100
+    assert match_keywords(RESUME, JOB).to_analysis() == result.to_analysis()
+
+def test_local_match_output_has_match_stage_shape():
+    """Test that the LLM-free match output parses like the agent's JSON."""
+    data = json.loads(local_match_output(match_keywords(RESUME, JOB)))
+    assert data["match_score"] == match_keywords(RESUME, JOB).coverage
+    assert data["missing_keywords"][0] == "AWS"
+    assert {"skills_gap", "strengths", "suggestions"} <= set(data)
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import threading
+import time
+from app.metrics import HTTP_SECONDS, LLM_COST, LLM_TOKENS, MetricsMiddleware, MetricsRegistry
+from app.services.progress import StageMonitor
+
+def test_registry_renders_prometheus_text():
+    """Test counters, cumulative histogram buckets and collector samples in the exposition."""
+    registry = MetricsRegistry(prefix="test_")
+    requests = registry.counter("requests_total", "Requests")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.add_collector(lambda: [("queue_depth", "gauge", "Queue", {}, 3)])
+
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    latency.observe(0.05, stage="parse")
+    latency.observe(0.5, stage="parse")
+    text = registry.render()
+
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_requests_total{route="/a"} 3' in text
+    assert 'test_latency_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="parse",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{stage="parse",le="+Inf"} 2' in text
+    assert 'test_latency_seconds_count{stage="parse"} 2' in text
+    assert "# TYPE test_queue_depth gauge\ntest_queue_depth 3" in text
+
+def test_timer_decorator_times_each_call_separately():
+    """Test that a decorated function records one observation per concurrent call."""
+    registry = MetricsRegistry(prefix="")
+    spans = registry.histogram("span_seconds", "Spans", buckets=(0.01, 1.0))
+
+    @spans.time(span="work")
+    def work():
+        time.sleep(0.05)
+
+    threads = [threading.Thread(target=work) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert spans.count(span="work") == 3
+    assert 'span_seconds_bucket{span="work",le="0.01"} 0' in registry.render()
+
+def test_stage_usage_is_counted_with_cost():
+    """Test that token usage recorded by a stage reaches the token and cost counters."""
+    before = LLM_TOKENS.value(stage="metrics_test", direction="input")
+    StageMonitor("metrics_test").record_usage(1_000_000, 0)
+
+    assert LLM_TOKENS.value(stage="metrics_test", direction="input") == before + 1_000_000
+    assert LLM_COST.value(stage="metrics_test") >= 3.0
+
+def test_middleware_times_and_profiles_a_streamed_response(tmp_path, monkeypatch):
+    """Test that a streamed body passes through while the request is timed and profiled."""
+    from app import metrics
+    monkeypatch.setattr(metrics, "PROFILE_DIR", str(tmp_path))
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for chunk in (b"data: 1\n\n", b"data: 2\n\n"):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    scope = {"type": "http", "method": "GET", "path": "/api/stream/x", "headers": [(b"x-profile", b"1")]}
+    before = HTTP_SECONDS.count(method="GET", route="unmatched", status="200")
+    asyncio.run(MetricsMiddleware(app)(scope, receive, send))
+
+    assert [m.get("body") for m in sent[1:]] == [b"data: 1\n\n", b"data: 2\n\n", b""]
+    headers = dict(sent[0]["headers"])
+    assert os.path.isfile(headers[b"x-profile-file"].decode())
+    assert HTTP_SECONDS.count(method="GET", route="unmatched", status="200") == before + 1
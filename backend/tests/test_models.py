@@ -1,5 +1,4 @@
-import pytest
-from app.models import AnalysisRequest, AnalysisResult, AgentUpdate
+from app.models import AnalysisRequest, AgentUpdate
 
 def test_analysis_request_validation():
     """Test AnalysisRequest model validation."""
@@ -1,3 +1,4 @@
+import fitz
 import pytest
 from app.pdf_parser import extract_text_from_pdf
 
@@ -10,3 +11,37 @@ def test_extract_text_from_pdf_empty():
     """Test that empty bytes raises ValueError."""
     with pytest.raises(ValueError):
         extract_text_from_pdf(b"")
+
+def make_pdf(pages):
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def test_extract_text_from_pdf_page_limit():
+    """Test that documents over the page limit are rejected."""
+    pdf = make_pdf(["one", "two", "three"])
+    assert extract_text_from_pdf(pdf, max_pages=3).split() == ["one", "two", "three"]
+    with pytest.raises(ValueError, match="3 pages"):
+        extract_text_from_pdf(pdf, max_pages=2)
+
+def test_extract_text_from_pdf_file_parallel(tmp_path, monkeypatch):
+    """Test that page ranges extracted in worker processes keep page order."""
+    from app import pdf_parser
+    monkeypatch.setattr(pdf_parser, "PARALLEL_PAGE_THRESHOLD", 2)
+    monkeypatch.setattr(pdf_parser, "PDF_WORKERS", 2)
+    path = tmp_path / "cv.pdf"
+    path.write_bytes(make_pdf([f"page{i}" for i in range(5)]))
+
+    text = pdf_parser.extract_text_from_pdf_file(str(path))
+    assert text.split() == [f"page{i}" for i in range(5)]
+
+def test_extract_text_from_pdf_file_size_limit(tmp_path):
+    """Test that oversized files are rejected before parsing."""
+    from app.pdf_parser import extract_text_from_pdf_file
+    path = tmp_path / "cv.pdf"
+    path.write_bytes(make_pdf(["hello"]))
+    with pytest.raises(ValueError, match="larger than"):
+        extract_text_from_pdf_file(str(path), max_bytes=10)
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+from langchain_core.outputs import LLMResult
+from app.agents.crew_config import get_llm
+from app.services.progress import ProgressReporter, StageMonitor, current_monitor, monitoring
+
+def test_monitor_counts_usage_from_llm_output():
+    """Test that usage in ChatAnthropic's llm_output is summed across calls."""
+    monitor = StageMonitor("match")
+
+    monitor.on_llm_end(LLMResult(generations=[], llm_output={
+        "usage": {"input_tokens": 120, "output_tokens": 40}
+    }))
+    monitor.on_llm_end(LLMResult(generations=[], llm_output={
+        "usage": {"input_tokens": 80, "output_tokens": 10}
+    }))
+    monitor.on_llm_end(LLMResult(generations=[], llm_output=None))
+
+    assert (monitor.input_tokens, monitor.output_tokens, monitor.llm_calls) == (200, 50, 2)
+
+def test_shared_llm_reports_usage_to_the_calling_threads_stage():
+    """Test that the shared LLM's callback feeds only the monitor on the calling thread."""
+    handler = get_llm().callbacks[0]
+    result = LLMResult(generations=[], llm_output={"usage": {"input_tokens": 5, "output_tokens": 2}})
+    monitor, other = StageMonitor("quality"), StageMonitor("match")
+
+    def other_stage():
+        with monitoring(other):
+            pass
+        handler.on_llm_end(result)
+
+    with monitoring(monitor):
+        handler.on_llm_end(result)
+        thread = threading.Thread(target=other_stage)
+        thread.start()
+        thread.join()
+
+    assert (monitor.input_tokens, monitor.output_tokens) == (5, 2)
+    assert other.llm_calls == 0
+    assert current_monitor() is None
+
+def test_reporter_emits_start_from_worker_thread_and_failure():
+    """Test that a stage's start and failure reach the loop from its thread."""
+    events = []
+
+    async def on_progress(agent, status, message, progress, **details):
+        events.append((agent, status, details["stage"]))
+
+    async def scenario():
+        reporter = ProgressReporter(on_progress, ["quality"])
+
+        def stage():
+            with reporter.stage_context("quality"):
+                raise RuntimeError("model overloaded")
+
+        try:
+            await asyncio.to_thread(stage)
+        except RuntimeError:
+            pass
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+
+    assert events == [
+        ("Quality Scorer Agent", "working", "quality"),
+        ("Quality Scorer Agent", "error", "quality"),
+    ]
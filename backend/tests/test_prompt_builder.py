@@ -0,0 +1,86 @@
+from app.models import ContactInfo, ResumeDocument, ResumeSection
+from app.prompt_builder import PromptBuilder, clean_lines, count_tokens, stage_budget
+
+
+def make_document():
+    return ResumeDocument(
+        content_hash="abc",
+        page_count=2,
+        contact=ContactInfo(name="Jane Doe", lines=["Jane Doe", "jane@example.com"]),
+        sections=[
+            ResumeSection(kind="summary", heading="Summary", lines=["Engineer who ships."]),
+            ResumeSection(kind="experience", heading="Experience", lines=[
+                f"Built service {i} in Python handling {i}00 requests per second"
+                for i in range(40)
+            ]),
+            ResumeSection(kind="skills", heading="Skills", lines=["Python, AWS, Docker"]),
+            ResumeSection(kind="interests", heading="Interests", lines=["Climbing"]),
+        ],
+    )
+
+
+def test_clean_lines_drops_page_numbers_and_repeated_headers():
+    text = "Jane Doe  Resume\n\nPython   developer\nPage 1 of 2\nJane Doe Resume\n2\nAWS"
+
+    assert clean_lines(text) == ["Jane Doe Resume", "Python developer", "AWS"]
+
+
+def test_resume_within_budget_keeps_stage_sections():
+    prompts = PromptBuilder(budgets={"resume_parse": {"resume": 10000}})
+
+    text = prompts.resume("resume_parse", "", make_document())
+
+    assert "EXPERIENCE" in text and "Climbing" not in text and "Engineer who ships" not in text
+    assert prompts.stats[0].truncated is False
+
+
+def test_resume_over_budget_keeps_highest_value_sections_in_order():
+    prompts = PromptBuilder(budgets={"quality": {"resume": 200}})
+
+    text = prompts.resume("quality", "", make_document())
+
+    assert count_tokens(text) <= 200
+    assert text.index("EXPERIENCE") < text.index("[...]")
+    assert "SKILLS" in text and "Built service 39" not in text
+    assert text.index("jane@example.com") < text.index("EXPERIENCE") < text.index("SKILLS")
+    assert prompts.stats[0].truncated is True
+
+
+def test_plain_text_resume_is_split_at_headings():
+    resume = "Jane Doe\nInterests\nChess and hiking\nSkills\nPython\nExperience\nBuilt APIs"
+    prompts = PromptBuilder(budgets={"quality": {"resume": 12}})
+
+    text = prompts.resume("quality", resume)
+
+    assert "Built APIs" in text and "Chess" not in text
+
+
+def test_job_drops_boilerplate_and_duplicates():
+    posting = (
+        "We need a Python engineer. Must have AWS experience. We need a Python engineer.\n"
+        "We are an equal opportunity employer. Apply now!"
+    )
+    prompts = PromptBuilder()
+
+    text = prompts.job("job_analysis", posting)
+
+    assert text == "We need a Python engineer. Must have AWS experience."
+    stat = prompts.stats[0]
+    assert stat.tokens_after < stat.tokens_before
+
+
+def test_job_over_budget_prefers_requirement_sentences():
+    posting = "Our office has a great view. " * 5 + "Required: Python and Kubernetes."
+    prompts = PromptBuilder(budgets={"job_analysis": {"job": 12}})
+
+    text = prompts.job("job_analysis", posting)
+
+    assert "Kubernetes" in text
+
+
+def test_stage_budget_env_override(monkeypatch):
+    monkeypatch.setenv("PROMPT_BUDGET_QUALITY_RESUME", "123")
+
+    assert stage_budget("quality", "resume") == 123
+    assert stage_budget("match", "job") == 2000
+    assert stage_budget("unknown", "job") is None
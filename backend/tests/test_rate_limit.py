@@ -0,0 +1,144 @@
+import ipaddress
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+from app.rate_limit import (
+    BATCH, INTERACTIVE, ClientQuota, LLMRateLimiter, TokenBucket, client_identity, lane
+)
+from app.services.worker_pool import CrewWorkerPool, PoolSaturatedError
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after: str):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers={"retry-after": retry_after})
+
+def test_token_bucket_refills_and_goes_into_debt():
+    """Test refill over time and that overdrawing delays later takers."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=20, clock=clock)
+    assert bucket.wait_time(20) == 0
+    bucket.take(25)
+    assert bucket.wait_time(1) == pytest.approx(0.6)
+    clock.now = 1.0
+    assert bucket.available() == pytest.approx(5)
+    clock.now = 100.0
+    assert bucket.available() == 20
+
+def test_interactive_calls_go_before_queued_batch_calls():
+    """Test that a later interactive call is served before an earlier batch call."""
+    limiter = LLMRateLimiter(requests_per_minute=120, tokens_per_minute=0)
+    for _ in range(120):
+        limiter.acquire(1)
+    served = []
+    lock = threading.Lock()
+
+    def call(name):
+        with lane(name):
+            limiter.acquire(1)
+        with lock:
+            served.append(name)
+
+    batch = threading.Thread(target=call, args=(BATCH,))
+    batch.start()
+    time.sleep(0.05)
+    interactive = threading.Thread(target=call, args=(INTERACTIVE,))
+    interactive.start()
+    batch.join(5)
+    interactive.join(5)
+
+    assert served == [INTERACTIVE, BATCH]
+    assert limiter.stats()["waiting"] == {INTERACTIVE: 0, BATCH: 0}
+
+def test_429_pauses_and_retries_with_retry_after():
+    """Test that a 429 is retried after the Retry-After the API sent."""
+    limiter = LLMRateLimiter(requests_per_minute=0, tokens_per_minute=0)
+    attempts = []
+
+    def send():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise RateLimited("0.2")
+        return "ok"
+
+    assert limiter.call(send, tokens=100) == "ok"
+    assert attempts[1] - attempts[0] >= 0.19
+    assert limiter.stats()["throttled"] == 1
+
+def test_server_retry_after_is_capped():
+    """Test that a huge Retry-After pauses for at most the backoff cap."""
+    clock = FakeClock()
+    limiter = LLMRateLimiter(requests_per_minute=0, tokens_per_minute=0, backoff_max=60, clock=clock)
+    assert limiter.pause(86400) == 60
+    assert limiter.admission_delay() <= 60
+
+def test_429_retries_are_bounded():
+    """Test that the last 429 is raised once retries are used up."""
+    limiter = LLMRateLimiter(requests_per_minute=0, tokens_per_minute=0, max_retries=1)
+    with pytest.raises(RateLimited):
+        limiter.call(lambda: (_ for _ in ()).throw(RateLimited("0")), tokens=1)
+    assert limiter.throttled == 2
+
+def test_backlog_turns_away_new_analyses():
+    """Test that a long pause after a 429 makes the worker pool reject admissions."""
+    limiter = LLMRateLimiter(requests_per_minute=0, tokens_per_minute=0)
+    pool = CrewWorkerPool(max_workers=1, max_pending=4,
+                          backpressure=limiter.admission_delay, max_backpressure=5)
+    pool.reserve().release()
+
+    limiter.pause(30)
+    with pytest.raises(PoolSaturatedError) as exc_info:
+        pool.reserve()
+    assert exc_info.value.retry_after >= 29
+
+def test_token_usage_is_settled_against_the_estimate():
+    """Test that unused estimated tokens are given back after the call."""
+    limiter = LLMRateLimiter(requests_per_minute=0, tokens_per_minute=6000)
+    response = SimpleNamespace(usage=SimpleNamespace(input_tokens=400, output_tokens=100))
+    limiter.call(lambda: response, tokens=5000)
+    assert limiter.admission_delay() == 0
+    limiter.call(lambda: response, tokens=5000)
+    assert limiter._tokens.available() == pytest.approx(5000, abs=5)
+
+def test_client_quota_is_per_client():
+    """Test burst, refill and independence of client buckets."""
+    clock = FakeClock()
+    quota = ClientQuota(per_minute=60, burst=2, clock=clock)
+    assert quota.check("ip:1") == 0
+    assert quota.check("ip:1") == 0
+    assert quota.check("ip:1") == 1
+    assert quota.check("key:abc") == 0
+    clock.now = 1.0
+    assert quota.check("ip:1") == 0
+    assert quota.rejected == 1
+
+def test_client_quota_weighs_batches_by_their_analyses():
+    """Test that a batch needs a full bucket and then holds the client off."""
+    clock = FakeClock()
+    quota = ClientQuota(per_minute=60, burst=5, clock=clock)
+    assert quota.check("ip:1", 2) == 0
+    assert quota.check("ip:1", 10) == 2
+    clock.now = 2.0
+    assert quota.check("ip:1", 10) == 0
+    assert quota.check("ip:1") == 6
+
+def test_client_identity_ignores_unknown_keys_and_untrusted_forwarding():
+    """Test that only configured keys and trusted proxies change the client id."""
+    proxies = [ipaddress.ip_network("10.0.0.0/8")]
+    keys = {"team-key"}
+    assert client_identity("team-key", "1.2.3.4", api_keys=keys) == "key:team-key"
+    assert client_identity("made-up", "1.2.3.4", api_keys=keys) == "ip:1.2.3.4"
+    # A client cannot pick its address by sending X-Forwarded-For itself
+    assert client_identity(None, "1.2.3.4", "9.9.9.9", keys, proxies) == "ip:1.2.3.4"
+    # Behind proxies, the last hop they did not add is the client
+    assert client_identity(None, "10.0.0.2", "6.6.6.6, 5.5.5.5, 10.0.0.1", keys, proxies) == "ip:5.5.5.5"
+    assert client_identity(None, None, api_keys=keys) == "ip:unknown"
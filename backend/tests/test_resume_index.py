@@ -0,0 +1,80 @@
+import asyncio
+import numpy as np
+import pytest
+from app.resume_index import ResumeIndex, hashed_vector
+from app.services.batch_service import BatchService
+from tests.test_batch_service import FakeAnalysisService
+
+RESUMES = {
+    "backend.pdf": "Backend engineer. Python, Django, PostgreSQL, Docker and Kubernetes on AWS.",
+    "frontend.pdf": "Frontend developer. React, TypeScript, CSS and accessibility audits.",
+    "analyst.pdf": "Data analyst. SQL, Tableau and Excel dashboards for marketing teams.",
+}
+
+JOB = "Senior backend engineer: Python services, PostgreSQL, k8s and AWS required."
+
+def test_hashed_vectors_are_stable_and_normalized():
+    """Test that embeddings are unit length and identical across calls."""
+    vector = hashed_vector("Python and Kubernetes", dim=256)
+    assert vector.dtype == np.float32
+    assert np.isclose(np.linalg.norm(vector), 1.0)
+    assert np.array_equal(vector, hashed_vector("python  and kubernetes", dim=256))
+    assert not hashed_vector("", dim=256).any()
+
+def test_search_ranks_closest_resumes_first(tmp_path):
+    """Test that top-K retrieval puts the matching resume first and caps the result."""
+    index = ResumeIndex(str(tmp_path / "index"), dim=512)
+    stored = index.add_many([(label, text, None) for label, text in RESUMES.items()])
+
+    hits = index.search(JOB, top_k=2)
+    assert [hit.rank for hit in hits] == [1, 2]
+    assert hits[0].label == "backend.pdf"
+    assert hits[0].resume_id == stored[0].resume_id
+    assert hits[0].score > hits[1].score
+    assert index.resumes([hits[0].resume_id]) == [("backend.pdf", RESUMES["backend.pdf"], None)]
+
+def test_adds_are_incremental_persistent_and_deduplicated(tmp_path, monkeypatch):
+    """Test that the matrix grows, survives reopening and skips known text."""
+    monkeypatch.setattr("app.resume_index.INITIAL_CAPACITY", 2)
+    path = str(tmp_path / "index")
+    index = ResumeIndex(path, dim=128)
+    for label, text in RESUMES.items():
+        index.add(text, label)
+    assert index.stats()["capacity"] == 4
+
+    again = index.add(RESUMES["analyst.pdf"], "copy.pdf")
+    assert again.duplicate and again.label == "analyst.pdf"
+
+    reopened = ResumeIndex(path, dim=128)
+    assert len(reopened) == 3
+    assert reopened.search("SQL Tableau dashboards", top_k=1)[0].label == "analyst.pdf"
+    with pytest.raises(ValueError, match="dimension"):
+        ResumeIndex(path, dim=64)
+
+def test_indexes_opened_by_several_processes_share_rows(tmp_path, monkeypatch):
+    """Test that two handles on one index, like two workers, neither clash nor miss rows."""
+    monkeypatch.setattr("app.resume_index.INITIAL_CAPACITY", 1)
+    path = str(tmp_path / "index")
+    first, second = ResumeIndex(path, dim=128), ResumeIndex(path, dim=128)
+    first.add(RESUMES["backend.pdf"], "backend.pdf")
+    second.add(RESUMES["frontend.pdf"], "frontend.pdf")
+    first.add(RESUMES["analyst.pdf"], "analyst.pdf")
+
+    for index in (first, second):
+        assert index.stats()["resumes"] == 3
+        assert index.search("React TypeScript CSS", top_k=1)[0].label == "frontend.pdf"
+        assert index.search("SQL Tableau dashboards", top_k=1)[0].label == "analyst.pdf"
+    assert np.array_equal(first._df, second._df)
+
+def test_shortlist_goes_through_full_analysis(tmp_path):
+    """Test that indexed resumes can be ranked by the batch analysis without their PDFs."""
+    index = ResumeIndex(str(tmp_path / "index"), dim=512)
+    index.add_many([(label, text, None) for label, text in RESUMES.items()])
+    shortlist = index.resumes([hit.resume_id for hit in index.search(JOB, top_k=2)])
+
+    service = BatchService(analysis_service=FakeAnalysisService())
+    result = asyncio.run(service.rank_texts(shortlist, JOB))
+
+    assert result.completed == 2
+    assert result.items[0].label == "backend.pdf"
+    assert result.items[0].job_match_score == 90
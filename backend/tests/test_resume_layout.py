@@ -0,0 +1,144 @@
+import fitz
+import pytest
+from app.cache import MemoryCache
+from app.resume_layout import extract_resume_document, stage_text
+
+def make_resume() -> bytes:
+    """Two-column-free resume with styled headings, bullets and dates."""
+    lines = [
+        ("JANE DOE", 20, "helv", 72),
+        ("jane@example.com | +1 555 123 4567 | github.com/janedoe", 10, "helv", 72),
+        ("Summary", 13, "hebo", 72),
+        ("Backend engineer with a decade of Python experience.", 10, "helv", 72),
+        ("EXPERIENCE", 13, "hebo", 72),
+        ("Acme Corp, Senior Engineer   Jan 2019 - Present", 10, "helv", 72),
+        ("- Led a team of five building public APIs", 10, "helv", 72),
+        ("and billing pipelines", 10, "helv", 84),
+        ("- Cut p95 latency by 40%", 10, "helv", 72),
+        ("Education", 13, "hebo", 72),
+        ("BSc Computer Science, MIT 2010 - 2014", 10, "helv", 72),
+        ("Skills:", 10, "hebo", 72),
+        ("Python, SQL, Docker, Kubernetes", 10, "helv", 72),
+        ("HOBBIES", 10, "helv", 72),
+        ("Chess and climbing", 10, "helv", 72),
+    ]
+    doc = fitz.open()
+    page = doc.new_page()
+    y = 60
+    for text, size, font, x in lines:
+        page.insert_text((x, y), text, fontsize=size, fontname=font)
+        y += size + 6
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def test_resume_document_sections_contact_bullets_and_dates():
+    """Test that headings, the contact block, wrapped bullets and dates are found."""
+    document = extract_resume_document(make_resume(), cache=MemoryCache())
+
+    assert document.contact.name == "JANE DOE"
+    assert document.contact.emails == ["jane@example.com"]
+    assert document.contact.phones == ["+1 555 123 4567"]
+    assert document.contact.links == ["github.com/janedoe"]
+    assert [section.kind for section in document.sections] == [
+        "summary", "experience", "education", "skills", "interests"
+    ]
+
+    experience = document.sections[1]
+    assert experience.bullets == [
+        "Led a team of five building public APIs and billing pipelines",
+        "Cut p95 latency by 40%",
+    ]
+    assert experience.dates == ["Jan 2019 - Present"]
+    assert document.sections[2].dates == ["2010 - 2014"]
+
+def test_stage_text_keeps_only_relevant_sections():
+    """Test that the parser input drops summary and hobbies but keeps contact details."""
+    document = extract_resume_document(make_resume(), cache=MemoryCache())
+    text = stage_text(document, "resume_parse")
+
+    assert "jane@example.com" in text
+    assert "Kubernetes" in text and "Acme Corp" in text
+    assert "decade of Python" not in text
+    assert "climbing" not in text
+    assert "climbing" in stage_text(document, "quality")
+
+def test_resume_document_is_cached_by_content_hash(monkeypatch):
+    """Test that the same PDF bytes are laid out once."""
+    from app import resume_layout
+    cache = MemoryCache()
+    pdf = make_resume()
+    builds = []
+    original = resume_layout.build_resume_document
+    monkeypatch.setattr(
+        resume_layout, "build_resume_document",
+        lambda doc, digest: builds.append(digest) or original(doc, digest)
+    )
+
+    first = extract_resume_document(pdf, cache=cache)
+    second = extract_resume_document(pdf, cache=cache)
+
+    assert first == second
+    assert len(builds) == 1
+
+def test_extract_resume_document_invalid():
+    """Test that invalid PDF raises ValueError."""
+    with pytest.raises(ValueError, match="Failed to parse PDF"):
+        extract_resume_document(b"not a pdf", cache=MemoryCache())
+
+def test_unstyled_section_name_is_not_a_heading():
+    """Test that a body-size, regular-weight line reading "Skills" stays in its section."""
+    doc = fitz.open()
+    page = doc.new_page()
+    lines = [
+        ("Experience", 13, "hebo"),
+        ("Taught workshops on", 10, "helv"),
+        ("Skills", 10, "helv"),
+        ("and other soft topics", 10, "helv"),
+    ]
+    for i, (text, size, font) in enumerate(lines):
+        page.insert_text((72, 60 + i * 16), text, fontsize=size, fontname=font)
+    pdf = doc.tobytes()
+    doc.close()
+
+    document = extract_resume_document(pdf, cache=MemoryCache())
+    assert [section.kind for section in document.sections] == ["experience"]
+
+def test_long_resume_is_laid_out_in_parallel_page_ranges(monkeypatch):
+    """Test that page ranges read in worker processes give the same document."""
+    from app import pdf_parser
+    source = fitz.open(stream=make_resume(), filetype="pdf")
+    doc = fitz.open()
+    for _ in range(3):
+        doc.insert_pdf(source)
+    pdf = doc.tobytes()
+    doc.close()
+    source.close()
+
+    serial = extract_resume_document(pdf, cache=MemoryCache())
+    monkeypatch.setattr(pdf_parser, "PARALLEL_PAGE_THRESHOLD", 2)
+    monkeypatch.setattr(pdf_parser, "PDF_WORKERS", 2)
+    parallel = extract_resume_document(pdf, cache=MemoryCache())
+
+    assert parallel == serial
+    assert parallel.page_count == 3
+
+def test_cached_document_still_has_to_pass_the_limits(monkeypatch):
+    """Test that a cache hit does not let an oversized PDF skip the byte and page limits."""
+    import app.resume_layout as resume_layout
+
+    source = fitz.open(stream=make_resume(), filetype="pdf")
+    doc = fitz.open()
+    for _ in range(2):
+        doc.insert_pdf(source)
+    pdf = doc.tobytes()
+    doc.close()
+    source.close()
+
+    cache = MemoryCache()
+    extract_resume_document(pdf, cache=cache)
+    with pytest.raises(ValueError, match="2 pages"):
+        extract_resume_document(pdf, max_pages=1, cache=cache)
+    monkeypatch.setattr(resume_layout, "MAX_PDF_BYTES", len(pdf) - 1)
+    with pytest.raises(ValueError, match="larger than"):
+        extract_resume_document(pdf, cache=cache)
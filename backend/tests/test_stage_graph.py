@@ -0,0 +1,56 @@
+import asyncio
+import time
+import pytest
+from app.services.stage_graph import StageGraph
+from app.services.worker_pool import CrewWorkerPool
+
+def slow(value, delay=0.2):
+    def run(*inputs):
+        time.sleep(delay)
+        return value + "".join(inputs)
+    return run
+
+def test_independent_stages_run_concurrently():
+    """Test that wall time follows the longest path, not the sum of stages."""
+    pool = CrewWorkerPool(max_workers=4)
+    graph = StageGraph()
+    graph.add("a", slow("a"))
+    graph.add("b", slow("b"))
+    graph.add("c", slow("c"))
+    graph.add("d", slow("d"), deps=("a", "b"))
+
+    run = asyncio.run(graph.run(pool.run))
+
+    assert run.outputs["d"] == "dab"
+    assert set(run.timings) == {"a", "b", "c", "d"}
+    assert all(t >= 0.2 for t in run.timings.values())
+    assert run.wall_time < 0.6
+
+def test_invalid_graphs_are_rejected():
+    """Test unknown dependencies, cycles and duplicate names."""
+    graph = StageGraph().add("a", slow("a"), deps=("missing",))
+    with pytest.raises(ValueError, match="Unknown stage"):
+        graph.order()
+
+    graph = StageGraph().add("a", slow("a"), deps=("b",)).add("b", slow("b"), deps=("a",))
+    with pytest.raises(ValueError, match="cycle"):
+        graph.order()
+
+    with pytest.raises(ValueError, match="Duplicate"):
+        StageGraph().add("a", slow("a")).add("a", slow("a"))
+
+def test_stage_failure_stops_dependents():
+    """Test that a failing stage fails the run and its dependents never start."""
+    pool = CrewWorkerPool(max_workers=2)
+    started = []
+
+    def broken():
+        raise RuntimeError("parse failed")
+
+    graph = StageGraph()
+    graph.add("parse", broken)
+    graph.add("match", lambda parsed: started.append(parsed), deps=("parse",))
+
+    with pytest.raises(RuntimeError, match="parse failed"):
+        asyncio.run(graph.run(pool.run))
+    assert started == []
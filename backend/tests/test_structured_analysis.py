@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+import pytest
+from app.keywords import match_keywords
+from app.services.structured_analysis import StructuredAnalysisEngine, StructuredOutputError
+
+VALID = {
+    "resume_quality_score": 82,
+    "quality_feedback": [{"category": "Formatting", "score": 17, "feedback": "Clean layout"}],
+    "match_analysis": {
+        "match_score": 74,
+        "keyword_analysis": {"matched_keywords": ["Python"], "missing_keywords": ["AWS"]},
+        "skills_gap": ["Cloud experience"],
+    },
+}
+
+def response(name, data):
+    return SimpleNamespace(
+        content=[SimpleNamespace(type="tool_use", id=f"toolu_{name}", name=name, input=data)],
+        usage=SimpleNamespace(input_tokens=1000, output_tokens=200)
+    )
+
+class FakeMessages:
+    """Returns canned tool calls in order and records every request."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return self.responses.pop(0)
+
+def make_engine(*responses, **kwargs):
+    messages = FakeMessages(responses)
+    return StructuredAnalysisEngine(client=SimpleNamespace(messages=messages), **kwargs), messages
+
+def test_single_call_returns_validated_analysis():
+    """Test that one forced tool call yields the full schema."""
+    engine, messages = make_engine(response("record_analysis", VALID))
+    keywords = match_keywords("Python developer", "Python and AWS")
+
+    result = engine.analyze("Python developer", "Python and AWS", keywords)
+
+    assert result.analysis.match_analysis.match_score == 74
+    assert result.input_tokens == 1000 and result.repaired_fields == []
+    request = messages.requests[0]
+    assert request["tool_choice"] == {"type": "tool", "name": "record_analysis"}
+    assert request["messages"][0]["content"].count("Python developer") == 1
+    assert '"missing_keywords": ["AWS"]' in request["messages"][0]["content"]
+
+def test_only_failing_fields_are_repaired():
+    """Test that the repair call asks for just the invalid fields and merges them."""
+    broken = dict(VALID, resume_quality_score=140)
+    engine, messages = make_engine(
+        response("record_analysis", broken),
+        response("repair_analysis", {"resume_quality_score": 84})
+    )
+
+    result = engine.analyze("resume", "job")
+
+    assert result.analysis.resume_quality_score == 84
+    assert result.analysis.match_analysis.skills_gap == ["Cloud experience"]
+    assert result.repaired_fields == ["resume_quality_score"]
+    assert result.input_tokens == 2000
+    repair = messages.requests[1]
+    repair_tool = next(t for t in repair["tools"] if t["name"] == "repair_analysis")
+    assert list(repair_tool["input_schema"]["properties"]) == ["resume_quality_score"]
+    assert repair["messages"][-1]["content"][0]["is_error"] is True
+
+def test_invalid_after_repairs_raises():
+    """Test that output still failing validation raises StructuredOutputError."""
+    engine, _ = make_engine(
+        response("record_analysis", dict(VALID, quality_feedback=[])),
+        response("repair_analysis", {"quality_feedback": []})
+    )
+    with pytest.raises(StructuredOutputError):
+        engine.analyze("resume", "job")
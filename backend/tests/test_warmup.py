@@ -0,0 +1,70 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+from app.warmup import Warmup
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+def test_importing_the_app_leaves_heavy_modules_unloaded():
+    """Test that starting the API does not import CrewAI, LangChain, PyMuPDF or bs4."""
+    code = (
+        "import sys, main; "
+        "print(','.join(m for m in ('crewai', 'langchain_anthropic', 'anthropic', 'fitz', 'bs4') "
+        "if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+def test_warmup_becomes_ready_with_timings():
+    """Test the status moves to ready and each step is timed."""
+    built = []
+    warmup = Warmup(modules=["json", "csv"], build=lambda: built.append(True))
+    assert warmup.to_dict()["status"] == "pending"
+
+    asyncio.run(warmup.start())
+
+    status = warmup.to_dict()
+    assert warmup.ready
+    assert status["status"] == "ready"
+    assert set(status["timings"]) == {"json", "csv", "engines"}
+    assert built == [True]
+
+def test_warmup_runs_once():
+    """Test that a second run does not rebuild the engines."""
+    built = []
+    warmup = Warmup(modules=[], build=lambda: built.append(True))
+    warmup.run()
+    warmup.run()
+    assert built == [True]
+
+def test_failed_warmup_keeps_the_error():
+    """Test that a missing module marks the warm-up failed, not ready."""
+    warmup = Warmup(modules=["no_such_module_for_warmup"], build=lambda: None)
+    warmup.run()
+    status = warmup.to_dict()
+    assert not warmup.ready
+    assert status["status"] == "failed"
+    assert "ModuleNotFoundError" in status["error"]
+
+def test_ready_endpoint_reports_a_failed_warmup_as_ready(monkeypatch):
+    """Test that /api/ready answers 503 while warming and 200 with the error once failed."""
+    from fastapi import Response
+    from app.routers import analysis
+    warmup = Warmup(modules=["no_such_module_for_warmup"], build=lambda: None)
+    monkeypatch.setattr(analysis, "get_warmup", lambda: warmup)
+    monkeypatch.setattr(analysis, "WARMUP_ON_STARTUP", True)
+
+    response = Response()
+    assert asyncio.run(analysis.ready(response))["status"] == "pending"
+    assert response.status_code == 503
+
+    warmup.run()
+    response = Response()
+    status = asyncio.run(analysis.ready(response))
+    assert response.status_code == 200
+    assert status["status"] == "failed"
+    assert "ModuleNotFoundError" in status["error"]
@@ -0,0 +1,137 @@
+import asyncio
+import time
+import pytest
+from app.services.worker_pool import (
+    CrewWorkerPool, PoolSaturatedError, PoolTimeoutError, get_worker_pool, shutdown_worker_pool,
+)
+
+def test_run_executes_off_event_loop():
+    """Test that blocking work does not stall other coroutines."""
+    pool = CrewWorkerPool(max_workers=1, max_pending=4, job_timeout=5)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker_task = asyncio.create_task(ticker())
+        result = await pool.run(lambda: time.sleep(0.2) or "done")
+        ticker_task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(scenario())
+    assert result == "done"
+    assert ticks > 5
+    assert pool.stats()["completed"] == 1
+
+def test_reserve_rejects_when_queue_full():
+    """Test that admission fails with a Retry-After hint once the queue is full."""
+    pool = CrewWorkerPool(max_workers=1, max_pending=2)
+    pool.reserve()
+    pool.reserve()
+    with pytest.raises(PoolSaturatedError) as exc_info:
+        pool.reserve()
+    assert exc_info.value.retry_after >= 1
+    assert pool.stats()["rejected"] == 1
+    assert pool.queue_depth == 2
+
+def test_run_times_out():
+    """Test that jobs exceeding the timeout raise PoolTimeoutError."""
+    pool = CrewWorkerPool(max_workers=1, max_pending=1, job_timeout=0.05)
+
+    with pytest.raises(PoolTimeoutError):
+        asyncio.run(pool.run(time.sleep, 0.3))
+    assert pool.stats()["timed_out"] == 1
+
+def test_jobs_of_one_reservation_count_once():
+    """Test that an admitted analysis holds one queue place across all its stages."""
+    pool = CrewWorkerPool(max_workers=1, max_pending=2)
+    depths = []
+
+    async def scenario():
+        reservation = pool.reserve()
+        try:
+            # Two stages in parallel and one after them, like the stage graph
+            await asyncio.gather(
+                pool.run(lambda: depths.append(pool.queue_depth), reservation=reservation),
+                pool.run(lambda: depths.append(pool.queue_depth), reservation=reservation),
+            )
+            await pool.run(lambda: depths.append(pool.queue_depth), reservation=reservation)
+            other = pool.reserve()
+            assert pool.queue_depth == 2
+            other.release()
+        finally:
+            reservation.release()
+
+    asyncio.run(scenario())
+    assert depths == [0, 0, 0]
+    assert pool.queue_depth == 0
+
+def test_shared_reservation_is_freed_by_its_last_owner():
+    """Test that a batch and its analyses release one place, once, and only after all of them."""
+    pool = CrewWorkerPool(max_workers=1, max_pending=2)
+    batch = pool.reserve()
+    analysis = batch.share()
+    batch.release()
+    assert pool.queue_depth == 1
+    analysis.release()
+    assert pool.queue_depth == 0
+    with pytest.raises(ValueError, match="released"):
+        asyncio.run(pool.run(lambda: None, reservation=batch))
+
+def test_batch_work_leaves_a_worker_for_interactive_jobs():
+    """Test that an interactive job starts at once while batch work fills the pool."""
+    pool = CrewWorkerPool(max_workers=2, max_pending=8, interactive_workers=1)
+    order = []
+
+    def job(name, seconds):
+        order.append(name)
+        time.sleep(seconds)
+
+    async def scenario():
+        batch = [
+            asyncio.create_task(pool.run(job, f"batch{i}", 0.2, lane="batch"))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        await pool.run(job, "interactive", 0, lane="interactive")
+        waited = time.monotonic() - started
+        await asyncio.gather(*batch)
+        return waited
+
+    waited = asyncio.run(scenario())
+    assert waited < 0.15
+    assert order.index("interactive") == 1
+    pool.shutdown()
+
+def test_interactive_jobs_take_the_next_free_worker_first():
+    """Test that queued interactive jobs run before batch jobs queued earlier."""
+    pool = CrewWorkerPool(max_workers=1, max_pending=8, interactive_workers=0)
+    order = []
+
+    async def scenario():
+        tasks = [asyncio.create_task(pool.run(lambda: order.append("first") or time.sleep(0.1), lane="batch"))]
+        await asyncio.sleep(0.02)
+        for name in ("batch1", "batch2"):
+            tasks.append(asyncio.create_task(pool.run(order.append, name, lane="batch")))
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(pool.run(order.append, "interactive")))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert order == ["first", "interactive", "batch1", "batch2"]
+    pool.shutdown()
+
+def test_shutdown_worker_pool_stops_the_shared_pool():
+    """Test that shutting down the shared pool stops its threads and a later call builds a new one."""
+    pool = get_worker_pool()
+    shutdown_worker_pool()
+    with pytest.raises(RuntimeError):
+        pool._executor.submit(time.sleep, 0)
+    assert get_worker_pool() is not pool
+    shutdown_worker_pool()